@@ -0,0 +1,267 @@
+import logging
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.utils import timezone
+from pymongo import ASCENDING, UpdateOne
+from student.models import CourseProgress, PurchasedCourse, QuizAttempt, VideoPosition
+from student.progress import COMPLETED_PROGRESS
+from .models import Chapter, Quiz
+from .mongo import get_collection
+
+logger = logging.getLogger(__name__)
+
+# Rollup collections, written only by build_rollups() and read by the admin analytics views
+STATE = 'analytics_state'
+COURSE_DAILY = 'analytics_course_daily'      # learners active per course (and 'all') per day
+CHAPTER_DAILY = 'analytics_chapter_daily'    # quiz attempts/correct answers per chapter per day
+COURSE_SUMMARY = 'analytics_course_summary'  # completion funnel and progress per course
+
+STATE_ID = 'rollups'
+ALL_COURSES = 'all'
+DAY_FORMAT = '%Y-%m-%d'
+HALFWAY_PROGRESS = 50.0
+WRITE_BATCH_SIZE = 1000
+
+
+def _day(field):
+    return {'$dateToString': {'format': DAY_FORMAT, 'date': f'${field}'}}
+
+
+def _window(field, start, end):
+    match = {'$lt': end}
+    if start is not None:
+        match['$gte'] = start
+    return {'$match': {field: match}}
+
+
+def _aggregate(model, pipeline):
+    return list(get_collection(model._meta.db_table).aggregate(pipeline, allowDiskUse=True))
+
+
+def _write(name, operations):
+    collection = get_collection(name)
+    for offset in range(0, len(operations), WRITE_BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + WRITE_BATCH_SIZE], ordered=False)
+    return len(operations)
+
+
+def ensure_indexes():
+    get_collection(COURSE_DAILY).create_index([('course_id', ASCENDING), ('day', ASCENDING)])
+    get_collection(CHAPTER_DAILY).create_index([('course_id', ASCENDING), ('day', ASCENDING)])
+
+
+def _rollup_quiz_attempts(start, end):
+    """
+    Attempts and correct answers per chapter and day. Returns the number of chapter days
+    written and {(course id, day): learner ids}.
+    """
+    rows = _aggregate(QuizAttempt, [
+        _window('attempted_at', start, end),
+        {'$group': {
+            '_id': {'quiz_id': '$quiz_id', 'day': _day('attempted_at')},
+            'attempts': {'$sum': 1},
+            'correct': {'$sum': {'$cond': ['$is_correct', 1, 0]}},
+            'learners': {'$addToSet': '$user_id'},
+        }},
+    ])
+    quizzes = {
+        quiz_id: (chapter_id, course_id)
+        for quiz_id, chapter_id, course_id in Quiz.objects.filter(
+            id__in=list({row['_id']['quiz_id'] for row in rows})
+        ).values_list('id', 'chapter_id', 'chapter__module__course_id')
+    }
+    chapters, learners = {}, {}
+    for row in rows:
+        if row['_id']['quiz_id'] not in quizzes:
+            continue  # quiz deleted since
+        chapter_id, course_id = quizzes[row['_id']['quiz_id']]
+        day = row['_id']['day']
+        totals = chapters.setdefault((chapter_id, day), {'course_id': course_id, 'attempts': 0, 'correct': 0})
+        totals['attempts'] += row['attempts']
+        totals['correct'] += row['correct']
+        learners.setdefault((course_id, day), set()).update(row['learners'])
+
+    # whole days are re-aggregated, so the totals replace what an earlier run stored
+    written = _write(CHAPTER_DAILY, [
+        UpdateOne(
+            {'_id': f'{chapter_id}:{day}'},
+            {'$set': {'chapter_id': chapter_id, 'day': day, **totals}},
+            upsert=True,
+        )
+        for (chapter_id, day), totals in chapters.items()
+    ])
+    return written, learners
+
+
+def _activity_learners(start, end):
+    """{(course id, day): learner ids} from progress updates and video heartbeats."""
+    learners = {}
+    for row in _aggregate(CourseProgress, [
+        _window('updated_at', start, end),
+        {'$group': {'_id': {'course_id': '$course_id', 'day': _day('updated_at')},
+                    'learners': {'$addToSet': '$user_id'}}},
+    ]):
+        learners.setdefault((row['_id']['course_id'], row['_id']['day']), set()).update(row['learners'])
+
+    rows = _aggregate(VideoPosition, [
+        _window('updated_at', start, end),
+        {'$group': {'_id': {'chapter_id': '$chapter_id', 'day': _day('updated_at')},
+                    'learners': {'$addToSet': '$user_id'}}},
+    ])
+    courses = dict(Chapter.objects.filter(
+        id__in=list({row['_id']['chapter_id'] for row in rows})
+    ).values_list('id', 'module__course_id'))
+    for row in rows:
+        course_id = courses.get(row['_id']['chapter_id'])
+        if course_id is not None:
+            learners.setdefault((course_id, row['_id']['day']), set()).update(row['learners'])
+    return learners
+
+
+def _rollup_learners(learners):
+    """
+    Add learner ids to the per-course and all-courses day documents. Ids are merged with
+    $addToSet because CourseProgress/VideoPosition only keep their latest update time: a
+    learner seen on a day stays counted after moving on to a later one.
+    """
+    everyone = {}
+    for (course_id, day), user_ids in learners.items():
+        everyone.setdefault(day, set()).update(user_ids)
+    keyed = [(course_id, day, user_ids) for (course_id, day), user_ids in learners.items()]
+    keyed += [(None, day, user_ids) for day, user_ids in everyone.items()]
+    return _write(COURSE_DAILY, [
+        UpdateOne(
+            {'_id': f'{ALL_COURSES if course_id is None else course_id}:{day}'},
+            {'$set': {'course_id': course_id, 'day': day},
+             '$addToSet': {'learners': {'$each': sorted(user_ids)}}},
+            upsert=True,
+        )
+        for course_id, day, user_ids in keyed
+    ])
+
+
+def _rollup_course_summaries(start, end):
+    """Recompute the funnel of every course with progress updates or purchases in the window."""
+    if start is None:
+        course_ids = None
+    else:
+        course_ids = {
+            row['_id'] for model, field in ((CourseProgress, 'updated_at'), (PurchasedCourse, 'purchased_at'))
+            for row in _aggregate(model, [_window(field, start, end), {'$group': {'_id': '$course_id'}}])
+        }
+        if not course_ids:
+            return 0
+    match = [] if course_ids is None else [{'$match': {'course_id': {'$in': sorted(course_ids)}}}]
+
+    def reached(threshold):
+        return {'$sum': {'$cond': [{'$gte': ['$progress', threshold]}, 1, 0]}}
+
+    progress = {row['_id']: row for row in _aggregate(CourseProgress, match + [
+        {'$group': {
+            '_id': '$course_id',
+            'started': {'$sum': {'$cond': [{'$gt': ['$progress', 0]}, 1, 0]}},
+            'halfway': reached(HALFWAY_PROGRESS),
+            'completed': reached(COMPLETED_PROGRESS),
+            'progress_sum': {'$sum': '$progress'},
+            'learners': {'$sum': 1},
+        }},
+    ])}
+    enrolled = {row['_id']: row['enrolled'] for row in _aggregate(PurchasedCourse, match + [
+        {'$group': {'_id': '$course_id', 'enrolled': {'$sum': 1}}},
+    ])}
+
+    operations = []
+    for course_id in (course_ids if course_ids is not None else set(progress) | set(enrolled)):
+        row = progress.get(course_id, {})
+        # learners without a progress row count as enrolled at 0%
+        enrolled_count = max(enrolled.get(course_id, 0), row.get('learners', 0))
+        operations.append(UpdateOne({'_id': course_id}, {'$set': {
+            'course_id': course_id,
+            'enrolled': enrolled_count,
+            'started': row.get('started', 0),
+            'halfway': row.get('halfway', 0),
+            'completed': row.get('completed', 0),
+            'average_progress': round(row.get('progress_sum', 0.0) / enrolled_count, 2) if enrolled_count else 0.0,
+            'updated_at': end,
+        }}, upsert=True))
+    return _write(COURSE_SUMMARY, operations)
+
+
+def build_rollups(full=False):
+    """
+    Bring the rollup collections up to date. Activity is read from the stored watermark
+    (re-reading from the start of its day so per-day totals can be replaced) up to now minus
+    ANALYTICS_LAG_SECONDS, which leaves room for write-behind buffers to land. `full` drops
+    the rollups and rebuilds them from all history, e.g. after content was deleted or stored
+    progress was recomputed. Returns the number of documents written per collection.
+    """
+    state = get_collection(STATE)
+    end = timezone.now().replace(tzinfo=None) - timedelta(seconds=getattr(settings, 'ANALYTICS_LAG_SECONDS', 300))
+    watermark = None if full else (state.find_one({'_id': STATE_ID}) or {}).get('watermark')
+    if watermark is not None and watermark >= end:
+        return {'chapter_days': 0, 'course_days': 0, 'courses': 0}
+    start = datetime.combine(watermark.date(), time.min) if watermark is not None else None
+
+    ensure_indexes()
+    if full:
+        for name in (COURSE_DAILY, CHAPTER_DAILY, COURSE_SUMMARY):
+            get_collection(name).delete_many({})
+
+    chapter_days, learners = _rollup_quiz_attempts(start, end)
+    for key, user_ids in _activity_learners(start, end).items():
+        learners.setdefault(key, set()).update(user_ids)
+    written = {
+        'chapter_days': chapter_days,
+        'course_days': _rollup_learners(learners),
+        'courses': _rollup_course_summaries(start, end),
+    }
+    state.update_one({'_id': STATE_ID}, {'$set': {'watermark': end, 'built_at': timezone.now()}}, upsert=True)
+    logger.info(f"Built analytics rollups from {start or 'the beginning'} to {end}: {written}")
+    return written
+
+
+def rollup_watermark():
+    watermark = (get_collection(STATE).find_one({'_id': STATE_ID}) or {}).get('watermark')
+    return timezone.make_aware(watermark, timezone.utc) if watermark is not None else None
+
+
+def _since_day(days):
+    return (timezone.now() - timedelta(days=days - 1)).strftime(DAY_FORMAT)
+
+
+def daily_active_learners(course_id=None, days=30):
+    """[{"day", "active_learners"}] for one course, or all courses when course_id is None."""
+    return list(get_collection(COURSE_DAILY).aggregate([
+        {'$match': {'course_id': course_id, 'day': {'$gte': _since_day(days)}}},
+        {'$project': {'_id': 0, 'day': 1, 'active_learners': {'$size': '$learners'}}},
+        {'$sort': {'day': 1}},
+    ]))
+
+
+def chapter_quiz_accuracy(course_id, days=30):
+    """Quiz attempts, correct answers and accuracy per chapter of a course over the last `days`."""
+    rows = list(get_collection(CHAPTER_DAILY).aggregate([
+        {'$match': {'course_id': course_id, 'day': {'$gte': _since_day(days)}}},
+        {'$group': {'_id': '$chapter_id', 'attempts': {'$sum': '$attempts'}, 'correct': {'$sum': '$correct'}}},
+        {'$sort': {'_id': 1}},
+    ]))
+    names = dict(Chapter.objects.filter(id__in=[row['_id'] for row in rows]).values_list('id', 'chapter_name'))
+    return [
+        {
+            'chapter_id': row['_id'],
+            'chapter_name': names.get(row['_id']),
+            'attempts': row['attempts'],
+            'correct': row['correct'],
+            'accuracy': round(row['correct'] * 100 / row['attempts'], 2) if row['attempts'] else 0.0,
+        }
+        for row in rows
+    ]
+
+
+def course_summaries(course_ids=None):
+    """Completion funnel and average progress per course, keyed by course id."""
+    query = {} if course_ids is None else {'_id': {'$in': list(course_ids)}}
+    return {
+        row['_id']: {key: row[key] for key in ('enrolled', 'started', 'halfway', 'completed', 'average_progress')}
+        for row in get_collection(COURSE_SUMMARY).find(query)
+    }
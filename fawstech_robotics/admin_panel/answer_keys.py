@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+OPTION_FIELDS = ('option_1', 'option_2', 'option_3', 'option_4')
+
+
+class AnswerKey:
+    """
+    Correct options of one chapter or mock test as numpy arrays sorted by quiz id, with the
+    question and option texts for result snapshots, tagged with the `quiz_version` of the
+    chapter/mock test it was read at.
+    """
+
+    __slots__ = ('quiz_ids', 'correct_options', 'correct_texts', 'questions', 'options', 'quiz_id_set', 'version')
+
+    def __init__(self, rows, version=0):
+        rows = sorted(rows)  # (quiz id, correct option, question, (option 1 .. option 4))
+        self.version = version
+        self.quiz_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        self.correct_options = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        self.questions = tuple(row[2] for row in rows)
+        self.options = tuple(tuple(row[3]) for row in rows)
+        self.correct_texts = tuple(
+            options[correct - 1] if 1 <= correct <= 4 else None for _, correct, _, options in rows
+        )
+        self.quiz_id_set = frozenset(self.quiz_ids.tolist())
+
+    def __len__(self):
+        return len(self.quiz_ids)
+
+    def positions(self, quiz_ids):
+        """Index of every quiz id in the key; all ids must belong to it."""
+        return np.searchsorted(self.quiz_ids, np.asarray(quiz_ids, dtype=np.int64))
+
+    def grade(self, quiz_ids, selected_options):
+        """Boolean array, True where the selected option is the correct one."""
+        return self.correct_options[self.positions(quiz_ids)] == np.asarray(selected_options, dtype=np.int64)
+
+    def correct_option(self, quiz_id):
+        position = int(self.positions([quiz_id])[0])
+        return int(self.correct_options[position]), self.correct_texts[position]
+
+    def question(self, quiz_id):
+        """(question text, option texts) of a quiz in the key."""
+        position = int(self.positions([quiz_id])[0])
+        return self.questions[position], self.options[position]
+
+
+class AnswerKeyCache:
+    """
+    Answer keys per chapter and per mock test, plus quiz id -> (chapter id, course id), loaded
+    on a miss. Question writes bump the stored `quiz_version` of their chapter/mock test
+    (invalidate_chapters / invalidate_mock_tests), and a cached key is only used while it
+    carries the current version, so an edit made through any worker is graded correctly at
+    once; the version is a single-field read of one row. Entries also expire after
+    ANSWER_KEY_TTL seconds.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}  # (kind, id) -> (loaded at, value)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key, load, version=None, reload=False):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry and not reload and now - entry[0] < self.ttl
+                    and (version is None or entry[1].version == version)):
+                return entry[1]
+            generation = self._generation
+        value = load()
+        with self._lock:
+            # drop the result if questions changed while it was being read
+            if value is not None and generation == self._generation:
+                self._entries[key] = (now, value)
+        return value
+
+    def chapter(self, chapter_id, version=None, reload=False):
+        """
+        Answer key of a chapter, or None if it does not exist. `version` is the chapter's
+        current quiz_version, read here when not given.
+        """
+        from .models import Chapter, Quiz
+        if version is None:
+            version = self._version(Chapter, chapter_id)
+            if version is None:
+                return None
+        queryset = Quiz.objects.filter(chapter_id=chapter_id)
+        return self._get(('chapter', chapter_id), lambda: self._load(Chapter, chapter_id, queryset), version, reload)
+
+    def mock_test(self, mock_test_id, version=None, reload=False):
+        from .models import MockTest, MockTestQuiz
+        if version is None:
+            version = self._version(MockTest, mock_test_id)
+            if version is None:
+                return None
+        queryset = MockTestQuiz.objects.filter(mock_test_id=mock_test_id)
+        return self._get(
+            ('mock_test', mock_test_id), lambda: self._load(MockTest, mock_test_id, queryset), version, reload
+        )
+
+    def quiz(self, quiz_id):
+        """
+        (answer key of the quiz's chapter, course id), or None if the quiz does not exist. A
+        quiz missing from the cached key (moved or added through another worker) is looked up
+        again before giving up.
+        """
+        for reload in (False, True):
+            location = self.locate_quiz(quiz_id, reload=reload)
+            answer_key = self.chapter(location[0], reload=reload) if location else None
+            if answer_key is not None and quiz_id in answer_key.quiz_id_set:
+                return answer_key, location[1]
+        return None
+
+    def locate_quiz(self, quiz_id, reload=False):
+        """(chapter id, course id) of a quiz, or None if it does not exist."""
+        from .models import Quiz
+        return self._get(('quiz', quiz_id), lambda: Quiz.objects.filter(id=quiz_id).values_list(
+            'chapter_id', 'chapter__module__course_id').first(), reload=reload)
+
+    @staticmethod
+    def _version(model, pk):
+        return model.objects.filter(id=pk).values_list('quiz_version', flat=True).first()
+
+    def _load(self, model, pk, queryset):
+        # the version is read first: a write landing in between leaves an older version on
+        # the key, which only causes one more reload
+        version = self._version(model, pk)
+        if version is None:
+            return None
+        rows = queryset.values_list('id', 'correct_option', 'question', *OPTION_FIELDS)
+        return AnswerKey([(row[0], row[1], row[2], row[3:]) for row in rows], version)
+
+    def invalidate_chapters(self, chapter_ids):
+        """Called after the quizzes of `chapter_ids` changed: every worker reloads their keys."""
+        from .models import Chapter
+        self._bump(Chapter, chapter_ids)
+        self._invalidate('chapter', chapter_ids)
+
+    def invalidate_mock_tests(self, mock_test_ids):
+        from .models import MockTest
+        self._bump(MockTest, mock_test_ids)
+        self._invalidate('mock_test', mock_test_ids)
+
+    def invalidate_quizzes(self, quiz_ids):
+        self._invalidate('quiz', quiz_ids)
+
+    @staticmethod
+    def _bump(model, ids):
+        ids = list(ids)
+        if ids:
+            model.objects.mongo_update_many({'id': {'$in': ids}}, {'$inc': {'quiz_version': 1}})
+
+    def _invalidate(self, kind, ids):
+        with self._lock:
+            self._generation += 1
+            for pk in ids:
+                self._entries.pop((kind, pk), None)
+
+
+answer_keys = AnswerKeyCache(ttl=getattr(settings, 'ANSWER_KEY_TTL', 300))
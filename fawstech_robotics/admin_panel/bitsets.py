@@ -0,0 +1,61 @@
+# Sets of small non-negative integers (chapter/quiz ordinals) stored as {word index: word}.
+# Word keys are strings so the dict can be stored as a Mongo sub-document, and each word
+# holds WORD_BITS bits so it stays a plain int64 that $bit / $bitsAllClear can address.
+WORD_BITS = 32
+
+
+def bit_location(ordinal):
+    """(word key, mask) of one ordinal, e.g. for {'$bit': {f'chapter_bits.{key}': {'or': mask}}}."""
+    return str(ordinal // WORD_BITS), 1 << (ordinal % WORD_BITS)
+
+
+def from_ordinals(ordinals):
+    bits = {}
+    for ordinal in ordinals:
+        key, mask = bit_location(ordinal)
+        bits[key] = bits.get(key, 0) | mask
+    return bits
+
+
+def to_ordinals(bits):
+    ordinals = []
+    for key, word in (bits or {}).items():
+        base = int(key) * WORD_BITS
+        while word:
+            low = word & -word
+            ordinals.append(base + low.bit_length() - 1)
+            word ^= low
+    return sorted(ordinals)
+
+
+def contains(bits, ordinal):
+    key, mask = bit_location(ordinal)
+    return bool((bits or {}).get(key, 0) & mask)
+
+
+def add(bits, ordinal):
+    key, mask = bit_location(ordinal)
+    bits[key] = bits.get(key, 0) | mask
+
+
+def discard(bits, ordinal):
+    key, mask = bit_location(ordinal)
+    word = bits.get(key, 0) & ~mask
+    if word:
+        bits[key] = word
+    else:
+        bits.pop(key, None)
+
+
+def intersect(bits, mask):
+    """Bits also set in `mask`; used to drop ordinals of deleted content."""
+    result = {}
+    for key, word in (bits or {}).items():
+        word &= mask.get(key, 0)
+        if word:
+            result[key] = word
+    return result
+
+
+def popcount(bits):
+    return sum(bin(word).count('1') for word in (bits or {}).values())
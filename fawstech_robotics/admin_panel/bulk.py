@@ -0,0 +1,201 @@
+import logging
+from pymongo import UpdateMany, UpdateOne
+from .answer_keys import answer_keys
+from .catalog import bump_catalog_version
+from .counters import adjust_counters, allocate_ordinals
+from .models import Course, Module, Chapter, Quiz, MockTestQuiz
+from .search import content_index
+from .signals import notify_content_changed
+
+logger = logging.getLogger(__name__)
+
+
+def _read_back_ids(objs, queryset, key=None):
+    """
+    djongo's bulk_create does not return primary keys. With `key` the rows matching
+    `queryset` are paired with `objs` on that field, which must be unique among them (the
+    chapter/quiz ordinals just allocated). Without it `queryset` must select exactly the
+    freshly inserted rows, read back ordered by id, which only holds for the single
+    insert_many into a parent nobody else can write to yet.
+    """
+    if key is None:
+        ids = list(queryset.order_by('id').values_list('id', flat=True))
+        if len(ids) != len(objs):
+            raise RuntimeError(f"Expected {len(objs)} new {queryset.model.__name__} rows, found {len(ids)}")
+    else:
+        by_key = dict(queryset.filter(**{f'{key}__in': [getattr(obj, key) for obj in objs]}).values_list(key, 'id'))
+        missing = [obj for obj in objs if getattr(obj, key) not in by_key]
+        if missing:
+            raise RuntimeError(f"{len(missing)} new {queryset.model.__name__} rows not found by {key}")
+        ids = [by_key[getattr(obj, key)] for obj in objs]
+    for obj, pk in zip(objs, ids):
+        obj.id = pk
+        obj._state.adding = False
+    return ids
+
+
+def insert_course_tree(course_data, modules_data):
+    """
+    Create a course with its modules, chapters and quizzes from validated data
+    (CourseTreeSerializer). Counters and chapter/quiz ordinals are computed up front, each
+    level is written with a single bulk_create and the catalog version is bumped once.
+    MongoDB (via djongo) has no transactions here, so a failure part-way deletes the course
+    again, which cascades to whatever rows were already inserted.
+    """
+    course = Course(**course_data)
+    course.total_modules = len(modules_data)
+    course.total_chapters = sum(len(module['chapters']) for module in modules_data)
+    course.total_quizzes = sum(
+        len(chapter['quizzes']) for module in modules_data for chapter in module['chapters']
+    )
+    course.next_chapter_ordinal = course.total_chapters
+    course.next_quiz_ordinal = course.total_quizzes
+    course.save()
+
+    try:
+        modules = [
+            Module(course=course, module_name=module['module_name'], total_chapters=len(module['chapters']))
+            for module in modules_data
+        ]
+        Module.objects.bulk_create(modules)
+        module_ids = _read_back_ids(modules, Module.objects.filter(course_id=course.id))
+
+        chapters, chapter_rows = [], []
+        for module, module_data in zip(modules, modules_data):
+            for chapter_data in module_data['chapters']:
+                chapters.append(Chapter(
+                    module=module,
+                    chapter_name=chapter_data['chapter_name'],
+                    chapter_description=chapter_data.get('chapter_description'),
+                    video=chapter_data['video'],
+                    ordinal=len(chapters),
+                ))
+                chapter_rows.append(chapter_data)
+        Chapter.objects.bulk_create(chapters)
+        chapter_ids = _read_back_ids(chapters, Chapter.objects.filter(module_id__in=module_ids), 'ordinal')
+
+        quizzes = [
+            Quiz(chapter=chapter, **quiz_data)
+            for chapter, chapter_data in zip(chapters, chapter_rows)
+            for quiz_data in chapter_data['quizzes']
+        ]
+        for ordinal, quiz in enumerate(quizzes):
+            quiz.ordinal = ordinal
+        Quiz.objects.bulk_create(quizzes)
+        _read_back_ids(quizzes, Quiz.objects.filter(chapter_id__in=chapter_ids), 'ordinal')
+    except Exception:
+        logger.exception(f"Bulk course insert failed, removing partial course {course.id}")
+        course.delete()
+        raise
+
+    for module in modules:
+        content_index.index_module(module)
+    for chapter in chapters:
+        content_index.index_chapter(chapter)
+    for quiz in quizzes:
+        content_index.index_quiz(quiz, course.id)
+    bump_catalog_version()
+    notify_content_changed([course.id])
+    logger.info(
+        f"Inserted course {course.id} with {len(modules)} modules, {len(chapters)} chapters, {len(quizzes)} quizzes"
+    )
+    return course
+
+
+CLONE_EXCLUDED_FIELDS = (
+    'id', 'author', 'total_modules', 'total_chapters', 'total_quizzes',
+    'next_chapter_ordinal', 'next_quiz_ordinal', 'recommended', 'position',
+)
+QUIZ_COPY_FIELDS = ('question', 'option_1', 'option_2', 'option_3', 'option_4', 'correct_option')
+
+
+def clone_course(course_id, name=None):
+    """
+    Copy a course tree through insert_course_tree(). Thumbnail and chapter videos keep pointing
+    at the same stored files (removal is reference-aware, see media.py), so the cost is one
+    prefetching read plus one bulk insert per level, independent of media size. The clone
+    starts out unrecommended.
+    """
+    source = (
+        Course.objects.select_related('author')
+        .prefetch_related('modules__chapters__quizzes')
+        .get(id=course_id)
+    )
+    course_data = {
+        field.attname: getattr(source, field.attname)
+        for field in Course._meta.concrete_fields
+        if field.name not in CLONE_EXCLUDED_FIELDS
+    }
+    course_data['author'] = source.author
+    course_data['thumbnail'] = source.thumbnail.name
+    course_data['name'] = name or f"{source.name} (Copy)"
+    modules_data = [
+        {
+            'module_name': module.module_name,
+            'chapters': [
+                {
+                    'chapter_name': chapter.chapter_name,
+                    'chapter_description': chapter.chapter_description,
+                    'video': chapter.video.name,
+                    'quizzes': [
+                        {field: getattr(quiz, field) for field in QUIZ_COPY_FIELDS}
+                        for quiz in sorted(chapter.quizzes.all(), key=lambda quiz: quiz.id)
+                    ],
+                }
+                for chapter in sorted(module.chapters.all(), key=lambda chapter: chapter.id)
+            ],
+        }
+        for module in sorted(source.modules.all(), key=lambda module: module.id)
+    ]
+    return insert_course_tree(course_data, modules_data)
+
+
+def insert_chapter_quizzes(chapter, rows):
+    """
+    Bulk-insert validated quiz rows into a chapter with a single course counter update. The
+    rows are read back by their freshly allocated ordinals, so concurrent inserts into the
+    chapter cannot be mistaken for them; counters are only bumped once that succeeded.
+    """
+    course_id = chapter.module.course_id
+    ordinals = allocate_ordinals(Course, course_id, 'next_quiz_ordinal', len(rows))
+    quizzes = [Quiz(chapter=chapter, ordinal=ordinal, **row) for ordinal, row in zip(ordinals, rows)]
+    Quiz.objects.bulk_create(quizzes)
+    answer_keys.invalidate_chapters([chapter.id])
+    try:
+        _read_back_ids(quizzes, Quiz.objects.filter(chapter_id=chapter.id), 'ordinal')
+    except Exception:
+        logger.exception(f"Quiz import into chapter {chapter.id} failed, removing the inserted rows")
+        Quiz.objects.filter(chapter_id=chapter.id, ordinal__in=list(ordinals)).delete()
+        raise
+    adjust_counters(Course, course_id, total_quizzes=len(quizzes))
+    for quiz in quizzes:
+        content_index.index_quiz(quiz, course_id)
+    notify_content_changed([course_id])
+    logger.info(f"Imported {len(quizzes)} quizzes into chapter {chapter.id}")
+    return quizzes
+
+
+def insert_mock_test_quizzes(mock_test, rows):
+    quizzes = [MockTestQuiz(mock_test=mock_test, **row) for row in rows]
+    MockTestQuiz.objects.bulk_create(quizzes)
+    answer_keys.invalidate_mock_tests([mock_test.id])
+    logger.info(f"Imported {len(quizzes)} quizzes into mock test {mock_test.id}")
+    return quizzes
+
+
+def apply_recommended_order(course_ids):
+    """
+    Make `course_ids` the recommended courses, positioned 1..n in list order, and clear the
+    flag on every other course, all in one bulk_write.
+    """
+    operations = [
+        UpdateOne({'id': course_id}, {'$set': {'recommended': True, 'position': position}})
+        for position, course_id in enumerate(course_ids, start=1)
+    ]
+    operations.append(UpdateMany(
+        {'id': {'$nin': list(course_ids)}, 'recommended': True},
+        {'$set': {'recommended': False, 'position': None}},
+    ))
+    Course.objects.mongo_bulk_write(operations, ordered=False)
+    bump_catalog_version()
+    logger.info(f"Recommended course order set to {list(course_ids)}")
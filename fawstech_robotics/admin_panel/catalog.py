@@ -0,0 +1,22 @@
+import threading
+import time
+from django.conf import settings
+
+# Process-wide version of the course catalog. Caches derived from the catalog (autocomplete,
+# student facet index) remember the version they were built from and rebuild when it moves.
+# Writes in this process move it at once; it also moves every CATALOG_CACHE_TTL seconds so
+# that writes made through other workers show up within that time.
+_version = 0
+_lock = threading.Lock()
+_ttl = getattr(settings, 'CATALOG_CACHE_TTL', 60)
+
+
+def catalog_version():
+    return _version, int(time.monotonic() // _ttl)
+
+
+def bump_catalog_version():
+    global _version
+    with _lock:
+        _version += 1
+        return _version
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from . import bitsets
+from .signals import course_content_changed
+
+logger = logging.getLogger(__name__)
+
+
+class CourseContent:
+    """Chapter and quiz ids of a course with their ordinals (bit positions in progress bitsets)."""
+
+    __slots__ = ('chapter_ordinals', 'quiz_ordinals', 'chapter_ids', 'quiz_ids', 'chapter_mask', 'quiz_mask',
+                 '_chapters_by_ordinal', '_quizzes_by_ordinal')
+
+    def __init__(self, chapter_ordinals, quiz_ordinals):
+        self.chapter_ordinals = dict(chapter_ordinals)  # id -> ordinal
+        self.quiz_ordinals = dict(quiz_ordinals)
+        self.chapter_ids = frozenset(self.chapter_ordinals)
+        self.quiz_ids = frozenset(self.quiz_ordinals)
+        self.chapter_mask = bitsets.from_ordinals(self.chapter_ordinals.values())
+        self.quiz_mask = bitsets.from_ordinals(self.quiz_ordinals.values())
+        self._chapters_by_ordinal = {ordinal: pk for pk, ordinal in self.chapter_ordinals.items()}
+        self._quizzes_by_ordinal = {ordinal: pk for pk, ordinal in self.quiz_ordinals.items()}
+
+    @property
+    def total_chapters(self):
+        return len(self.chapter_ids)
+
+    @property
+    def total_quizzes(self):
+        return len(self.quiz_ids)
+
+    def chapter_ids_in(self, bits):
+        """Sorted ids of the chapters whose bits are set; bits of deleted chapters are ignored."""
+        by_ordinal = self._chapters_by_ordinal
+        return sorted(by_ordinal[ordinal] for ordinal in bitsets.to_ordinals(bits) if ordinal in by_ordinal)
+
+    def quiz_ids_in(self, bits):
+        by_ordinal = self._quizzes_by_ordinal
+        return sorted(by_ordinal[ordinal] for ordinal in bitsets.to_ordinals(bits) if ordinal in by_ordinal)
+
+
+class CourseContentMap:
+    """
+    Per-course chapter and quiz ids with their ordinals, loaded on demand (two queries for
+    any number of missing courses), evicted through the course_content_changed signal in this
+    process and expired after CONTENT_MAP_TTL seconds so other workers catch up as well.
+    Lets student-side code check that a chapter/quiz belongs to a course, and map it to its
+    progress bit, without a query per id.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}  # course id -> (loaded at, CourseContent)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, course_ids):
+        course_ids = set(course_ids)
+        now = time.monotonic()
+        with self._lock:
+            found = {}
+            for course_id in course_ids:
+                entry = self._entries.get(course_id)
+                if entry and now - entry[0] < self.ttl:
+                    found[course_id] = entry[1]
+            generation = self._generation
+        missing = course_ids - set(found)
+        if missing:
+            loaded = self._load(missing)
+            with self._lock:
+                # drop the result if content changed while it was being read
+                if generation == self._generation:
+                    self._entries.update((course_id, (now, content)) for course_id, content in loaded.items())
+            found.update(loaded)
+        return found
+
+    def get(self, course_id):
+        return self.get_many([course_id])[course_id]
+
+    def reload(self, course_ids):
+        """Fresh entries for `course_ids`, e.g. when an id is missing from a possibly stale one."""
+        self.invalidate(course_ids)
+        return self.get_many(course_ids)
+
+    def invalidate(self, course_ids=None):
+        with self._lock:
+            self._generation += 1
+            if course_ids is None:
+                self._entries.clear()
+            else:
+                for course_id in course_ids:
+                    self._entries.pop(course_id, None)
+
+    def _load(self, course_ids):
+        from .models import Chapter, Quiz
+
+        chapters = {course_id: {} for course_id in course_ids}
+        quizzes = {course_id: {} for course_id in course_ids}
+        for chapter_id, course_id, ordinal in Chapter.objects.filter(
+                module__course_id__in=list(course_ids)).values_list('id', 'module__course_id', 'ordinal'):
+            chapters[course_id][chapter_id] = ordinal
+        for quiz_id, course_id, ordinal in Quiz.objects.filter(
+                chapter__module__course_id__in=list(course_ids)).values_list('id', 'chapter__module__course_id', 'ordinal'):
+            quizzes[course_id][quiz_id] = ordinal
+        logger.debug(f"Loaded content map for courses {sorted(course_ids)}")
+        return {course_id: CourseContent(chapters[course_id], quizzes[course_id]) for course_id in course_ids}
+
+
+content_map = CourseContentMap(ttl=getattr(settings, 'CONTENT_MAP_TTL', 60))
+
+
+def _evict(sender, course_ids, **kwargs):
+    content_map.invalidate(course_ids)
+
+
+course_content_changed.connect(_evict, dispatch_uid='content_map_evict')
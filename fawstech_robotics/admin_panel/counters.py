@@ -0,0 +1,108 @@
+from pymongo import ReturnDocument, UpdateOne
+
+
+def adjust_counters(model, pk, **deltas):
+    """
+    Atomically add `deltas` to denormalized counter fields of one row, e.g.
+    adjust_counters(Course, course_id, total_chapters=1). Uses Mongo's $inc directly so
+    concurrent writers never read-modify-write the counter.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or pk is None:
+        return
+    model.objects.mongo_update_one({'id': pk}, {'$inc': deltas})
+
+
+def allocate_ordinals(model, pk, field, count=1):
+    """
+    Reserve `count` consecutive values of a never-decreasing counter field of one row and
+    return them as a range. A single $inc with find_one_and_update, so concurrent callers
+    always get disjoint ranges and values of deleted rows are never handed out again.
+    """
+    document = model.objects.mongo_find_one_and_update(
+        {'id': pk}, {'$inc': {field: count}}, projection={field: True}, return_document=ReturnDocument.AFTER,
+    )
+    if document is None:
+        raise model.DoesNotExist(f"{model.__name__} {pk} not found")
+    return range(document[field] - count, document[field])
+
+
+def exclude_counters_from_save(instance, save_kwargs, counter_fields):
+    """
+    Called from save(): when updating an existing row without explicit update_fields, write
+    every field except the counters so that a stale in-memory copy (or a client sending
+    total_* values) cannot overwrite counts maintained by adjust_counters().
+    """
+    if instance._state.adding or save_kwargs.get('update_fields') is not None:
+        return
+    save_kwargs['update_fields'] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in counter_fields
+    ]
+
+
+def _group_count(model, key):
+    """{key value: number of rows} computed server-side with one $group aggregation."""
+    pipeline = [{'$group': {'_id': f'${key}', 'count': {'$sum': 1}}}]
+    return {row['_id']: row['count'] for row in model.objects.mongo_aggregate(pipeline)}
+
+
+def compute_counter_drift():
+    """
+    Compare stored counters with true counts. Uses three $group aggregations plus three
+    id/parent projections and rolls chapters and quizzes up to their courses in memory.
+    Returns {'course': {id: {field: (stored, actual)}},
+    'module': {...}} containing only rows whose counters are off.
+    """
+    from .models import Course, Module, Chapter, Quiz
+
+    modules_per_course = _group_count(Module, 'course_id')
+    chapters_per_module = _group_count(Chapter, 'module_id')
+    quizzes_per_chapter = _group_count(Quiz, 'chapter_id')
+    chapter_module = dict(Chapter.objects.values_list('id', 'module_id'))
+    module_course = {}
+    stored_modules = {}
+    for module_id, course_id, total_chapters in Module.objects.values_list('id', 'course_id', 'total_chapters'):
+        module_course[module_id] = course_id
+        stored_modules[module_id] = total_chapters
+
+    course_chapters = {}
+    for module_id, count in chapters_per_module.items():
+        course_id = module_course.get(module_id)
+        course_chapters[course_id] = course_chapters.get(course_id, 0) + count
+    course_quizzes = {}
+    for chapter_id, count in quizzes_per_chapter.items():
+        course_id = module_course.get(chapter_module.get(chapter_id))
+        course_quizzes[course_id] = course_quizzes.get(course_id, 0) + count
+
+    drift = {'course': {}, 'module': {}}
+    for module_id, stored in stored_modules.items():
+        actual = chapters_per_module.get(module_id, 0)
+        if stored != actual:
+            drift['module'][module_id] = {'total_chapters': (stored, actual)}
+    for course_id, total_modules, total_chapters, total_quizzes in Course.objects.values_list(
+            'id', 'total_modules', 'total_chapters', 'total_quizzes'):
+        fields = {}
+        for field, stored, actual in (
+            ('total_modules', total_modules, modules_per_course.get(course_id, 0)),
+            ('total_chapters', total_chapters, course_chapters.get(course_id, 0)),
+            ('total_quizzes', total_quizzes, course_quizzes.get(course_id, 0)),
+        ):
+            if stored != actual:
+                fields[field] = (stored, actual)
+        if fields:
+            drift['course'][course_id] = fields
+    return drift
+
+
+def fix_counter_drift(drift):
+    """Write the actual counts from compute_counter_drift() with one bulk_write per collection."""
+    from .models import Course, Module
+
+    for model, rows in ((Course, drift['course']), (Module, drift['module'])):
+        operations = [
+            UpdateOne({'id': pk}, {'$set': {field: actual for field, (stored, actual) in fields.items()}})
+            for pk, fields in rows.items()
+        ]
+        if operations:
+            model.objects.mongo_bulk_write(operations, ordered=False)
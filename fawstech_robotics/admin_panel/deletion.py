@@ -0,0 +1,115 @@
+import logging
+from collections import Counter
+from .answer_keys import answer_keys
+from .catalog import bump_catalog_version
+from .counters import adjust_counters
+from .media import remove_files_if_unreferenced
+from .models import Course, Module, Chapter, Quiz, MockTest, MockTestQuiz
+from .search import course_index, content_index
+from .signals import notify_content_changed
+from .tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def delete_content(course_ids=(), module_ids=(), chapter_ids=()):
+    """
+    Delete courses, modules and chapters together with everything below them. The subtree is
+    collected with a handful of values_list queries, rows are removed bottom-up with one
+    queryset delete per level, counters of surviving parents are adjusted once per row and
+    media files are handed to the background worker, which only removes files nothing else
+    references. Returns the number of deleted rows per level.
+    """
+    course_ids = set(course_ids)
+    modules = {}  # module id -> course id
+    if course_ids:
+        modules.update(Module.objects.filter(course_id__in=list(course_ids)).values_list('id', 'course_id'))
+    if module_ids:
+        modules.update(Module.objects.filter(id__in=list(module_ids)).values_list('id', 'course_id'))
+
+    chapters = {}  # chapter id -> (module id, video)
+    if modules:
+        chapters.update(
+            (chapter_id, (module_id, video))
+            for chapter_id, module_id, video in
+            Chapter.objects.filter(module_id__in=list(modules)).values_list('id', 'module_id', 'video')
+        )
+    if chapter_ids:
+        chapters.update(
+            (chapter_id, (module_id, video))
+            for chapter_id, module_id, video in
+            Chapter.objects.filter(id__in=list(chapter_ids)).values_list('id', 'module_id', 'video')
+        )
+
+    # parents of directly deleted chapters that live on
+    surviving_modules = {module_id for module_id, _ in chapters.values()} - set(modules)
+    module_course = dict(modules)
+    if surviving_modules:
+        module_course.update(Module.objects.filter(id__in=list(surviving_modules)).values_list('id', 'course_id'))
+
+    quizzes = dict(
+        Quiz.objects.filter(chapter_id__in=list(chapters)).values_list('id', 'chapter_id')
+    ) if chapters else {}  # quiz id -> chapter id
+    quizzes_per_chapter = Counter(quizzes.values())
+
+    module_deltas, course_deltas = Counter(), {}
+    for module_id, course_id in modules.items():
+        if course_id not in course_ids:
+            course_deltas.setdefault(course_id, Counter())['total_modules'] -= 1
+    for chapter_id, (module_id, _) in chapters.items():
+        course_id = module_course.get(module_id)
+        if course_id in course_ids:
+            continue
+        if module_id in surviving_modules:
+            module_deltas[module_id] -= 1
+        deltas = course_deltas.setdefault(course_id, Counter())
+        deltas['total_chapters'] -= 1
+        deltas['total_quizzes'] -= quizzes_per_chapter[chapter_id]
+
+    deleted = {'courses': len(course_ids), 'modules': len(modules), 'chapters': len(chapters),
+               'quizzes': sum(quizzes_per_chapter.values())}
+    if chapters:
+        Quiz.objects.filter(chapter_id__in=list(chapters)).delete()
+        Chapter.objects.filter(id__in=list(chapters)).delete()
+        answer_keys.invalidate_chapters(chapters)
+        answer_keys.invalidate_quizzes(quizzes)
+    if modules:
+        Module.objects.filter(id__in=list(modules)).delete()
+    thumbnails = []
+    if course_ids:
+        thumbnails = list(Course.objects.filter(id__in=list(course_ids)).values_list('thumbnail', flat=True))
+        Course.objects.filter(id__in=list(course_ids)).delete()
+
+    for module_id, delta in module_deltas.items():
+        adjust_counters(Module, module_id, total_chapters=delta)
+    for course_id, deltas in course_deltas.items():
+        adjust_counters(Course, course_id, **deltas)
+
+    for chapter_id in chapters:
+        content_index.remove_chapter(chapter_id)
+    for module_id in modules:
+        content_index.remove_module(module_id)
+    for course_id in course_ids:
+        course_index.remove_course(course_id)
+        content_index.remove_course(course_id)
+    bump_catalog_version()
+    notify_content_changed(set(course_deltas) | course_ids)
+
+    files = [video for _, video in chapters.values()] + thumbnails
+    if any(files):
+        enqueue(remove_files_if_unreferenced, files)
+    logger.info(f"Deleted content: {deleted}")
+    return deleted
+
+
+def delete_mock_tests(mock_test_ids):
+    """Delete mock tests with their questions in bulk; images are removed in the background."""
+    mock_test_ids = list(mock_test_ids)
+    images = list(MockTest.objects.filter(id__in=mock_test_ids).values_list('image', flat=True))
+    MockTestQuiz.objects.filter(mock_test_id__in=mock_test_ids).delete()
+    MockTest.objects.filter(id__in=mock_test_ids).delete()
+    answer_keys.invalidate_mock_tests(mock_test_ids)
+    if any(images):
+        enqueue(remove_files_if_unreferenced, images)
+    logger.info(f"Deleted {len(images)} mock tests")
+    return len(images)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from admin_panel.analytics import build_rollups
+
+
+class Command(BaseCommand):
+    help = "Update the analytics rollups (funnels, quiz accuracy, daily active learners) from the last watermark."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Drop the rollups and rebuild them from all history.")
+
+    def handle(self, *args, **options):
+        written = build_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {written['courses']} course summaries, {written['course_days']} course days "
+            f"and {written['chapter_days']} chapter days."
+        ))
@@ -0,0 +1,30 @@
+import logging
+from django.core.management.base import BaseCommand
+from admin_panel.counters import compute_counter_drift, fix_counter_drift
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recompute course and module counters (modules, chapters, quizzes) and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing fixes.")
+
+    def handle(self, *args, **options):
+        drift = compute_counter_drift()
+        drifted = len(drift['course']) + len(drift['module'])
+        for kind in ('course', 'module'):
+            for pk, fields in sorted(drift[kind].items()):
+                changes = ", ".join(f"{field} {stored} -> {actual}" for field, (stored, actual) in fields.items())
+                self.stdout.write(f"{kind} {pk}: {changes}")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Counters are consistent."))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{drifted} rows drifted (dry run, nothing written)."))
+            return
+        fix_counter_drift(drift)
+        logger.info(f"Reconciled counters on {len(drift['course'])} courses and {len(drift['module'])} modules")
+        self.stdout.write(self.style.SUCCESS(f"Fixed {drifted} rows."))
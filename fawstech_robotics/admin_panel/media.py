@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import os
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+
+def file_checksum(uploaded_file):
+    """sha256 hex digest of an uploaded file, read in chunks; the file is rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def _file_references():
+    from .models import Author, Course, Chapter, MediaUpload
+    return ((Chapter, 'video'), (Course, 'thumbnail'), (Author, 'profile_picture'), (MediaUpload, 'file'))
+
+
+def is_file_referenced(name, owner=None):
+    """True if any row other than `owner` still points at the stored file `name`."""
+    for model, field in _file_references():
+        queryset = model.objects.filter(**{field: name})
+        if owner is not None and isinstance(owner, model):
+            queryset = queryset.exclude(pk=owner.pk)
+        if queryset.exists():
+            return True
+    return False
+
+
+def remove_file_if_unreferenced(field_file, owner=None):
+    """
+    Delete the file behind `field_file` unless another row shares it. `owner` is the instance
+    that is about to stop referencing the file (being deleted or replaced).
+    """
+    if not field_file:
+        return False
+    if is_file_referenced(field_file.name, owner=owner):
+        logger.debug(f"Keeping shared file {field_file.name}")
+        return False
+    if os.path.isfile(field_file.path):
+        os.remove(field_file.path)
+        return True
+    return False
+
+
+def remove_files_if_unreferenced(names):
+    """
+    Batch form of remove_file_if_unreferenced() for rows that are already gone: one query per
+    referencing field, then delete whatever no row points at any more. Meant to run in the
+    background (tasks.enqueue).
+    """
+    names = {name for name in names if name}
+    for model, field in _file_references():
+        if not names:
+            break
+        names -= set(model.objects.filter(**{f'{field}__in': list(names)}).values_list(field, flat=True))
+    removed = 0
+    for name in names:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} unreferenced media files")
+    return removed
+
+
+def store_video_durations(chapter_ids):
+    """
+    Probe the videos of `chapter_ids` with ffmpeg and store their length in
+    Chapter.duration_minutes, so requests only ever read stored durations. Meant to run in the
+    background (tasks.enqueue); a video replaced meanwhile is left for its own probe.
+    """
+    from .catalog import bump_catalog_version
+    from .models import Chapter
+    from .utils import get_video_duration
+
+    rows = Chapter.objects.filter(id__in=list(chapter_ids)).values_list('id', 'video')
+    for chapter_id, video in rows:
+        path = default_storage.path(video) if video else None
+        minutes = get_video_duration(path) if path and os.path.exists(path) else 0
+        Chapter.objects.filter(id=chapter_id, video=video).update(duration_minutes=minutes)
+    bump_catalog_version()
+    logger.info(f"Stored video durations of {len(rows)} chapters")
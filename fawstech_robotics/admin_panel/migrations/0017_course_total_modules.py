@@ -0,0 +1,39 @@
+# Generated by Django 3.1.12 on 2026-10-19 16:18
+
+from collections import Counter
+from django.db import migrations, models
+from pymongo import UpdateOne
+
+BATCH_SIZE = 1000
+
+
+def _bulk_set(schema_editor, model, updates):
+    collection = schema_editor.connection.cursor().db_conn[model._meta.db_table]
+    operations = [UpdateOne({'id': pk}, {'$set': values}) for pk, values in updates]
+    for offset in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + BATCH_SIZE], ordered=False)
+
+
+def populate_total_modules(apps, schema_editor):
+    Course = apps.get_model('admin_panel', 'Course')
+    Module = apps.get_model('admin_panel', 'Module')
+    modules_per_course = Counter(Module.objects.values_list('course_id', flat=True))
+    _bulk_set(schema_editor, Course, [
+        (course_id, {'total_modules': count}) for course_id, count in modules_per_course.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0016_mediaupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='total_modules',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_total_modules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.1.12 on 2026-10-19 16:26
+
+from collections import Counter
+from django.db import migrations, models
+from pymongo import UpdateOne
+
+BATCH_SIZE = 1000
+
+
+def _bulk_set(schema_editor, model, updates):
+    collection = schema_editor.connection.cursor().db_conn[model._meta.db_table]
+    operations = [UpdateOne({'id': pk}, {'$set': values}) for pk, values in updates]
+    for offset in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + BATCH_SIZE], ordered=False)
+
+
+def assign_ordinals(apps, schema_editor):
+    # Existing chapters/quizzes are numbered per course in id order
+    Course = apps.get_model('admin_panel', 'Course')
+    Chapter = apps.get_model('admin_panel', 'Chapter')
+    Quiz = apps.get_model('admin_panel', 'Quiz')
+    next_chapter, next_quiz = Counter(), Counter()
+    chapter_updates, quiz_updates = [], []
+    for chapter_id, course_id in Chapter.objects.order_by('id').values_list('id', 'module__course_id'):
+        chapter_updates.append((chapter_id, {'ordinal': next_chapter[course_id]}))
+        next_chapter[course_id] += 1
+    for quiz_id, course_id in Quiz.objects.order_by('id').values_list('id', 'chapter__module__course_id'):
+        quiz_updates.append((quiz_id, {'ordinal': next_quiz[course_id]}))
+        next_quiz[course_id] += 1
+    _bulk_set(schema_editor, Chapter, chapter_updates)
+    _bulk_set(schema_editor, Quiz, quiz_updates)
+    _bulk_set(schema_editor, Course, [
+        (course_id, {'next_chapter_ordinal': next_chapter[course_id], 'next_quiz_ordinal': next_quiz[course_id]})
+        for course_id in set(next_chapter) | set(next_quiz)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0017_course_total_modules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='ordinal',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='next_chapter_ordinal',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='next_quiz_ordinal',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='ordinal',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(assign_ordinals, migrations.RunPython.noop),
+    ]
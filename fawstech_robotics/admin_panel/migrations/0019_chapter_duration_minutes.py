@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0018_content_ordinals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='duration_minutes',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.12 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0019_chapter_duration_minutes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='quiz_version',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mocktest',
+            name='quiz_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
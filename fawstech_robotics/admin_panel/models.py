@@ -1,6 +1,12 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group, Permission
 from djongo import models
 from bson import Decimal128
+from pymongo import UpdateOne
+from .answer_keys import answer_keys
+from .catalog import bump_catalog_version
+from .counters import adjust_counters, allocate_ordinals, exclude_counters_from_save
+from .search import course_index, content_index
+from .signals import notify_content_changed
 import os
 import logging
 
@@ -36,6 +42,19 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_email = instance.email
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if getattr(self, '_loaded_email', self.email) != self.email:
+            from student.models import Student
+            Student.objects.filter(user_id=self.id).update(search_email=Student.normalize_email(self.email))
+        self._loaded_email = self.email
+
 class Author(models.Model):
     name = models.CharField(max_length=100)
     domain = models.CharField(max_length=200, null=True, blank=True)
@@ -53,10 +72,18 @@ class Author(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        course_index.reindex_courses(self.courses.values_list('id', flat=True))
+        bump_catalog_version()
+
     def delete(self, *args, **kwargs):
-        if self.profile_picture and os.path.isfile(self.profile_picture.path):
-            os.remove(self.profile_picture.path)
+        from .media import remove_file_if_unreferenced
+        remove_file_if_unreferenced(self.profile_picture, owner=self)
+        course_ids = list(self.courses.values_list('id', flat=True))
         super().delete(*args, **kwargs)
+        course_index.reindex_courses(course_ids)
+        bump_catalog_version()
 
 class LandingMedia(models.Model):
     MEDIA_TYPE_CHOICES = [
@@ -83,6 +110,21 @@ class GalleryImage(models.Model):
     def __str__(self):
         return self.file.name
 
+class MediaUpload(models.Model):
+    # Uploaded ahead of authoring and referenced by id (e.g. from the bulk course tree).
+    # The same file may back several chapters/courses, so removal goes through media.py.
+    file = models.FileField(upload_to='uploads/')
+    checksum = models.CharField(max_length=64, db_index=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file.name
+
+    def delete(self, *args, **kwargs):
+        from .media import remove_file_if_unreferenced
+        remove_file_if_unreferenced(self.file, owner=self)
+        super().delete(*args, **kwargs)
+
 class Course(models.Model):
     thumbnail = models.ImageField(upload_to='course_thumbnails/')
     name = models.CharField(max_length=200)
@@ -101,47 +143,41 @@ class Course(models.Model):
     position = models.IntegerField(null=True, blank=True)
     total_chapters = models.IntegerField(default=0)
     total_quizzes = models.IntegerField(default=0)
+    total_modules = models.IntegerField(default=0)
+    # Next free chapter/quiz ordinal (bit position in CourseProgress bitsets); only ever grows
+    next_chapter_ordinal = models.IntegerField(default=0)
+    next_quiz_ordinal = models.IntegerField(default=0)
     why_choose_this_course = models.TextField(null=True, blank=True)
     what_will_you_learn = models.TextField(null=True, blank=True)
     is_course_updated = models.TextField(null=True, blank=True)
     who_is_this_course_for = models.TextField(null=True, blank=True)
     course_requirements = models.TextField(null=True, blank=True)
 
-    def update_total_chapters(self):
-        try:
-            total = sum(module.total_chapters for module in self.modules.all())
-            self.total_chapters = total
-            super().save(update_fields=['total_chapters'])
-        except Exception as e:
-            logger.error(f"Error updating total_chapters for Course {self.id}: {e}")
-            raise
+    # total_modules/total_chapters/total_quizzes are adjusted with adjust_counters() (mongo $inc) as
+    # content is created and deleted; saving a course never recounts its tree.
+    objects = models.DjongoManager()
 
-    def update_total_quizzes(self):
-        try:
-            total = sum(
-                chapter.quizzes.count()
-                for module in self.modules.all()
-                for chapter in module.chapters.all()
-            )
-            self.total_quizzes = total
-            super().save(update_fields=['total_quizzes'])
-        except Exception as e:
-            logger.error(f"Error updating total_quizzes for Course {self.id}: {e}")
-            raise
+    COUNTER_FIELDS = ('total_modules', 'total_chapters', 'total_quizzes')
+    ORDINAL_FIELDS = ('next_chapter_ordinal', 'next_quiz_ordinal')
 
     def save(self, *args, **kwargs):
         try:
+            exclude_counters_from_save(self, kwargs, self.COUNTER_FIELDS + self.ORDINAL_FIELDS)
             if isinstance(self.price_inr, Decimal128):
                 self.price_inr = self.price_inr.to_decimal()
             if self.offer_price is not None and isinstance(self.offer_price, Decimal128):
                 self.offer_price = self.offer_price.to_decimal()
             super().save(*args, **kwargs)
-            self.update_total_chapters()
-            self.update_total_quizzes()
+            course_index.index_course(self)
+            bump_catalog_version()
         except Exception as e:
             logger.error(f"Error saving Course {self.id}: {e}")
             raise
 
+    def delete(self, *args, **kwargs):
+        from .deletion import delete_content
+        return delete_content(course_ids=[self.id])
+
     def __str__(self):
         return self.name
 
@@ -150,44 +186,103 @@ class Module(models.Model):
     module_name = models.CharField(max_length=200)
     total_chapters = models.IntegerField(default=0)
 
-    def update_total_chapters(self):
-        try:
-            total = self.chapters.count()
-            self.total_chapters = total
-            super().save(update_fields=['total_chapters'])
-            self.course.update_total_chapters()
-        except Exception as e:
-            logger.error(f"Error updating total_chapters for Module {self.id}: {e}")
-            raise
+    objects = models.DjongoManager()
+
+    COUNTER_FIELDS = ('total_chapters',)
 
     def save(self, *args, **kwargs):
+        exclude_counters_from_save(self, kwargs, self.COUNTER_FIELDS)
+        adding = self._state.adding
         super().save(*args, **kwargs)
-        self.update_total_chapters()
+        if adding:
+            adjust_counters(Course, self.course_id, total_modules=1)
+        content_index.index_module(self)
+        bump_catalog_version()
 
     def __str__(self):
         return f"{self.course.name} - {self.module_name}"
 
     def delete(self, *args, **kwargs):
-        for chapter in self.chapters.all():
-            chapter.delete()
-        super().delete(*args, **kwargs)
+        from .deletion import delete_content
+        return delete_content(module_ids=[self.id])
 
 class Chapter(models.Model):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='chapters')
     chapter_name = models.CharField(max_length=200)
     chapter_description = models.TextField(null=True, blank=True)
     video = models.FileField(upload_to='chapter_videos/')
+    # Stable position of the chapter within its course, see Course.next_chapter_ordinal
+    ordinal = models.IntegerField(null=True, blank=True)
+    # Video length, probed in the background whenever the video changes (media.store_video_durations)
+    duration_minutes = models.FloatField(null=True, blank=True)
+    # Bumped ($inc) whenever the chapter's quizzes change, see answer_keys.AnswerKeyCache
+    quiz_version = models.IntegerField(default=0)
+
+    objects = models.DjongoManager()
+
+    COUNTER_FIELDS = ('quiz_version',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_video = instance.__dict__.get('video')
+        instance._loaded_module_id = instance.__dict__.get('module_id')
+        return instance
 
     def save(self, *args, **kwargs):
+        from .media import store_video_durations
+        from .tasks import enqueue
+
+        exclude_counters_from_save(self, kwargs, self.COUNTER_FIELDS)
+        adding = self._state.adding
+        course_id = self.module.course_id
+        old_module_id = None if adding else getattr(self, '_loaded_module_id', self.module_id)
+        moved = old_module_id is not None and old_module_id != self.module_id
+        old_course_id = Module.objects.filter(id=old_module_id).values_list('course_id', flat=True).first() if moved else None
+        # a chapter moving to another course takes a fresh ordinal there, like a new one
+        if (adding and self.ordinal is None) or (moved and old_course_id != course_id):
+            self.ordinal = allocate_ordinals(Course, course_id, 'next_chapter_ordinal')[0]
+        video_changed = adding or getattr(self, '_loaded_video', None) != self.video.name
+        if video_changed:
+            self.duration_minutes = None
         super().save(*args, **kwargs)
-        self.module.update_total_chapters()
+        self._loaded_module_id = self.module_id
+        if video_changed:
+            self._loaded_video = self.video.name
+            enqueue(store_video_durations, [self.id])
+        if adding:
+            adjust_counters(Module, self.module_id, total_chapters=1)
+            adjust_counters(Course, course_id, total_chapters=1)
+            notify_content_changed([course_id])
+        elif moved:
+            self._move_counters(old_module_id, old_course_id)
+        content_index.index_chapter(self)
+        bump_catalog_version()
+
+    def _move_counters(self, old_module_id, old_course_id):
+        """Counters, quiz ordinals and caches after the chapter moved in from `old_module_id`."""
+        course_id = self.module.course_id
+        adjust_counters(Module, old_module_id, total_chapters=-1)
+        adjust_counters(Module, self.module_id, total_chapters=1)
+        quizzes = list(Quiz.objects.filter(chapter_id=self.id).order_by('id'))
+        if old_course_id != course_id:
+            ordinals = allocate_ordinals(Course, course_id, 'next_quiz_ordinal', len(quizzes)) if quizzes else []
+            if quizzes:
+                Quiz.objects.mongo_bulk_write([
+                    UpdateOne({'id': quiz.id}, {'$set': {'ordinal': ordinal}})
+                    for quiz, ordinal in zip(quizzes, ordinals)
+                ], ordered=False)
+            adjust_counters(Course, old_course_id, total_chapters=-1, total_quizzes=-len(quizzes))
+            adjust_counters(Course, course_id, total_chapters=1, total_quizzes=len(quizzes))
+        for quiz in quizzes:
+            quiz.chapter = self
+            content_index.index_quiz(quiz, course_id)
+        answer_keys.invalidate_quizzes([quiz.id for quiz in quizzes])
+        notify_content_changed(sorted({old_course_id, course_id} - {None}))
 
     def delete(self, *args, **kwargs):
-        if self.video and os.path.isfile(self.video.path):
-            os.remove(self.video.path)
-        module = self.module
-        super().delete(*args, **kwargs)
-        module.update_total_chapters()
+        from .deletion import delete_content
+        return delete_content(chapter_ids=[self.id])
 
     def __str__(self):
         return f"{self.module.module_name} - {self.chapter_name}"
@@ -200,15 +295,50 @@ class Quiz(models.Model):
     option_3 = models.CharField(max_length=255)
     option_4 = models.CharField(max_length=255)
     correct_option = models.IntegerField(choices=[(1, "Option 1"), (2, "Option 2"), (3, "Option 3"), (4, "Option 4")])
+    # Stable position of the quiz within its course, see Course.next_quiz_ordinal
+    ordinal = models.IntegerField(null=True, blank=True)
+
+    objects = models.DjongoManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_chapter_id = instance.__dict__.get('chapter_id')
+        return instance
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
+        course_id = self.chapter.module.course_id
+        old_chapter_id = None if adding else getattr(self, '_loaded_chapter_id', self.chapter_id)
+        moved = old_chapter_id is not None and old_chapter_id != self.chapter_id
+        old_course_id = Chapter.objects.filter(id=old_chapter_id).values_list(
+            'module__course_id', flat=True).first() if moved else None
+        # a quiz moving to another course takes a fresh ordinal there, like a new one
+        if (adding and self.ordinal is None) or (moved and old_course_id != course_id):
+            self.ordinal = allocate_ordinals(Course, course_id, 'next_quiz_ordinal')[0]
         super().save(*args, **kwargs)
-        self.chapter.module.course.update_total_quizzes()
+        self._loaded_chapter_id = self.chapter_id
+        answer_keys.invalidate_chapters([self.chapter_id] + ([old_chapter_id] if moved else []))
+        if moved:
+            answer_keys.invalidate_quizzes([self.id])
+        if adding:
+            adjust_counters(Course, course_id, total_quizzes=1)
+            notify_content_changed([course_id])
+        elif moved and old_course_id != course_id:
+            adjust_counters(Course, old_course_id, total_quizzes=-1)
+            adjust_counters(Course, course_id, total_quizzes=1)
+            notify_content_changed(sorted({old_course_id, course_id} - {None}))
+        content_index.index_quiz(self, course_id)
 
     def delete(self, *args, **kwargs):
-        course = self.chapter.module.course
+        course_id = self.chapter.module.course_id
+        quiz_id = self.id
         super().delete(*args, **kwargs)
-        course.update_total_quizzes()
+        answer_keys.invalidate_chapters([self.chapter_id])
+        answer_keys.invalidate_quizzes([quiz_id])
+        adjust_counters(Course, course_id, total_quizzes=-1)
+        content_index.remove_quiz(quiz_id)
+        notify_content_changed([course_id])
 
     def __str__(self):
         return f"Quiz: {self.question[:30]}..."
@@ -233,10 +363,24 @@ class MockTest(models.Model):
     image = models.ImageField(upload_to='mock_tests/')
     created_at = models.DateTimeField(auto_now_add=True)
     duration = models.PositiveIntegerField(null=True, blank=True)
+    # Bumped ($inc) whenever the mock test's questions change, see answer_keys.AnswerKeyCache
+    quiz_version = models.IntegerField(default=0)
+
+    objects = models.DjongoManager()
+
+    COUNTER_FIELDS = ('quiz_version',)
+
+    def save(self, *args, **kwargs):
+        exclude_counters_from_save(self, kwargs, self.COUNTER_FIELDS)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.heading
 
+    def delete(self, *args, **kwargs):
+        from .deletion import delete_mock_tests
+        return delete_mock_tests([self.id])
+
 class MockTestQuiz(models.Model):
     mock_test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='quizzes')
     question = models.TextField()
@@ -246,5 +390,14 @@ class MockTestQuiz(models.Model):
     option_4 = models.CharField(max_length=255)
     correct_option = models.IntegerField(choices=[(1, "Option 1"), (2, "Option 2"), (3, "Option 3"), (4, "Option 4")])
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        answer_keys.invalidate_mock_tests([self.mock_test_id])
+
+    def delete(self, *args, **kwargs):
+        mock_test_id = self.mock_test_id
+        super().delete(*args, **kwargs)
+        answer_keys.invalidate_mock_tests([mock_test_id])
+
     def __str__(self):
         return self.question[:50]
\ No newline at end of file
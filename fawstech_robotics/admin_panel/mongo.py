@@ -0,0 +1,10 @@
+from django.db import connections
+
+
+def get_collection(name, using='default'):
+    """
+    Raw pymongo collection on the database djongo is connected to. For aggregation pipelines
+    and documents that are not Django models; model collections are named by _meta.db_table
+    and store foreign keys under their attnames (course_id, user_id, ...).
+    """
+    return connections[using].cursor().db_conn[name]
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import zipfile
+from decimal import Decimal
+from django.core.files import File
+from rest_framework import serializers
+from .models import Author, Course, MediaUpload
+from .serializers import AuthorSerializer, CourseTreeSerializer
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+MEDIA_NAME_RE = re.compile(r'^media/([0-9a-f]{64})(\.[A-Za-z0-9]{1,10})?$')
+CHUNK_SIZE = 64 * 1024
+
+# `recommended` and `position` are left out like in bulk.clone_course: an imported course
+# starts unrecommended instead of taking a slot in the recommended order
+COURSE_FIELDS = (
+    'name', 'description', 'category',
+    'what_you_will_learn_1', 'what_you_will_learn_2', 'what_you_will_learn_3',
+    'what_you_will_learn_4', 'what_you_will_learn_5', 'what_you_will_learn_6',
+    'price_inr', 'offer_price',
+    'why_choose_this_course', 'what_will_you_learn', 'is_course_updated',
+    'who_is_this_course_for', 'course_requirements',
+)
+AUTHOR_FIELDS = (
+    'name', 'domain', 'description', 'expertise', 'occupation', 'experience_in_years',
+    'professional_experience', 'education_and_teaching', 'author_and_content_creator',
+)
+QUIZ_FIELDS = ('question', 'option_1', 'option_2', 'option_3', 'option_4', 'correct_option')
+
+
+class PackageError(Exception):
+    pass
+
+
+def _plain(value):
+    if hasattr(value, 'to_decimal'):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _StreamBuffer:
+    """Write-only, non-seekable sink for ZipFile; the generator drains it after every write."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _sha256_of(field_file):
+    digest = hashlib.sha256()
+    with field_file.storage.open(field_file.name, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stream_course_package(course_id):
+    """
+    Return a generator yielding a ZIP archive of one course (author, modules, chapters,
+    quizzes and media) chunk by chunk. The course is loaded and every referenced media file
+    checked up front, raising PackageError if one is missing, so a broken course fails
+    before the response starts instead of ending in a truncated archive. The archive is
+    written to a non-seekable buffer, so zipfile emits data descriptors and nothing is held
+    beyond the current chunk. Media entries are named by sha256 so shared files are stored
+    once; the manifest is written last and refers to them by entry name.
+    """
+    course = (
+        Course.objects.select_related('author')
+        .prefetch_related('modules__chapters__quizzes')
+        .get(id=course_id)
+    )
+    files = [course.thumbnail] if course.thumbnail else []
+    if course.author and course.author.profile_picture:
+        files.append(course.author.profile_picture)
+    modules = sorted(course.modules.all(), key=lambda module: module.id)
+    for module in modules:
+        files.extend(chapter.video for chapter in module.chapters.all() if chapter.video)
+
+    missing = sorted({f.name for f in files if not f.storage.exists(f.name)})
+    if missing:
+        raise PackageError(f"Course media files are missing from storage: {missing}")
+    return _write_package(course, modules, files)
+
+
+def _write_package(course, modules, files):
+    # Prefer checksums recorded at upload time; hash anything else before it is written
+    known = dict(MediaUpload.objects.filter(file__in=[f.name for f in files]).values_list('file', 'checksum'))
+    entry_names = {}
+
+    def media_entry(field_file):
+        if not field_file:
+            return None
+        return entry_names.get(field_file.name)
+
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for field_file in files:
+            if field_file.name in entry_names:
+                continue
+            checksum = known.get(field_file.name) or _sha256_of(field_file)
+            entry_name = f"media/{checksum}{os.path.splitext(field_file.name)[1].lower()}"
+            written = entry_name in entry_names.values()
+            entry_names[field_file.name] = entry_name
+            if written:
+                continue
+            info = zipfile.ZipInfo(entry_name)
+            info.compress_type = zipfile.ZIP_STORED
+            with field_file.storage.open(field_file.name, 'rb') as source, archive.open(info, 'w', force_zip64=True) as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+
+        manifest = {
+            'version': PACKAGE_VERSION,
+            'course': {field: _plain(getattr(course, field)) for field in COURSE_FIELDS},
+        }
+        manifest['course']['thumbnail'] = media_entry(course.thumbnail)
+        if course.author:
+            manifest['course']['author'] = {field: getattr(course.author, field) for field in AUTHOR_FIELDS}
+            manifest['course']['author']['profile_picture'] = media_entry(course.author.profile_picture)
+        else:
+            manifest['course']['author'] = None
+        manifest['course']['modules'] = [
+            {
+                'module_name': module.module_name,
+                'chapters': [
+                    {
+                        'chapter_name': chapter.chapter_name,
+                        'chapter_description': chapter.chapter_description,
+                        'video': media_entry(chapter.video),
+                        'quizzes': [
+                            {field: getattr(quiz, field) for field in QUIZ_FIELDS}
+                            for quiz in sorted(chapter.quizzes.all(), key=lambda quiz: quiz.id)
+                        ],
+                    }
+                    for chapter in sorted(module.chapters.all(), key=lambda chapter: chapter.id)
+                ],
+            }
+            for module in modules
+        ]
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest), compress_type=zipfile.ZIP_DEFLATED)
+    yield buffer.drain()
+    logger.info(f"Exported course {course.id} with {len(set(entry_names.values()))} media files")
+
+
+class _HashingReader:
+    """Read-through wrapper computing sha256 of everything Django's storage copies out of it."""
+
+    def __init__(self, handle):
+        self._handle = handle
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self._handle.read(size)
+        self.digest.update(data)
+        return data
+
+
+def _import_media(archive, entry_names, created):
+    """
+    Map archive media entries to MediaUpload rows, reusing any upload with the same checksum.
+    Uploads created here are appended to `created` as soon as they exist.
+    """
+    checksums = {}
+    for entry_name in entry_names:
+        match = MEDIA_NAME_RE.match(entry_name)
+        if not match:
+            raise PackageError(f"Invalid media entry name: {entry_name}")
+        checksums[entry_name] = match.group(1)
+
+    existing = {}
+    for upload in MediaUpload.objects.filter(checksum__in=list(set(checksums.values()))):
+        existing.setdefault(upload.checksum, upload)
+
+    uploads = {}
+    for entry_name, checksum in checksums.items():
+        upload = existing.get(checksum)
+        if upload is None:
+            with archive.open(entry_name) as handle:
+                reader = _HashingReader(handle)
+                upload = MediaUpload(checksum=checksum)
+                upload.file.save(os.path.basename(entry_name), File(reader), save=False)
+            if reader.digest.hexdigest() != checksum:
+                upload.file.delete(save=False)
+                raise PackageError(f"Checksum mismatch for {entry_name}")
+            upload.save()
+            created.append(upload)
+            existing[checksum] = upload
+        uploads[entry_name] = upload
+    return uploads
+
+
+def _import_author(author_data, uploads, created):
+    """
+    The existing author whose profile fields all equal the packaged ones, or a new author
+    (appended to `created`); a same-named author with a different profile is left alone.
+    Returns (author, whether an existing author was reused).
+    """
+    if not author_data:
+        return None, False
+    fields = {field: author_data.get(field) for field in AUTHOR_FIELDS}
+    author = Author.objects.filter(**fields).order_by('id').first()
+    if author:
+        return author, True
+    author = Author(**fields)
+    picture = author_data.get('profile_picture')
+    if picture:
+        author.profile_picture = uploads[picture].file.name
+    author.save()
+    created.append(author)
+    return author, False
+
+
+def _discard(created):
+    """Remove the authors and uploads (with their files) created by a failed import."""
+    for instance in reversed(created):
+        try:
+            if isinstance(instance, Author):
+                # the queryset delete leaves the shared picture to its upload
+                Author.objects.filter(id=instance.id).delete()
+            else:
+                instance.delete()
+        except Exception:
+            logger.exception(f"Could not remove {instance!r} left by a failed course import")
+
+
+class _ManifestSerializer(CourseTreeSerializer):
+    # Field validation only: upload ids are placeholders until the media has been imported
+    def validate(self, attrs):
+        return attrs
+
+
+def _dicts(value, what):
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise PackageError(f"Package manifest {what} must be a list of objects")
+    return value
+
+
+def _tree_body(course, author_id, upload_id):
+    """CourseTreeSerializer body for the manifest course; `upload_id` maps media entry names to upload ids."""
+    body = {field: course.get(field) for field in COURSE_FIELDS}
+    body['author_id'] = author_id
+    body['thumbnail_upload_id'] = upload_id(course.get('thumbnail'))
+    body['modules'] = [
+        {
+            'module_name': module.get('module_name'),
+            'chapters': [
+                {
+                    'chapter_name': chapter.get('chapter_name'),
+                    'chapter_description': chapter.get('chapter_description'),
+                    'video_upload_id': upload_id(chapter.get('video')),
+                    'quizzes': chapter.get('quizzes') or [],
+                }
+                for chapter in _dicts(module.get('chapters'), 'chapters')
+            ],
+        }
+        for module in _dicts(course.get('modules'), 'modules')
+    ]
+    return body
+
+
+def import_course_package(package_file):
+    """
+    Read an uploaded package and insert its course. Returns (course, author reused), the
+    second telling whether the course was attached to an existing author instead of a newly
+    created one. Uploads and the author created for the package are removed again if any
+    later step fails. Raises PackageError or serializers.ValidationError for invalid packages.
+    """
+    from .bulk import insert_course_tree
+
+    created = []
+    try:
+        course_data, modules_data, author_reused = read_course_package(package_file, created)
+        return insert_course_tree(course_data, modules_data), author_reused
+    except Exception:
+        _discard(created)
+        raise
+
+
+def read_course_package(package_file, created):
+    """
+    Validate an uploaded package and return it as validated CourseTreeSerializer data,
+    (course data, modules data, author reused). The manifest structure, the course, author
+    and quiz fields and the media entries are all checked before anything is written; only
+    then is media copied out of the archive entry by entry (deduplicated by checksum against
+    existing uploads) and the author matched or created. Rows created on the way are appended
+    to `created`. Raises PackageError or serializers.ValidationError.
+    """
+    try:
+        archive = zipfile.ZipFile(package_file)
+    except zipfile.BadZipFile:
+        raise PackageError("Package is not a valid ZIP archive")
+
+    with archive:
+        try:
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+        except KeyError:
+            raise PackageError("Package has no manifest")
+        except ValueError:
+            raise PackageError("Package manifest is not valid JSON")
+        if not isinstance(manifest, dict):
+            raise PackageError("Package manifest is not a JSON object")
+        if manifest.get('version') != PACKAGE_VERSION:
+            raise PackageError(f"Unsupported package version: {manifest.get('version')}")
+
+        course = manifest.get('course')
+        author = course.get('author') if isinstance(course, dict) else None
+        if not isinstance(course, dict) or (author is not None and not isinstance(author, dict)):
+            raise PackageError("Package manifest has no valid course")
+
+        referenced = set()
+
+        def placeholder(entry):
+            if entry is None:
+                return None
+            if not isinstance(entry, str) or not MEDIA_NAME_RE.match(entry):
+                raise PackageError(f"Invalid media entry name: {entry}")
+            referenced.add(entry)
+            return 0
+
+        _ManifestSerializer(data=_tree_body(course, None, placeholder)).is_valid(raise_exception=True)
+        if author:
+            author_serializer = AuthorSerializer(data={field: author.get(field) for field in AUTHOR_FIELDS})
+            if not author_serializer.is_valid():
+                raise serializers.ValidationError({'author': author_serializer.errors})
+            placeholder(author.get('profile_picture'))
+        missing = sorted(referenced - set(archive.namelist()))
+        if missing:
+            raise PackageError(f"Package is missing media entries: {missing}")
+
+        uploads = _import_media(archive, referenced, created)
+
+    author, author_reused = _import_author(author, uploads, created)
+    serializer = CourseTreeSerializer(data=_tree_body(
+        course, author.id if author else None, lambda entry: uploads[entry].id if entry else None
+    ))
+    serializer.is_valid(raise_exception=True)
+    course_data = dict(serializer.validated_data)
+    return course_data, course_data.pop('modules'), author_reused
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+import logging
+from .serializers import QuizTreeSerializer
+
+logger = logging.getLogger(__name__)
+
+MAX_IMPORT_ROWS = 1000
+READ_SIZE = 64 * 1024
+
+
+class QuestionImportError(Exception):
+    pass
+
+
+def _iter_json_array(stream):
+    """Decode the objects of a top-level JSON array one at a time from a text stream."""
+    decoder = json.JSONDecoder()
+    buffer, position, started, eof = '', 0, False, False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if not started and position < len(buffer):
+            if buffer[position] != '[':
+                raise QuestionImportError("JSON question bank must be an array of objects")
+            started = True
+            position += 1
+            continue
+        if started and position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            if position >= len(buffer):
+                raise ValueError
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if eof:
+                raise QuestionImportError("JSON question bank is truncated or malformed")
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+        position = end
+
+
+def iter_question_rows(uploaded_file):
+    """
+    Yield the questions of an uploaded bank as dicts without loading the whole file. The
+    format follows the extension: .csv (header row with question, option_1..option_4,
+    correct_option), .jsonl (one object per line) or .json (an array of objects).
+    """
+    name = (uploaded_file.name or '').lower()
+    stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig')
+    try:
+        if name.endswith('.csv'):
+            for row in csv.DictReader(stream):
+                yield {key.strip(): value for key, value in row.items() if key}
+        elif name.endswith('.jsonl'):
+            for line in stream:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None
+        elif name.endswith('.json'):
+            yield from _iter_json_array(stream)
+        else:
+            raise QuestionImportError("Unsupported file type, expected .csv, .json or .jsonl")
+    except UnicodeDecodeError:
+        raise QuestionImportError("Question bank must be UTF-8 encoded")
+    finally:
+        stream.detach()
+
+
+def validate_question_rows(rows):
+    """
+    Validate every row; returns (valid rows, errors) where errors are
+    [{"row": n, "errors": {...}}] with 1-based row numbers.
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if number > MAX_IMPORT_ROWS:
+            raise QuestionImportError(f"A question bank may contain at most {MAX_IMPORT_ROWS} questions")
+        if not isinstance(row, dict):
+            errors.append({"row": number, "errors": {"non_field_errors": ["Row must be an object"]}})
+            continue
+        serializer = QuizTreeSerializer(data=row)
+        if serializer.is_valid():
+            valid.append(dict(serializer.validated_data))
+        else:
+            errors.append({"row": number, "errors": serializer.errors})
+    return valid, errors
+
+
+def read_question_bank(request):
+    """Rows from an uploaded 'file' (CSV/JSON/JSONL) or from a JSON array request body."""
+    uploaded_file = request.FILES.get('file')
+    if uploaded_file:
+        return validate_question_rows(iter_question_rows(uploaded_file))
+    if isinstance(request.data, list):
+        return validate_question_rows(request.data)
+    raise QuestionImportError("Provide a question bank file or a JSON array of questions")
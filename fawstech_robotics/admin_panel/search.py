@@ -0,0 +1,562 @@
+import bisect
+import json
+import math
+import re
+import threading
+import time
+import logging
+from django.conf import settings
+from .catalog import catalog_version
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+WORD_RE = re.compile(r'[^a-z0-9]+')
+
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into',
+    'is', 'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with', 'you', 'your',
+])
+
+# Relative importance of each course field when scoring a match.
+COURSE_FIELD_WEIGHTS = {
+    'name': 3.0,
+    'category': 2.0,
+    'author': 2.0,
+    'learn': 1.2,
+    'requirements': 1.0,
+    'description': 1.0,
+}
+
+
+def stem(word):
+    """Light suffix stripping so that e.g. "sensors"/"sensor" and "programming"/"program" meet."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith('ies') or word.endswith('ied'):
+        return word[:-3] + 'y'
+    if word.endswith('sses'):
+        return word[:-2]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            base = word[:-len(suffix)]
+            if not any(ch in 'aeiouy' for ch in base):
+                return word
+            if len(base) > 3 and base[-1] == base[-2] and base[-1] not in 'lsz':
+                base = base[:-1]
+            return base
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [stem(token) for token in TOKEN_RE.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+def json_list(value):
+    """Course list fields are stored as JSON strings; return their entries as a list of strings."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return [str(value)]
+    if isinstance(parsed, list):
+        return [str(item) for item in parsed]
+    return [str(parsed)]
+
+
+def trigrams(term):
+    padded = f' {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Maps character trigrams to the vocabulary terms containing them, for typo-tolerant lookups."""
+
+    def __init__(self):
+        self._postings = {}
+        self._sizes = {}
+
+    def add(self, term):
+        if term in self._sizes:
+            return
+        grams = trigrams(term)
+        self._sizes[term] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(term)
+
+    def discard(self, term):
+        if self._sizes.pop(term, None) is None:
+            return
+        for gram in trigrams(term):
+            terms = self._postings.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._postings[gram]
+
+    def clear(self):
+        self._postings = {}
+        self._sizes = {}
+
+    def similar(self, term, threshold=0.3, limit=5):
+        """Return up to `limit` (term, jaccard similarity) pairs at or above `threshold`."""
+        grams = trigrams(term)
+        # A candidate needs at least this many shared trigrams to be able to reach the threshold.
+        min_shared = max(1, math.ceil(threshold * len(grams)))
+        shared = {}
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        matches = []
+        for candidate, count in shared.items():
+            if count < min_shared:
+                continue
+            similarity = count / (len(grams) + self._sizes[candidate] - count)
+            if similarity >= threshold:
+                matches.append((candidate, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+
+class InvertedIndex:
+    """Field-weighted inverted index scored with BM25."""
+
+    def __init__(self, field_weights, k1=1.2, b=0.75, fuzzy=False):
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0.0
+        self._trigrams = TrigramIndex() if fuzzy else None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def add(self, doc_id, fields):
+        weighted = {}
+        length = 0.0
+        for field, text in fields.items():
+            weight = self.field_weights.get(field, 1.0)
+            for term in tokenize(text):
+                weighted[term] = weighted.get(term, 0.0) + weight
+                length += weight
+
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in weighted.items():
+                if term not in self._postings:
+                    self._postings[term] = {}
+                    if self._trigrams is not None:
+                        self._trigrams.add(term)
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = tuple(weighted)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    if self._trigrams is not None:
+                        self._trigrams.discard(term)
+        self._total_length -= self._doc_lengths.pop(doc_id, 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._doc_lengths = {}
+            self._total_length = 0.0
+            if self._trigrams is not None:
+                self._trigrams.clear()
+
+    def search(self, query, limit=None):
+        with self._lock:
+            return self._score({term: 1.0 for term in tokenize(query)}, limit)
+
+    def fuzzy_search(self, query, limit=None, threshold=0.3):
+        """Like search(), but each query term also matches similarly spelled vocabulary terms."""
+        if self._trigrams is None:
+            return self.search(query, limit)
+        with self._lock:
+            term_weights = {}
+            for term in tokenize(query):
+                for candidate, similarity in self._trigrams.similar(term, threshold):
+                    term_weights[candidate] = max(term_weights.get(candidate, 0.0), similarity)
+            return self._score(term_weights, limit)
+
+    def _score(self, term_weights, limit):
+        total_docs = len(self._doc_lengths)
+        if not term_weights or not total_docs:
+            return []
+        avg_length = (self._total_length / total_docs) or 1.0
+        scores = {}
+        for term, weight in term_weights.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+def course_document(course):
+    learn = [getattr(course, f'what_you_will_learn_{i}') for i in range(1, 7)]
+    learn.extend(json_list(course.what_will_you_learn))
+    return {
+        'name': course.name,
+        'category': course.category,
+        'author': course.author.name if course.author else '',
+        'learn': ' '.join(item for item in learn if item),
+        'requirements': ' '.join(json_list(course.course_requirements)),
+        'description': course.description,
+    }
+
+
+class CourseSearchIndex:
+    """
+    In-process search index over the course catalog. It is loaded from the database on
+    first use and afterwards kept current by the Course/Author save and delete hooks of this
+    process; it is rebuilt every `ttl` seconds, and on the next search after invalidate(), so
+    that writes made through other workers show up as well.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._index = InvertedIndex(COURSE_FIELD_WEIGHTS, fuzzy=True)
+        self._built = False
+        self._expires_at = 0.0
+        self._lock = threading.RLock()
+
+    def _current(self):
+        return self._built and time.monotonic() < self._expires_at
+
+    def ensure_built(self):
+        if self._current():
+            return
+        from .models import Course
+
+        with self._lock:
+            if self._current():
+                return
+            self._index.clear()
+            for course in Course.objects.select_related('author'):
+                self._index.add(course.id, course_document(course))
+            self._built = True
+            self._expires_at = time.monotonic() + self.ttl
+            logger.info(f"Course search index built with {len(self._index)} courses")
+
+    def invalidate(self):
+        """Rebuild on the next search, e.g. after a hit turned out to be a deleted course."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    def index_course(self, course):
+        with self._lock:
+            if self._built:
+                self._index.add(course.id, course_document(course))
+
+    def remove_course(self, course_id):
+        with self._lock:
+            if self._built:
+                self._index.remove(course_id)
+
+    def reindex_courses(self, course_ids):
+        from .models import Course
+
+        with self._lock:
+            if not self._built or not course_ids:
+                return
+            for course in Course.objects.select_related('author').filter(id__in=list(course_ids)):
+                self._index.add(course.id, course_document(course))
+
+    def search(self, query, limit=None):
+        self.ensure_built()
+        return self._index.search(query, limit=limit)
+
+    def fuzzy_search(self, query, limit=None):
+        self.ensure_built()
+        return self._index.fuzzy_search(query, limit=limit)
+
+
+course_index = CourseSearchIndex(ttl=getattr(settings, 'CATALOG_CACHE_TTL', 60))
+
+
+# Field weights for lesson-level documents (modules, chapters and quiz questions).
+CONTENT_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'description': 1.0,
+    'question': 1.0,
+}
+
+
+class ContentSearchIndex:
+    """
+    Search index over module names, chapters and quiz questions. Documents are keyed
+    ('module' | 'chapter' | 'quiz', id) and remember the course/chapter they belong to so
+    hits can be grouped per course without touching the chapter collection at query time.
+    Like CourseSearchIndex it is rebuilt every `ttl` seconds and after invalidate().
+    """
+
+    MAX_HITS_PER_COURSE = 5
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._index = InvertedIndex(CONTENT_FIELD_WEIGHTS)
+        self._meta = {}
+        self._by_course = {}
+        self._by_module = {}
+        self._by_chapter = {}
+        self._built = False
+        self._expires_at = 0.0
+        self._lock = threading.RLock()
+
+    def _current(self):
+        return self._built and time.monotonic() < self._expires_at
+
+    def ensure_built(self):
+        if self._current():
+            return
+        from .models import Module, Chapter, Quiz
+
+        with self._lock:
+            if self._current():
+                return
+            self._index.clear()
+            self._meta, self._by_course, self._by_module, self._by_chapter = {}, {}, {}, {}
+
+            module_courses = {}
+            for module in Module.objects.values('id', 'course_id', 'module_name'):
+                module_courses[module['id']] = module['course_id']
+                self._add_module(module['id'], module['course_id'], module['module_name'])
+
+            chapter_parents = {}
+            chapters = Chapter.objects.values('id', 'module_id', 'chapter_name', 'chapter_description')
+            for chapter in chapters:
+                course_id = module_courses.get(chapter['module_id'])
+                chapter_parents[chapter['id']] = (course_id, chapter['module_id'])
+                self._add_chapter(
+                    chapter['id'], course_id, chapter['module_id'],
+                    chapter['chapter_name'], chapter['chapter_description'],
+                )
+
+            for quiz in Quiz.objects.values('id', 'chapter_id', 'question'):
+                course_id, module_id = chapter_parents.get(quiz['chapter_id'], (None, None))
+                self._add_quiz(quiz['id'], course_id, module_id, quiz['chapter_id'], quiz['question'])
+
+            self._built = True
+            self._expires_at = time.monotonic() + self.ttl
+            logger.info(f"Content search index built with {len(self._index)} documents")
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+    def _add(self, doc_id, fields, course_id, module_id, chapter_id, title):
+        self._discard(doc_id)
+        self._index.add(doc_id, fields)
+        self._meta[doc_id] = {
+            'course_id': course_id, 'module_id': module_id, 'chapter_id': chapter_id, 'title': title,
+        }
+        self._by_course.setdefault(course_id, set()).add(doc_id)
+        self._by_module.setdefault(module_id, set()).add(doc_id)
+        if chapter_id is not None:
+            self._by_chapter.setdefault(chapter_id, set()).add(doc_id)
+
+    def _discard(self, doc_id):
+        meta = self._meta.pop(doc_id, None)
+        if meta is None:
+            return
+        self._index.remove(doc_id)
+        for group, key in ((self._by_course, meta['course_id']),
+                           (self._by_module, meta['module_id']),
+                           (self._by_chapter, meta['chapter_id'])):
+            members = group.get(key)
+            if members is not None:
+                members.discard(doc_id)
+                if not members:
+                    del group[key]
+
+    def _add_module(self, module_id, course_id, module_name):
+        self._add(('module', module_id), {'title': module_name}, course_id, module_id, None, module_name)
+
+    def _add_chapter(self, chapter_id, course_id, module_id, chapter_name, chapter_description):
+        self._add(
+            ('chapter', chapter_id), {'title': chapter_name, 'description': chapter_description},
+            course_id, module_id, chapter_id, chapter_name,
+        )
+
+    def _add_quiz(self, quiz_id, course_id, module_id, chapter_id, question):
+        self._add(('quiz', quiz_id), {'question': question}, course_id, module_id, chapter_id, question)
+
+    def index_module(self, module):
+        with self._lock:
+            if self._built:
+                self._add_module(module.id, module.course_id, module.module_name)
+
+    def index_chapter(self, chapter):
+        with self._lock:
+            if self._built:
+                self._add_chapter(
+                    chapter.id, chapter.module.course_id, chapter.module_id,
+                    chapter.chapter_name, chapter.chapter_description,
+                )
+
+    def index_quiz(self, quiz, course_id):
+        with self._lock:
+            if self._built:
+                self._add_quiz(quiz.id, course_id, quiz.chapter.module_id, quiz.chapter_id, quiz.question)
+
+    def remove_quiz(self, quiz_id):
+        with self._lock:
+            self._discard(('quiz', quiz_id))
+
+    def remove_chapter(self, chapter_id):
+        with self._lock:
+            for doc_id in list(self._by_chapter.get(chapter_id, ())):
+                self._discard(doc_id)
+
+    def remove_module(self, module_id):
+        with self._lock:
+            for doc_id in list(self._by_module.get(module_id, ())):
+                self._discard(doc_id)
+
+    def remove_course(self, course_id):
+        with self._lock:
+            for doc_id in list(self._by_course.get(course_id, ())):
+                self._discard(doc_id)
+
+    def search(self, query):
+        """Return [{'course_id', 'score', 'hits': [...]}] ordered by each course's best hit."""
+        self.ensure_built()
+        groups = {}
+        with self._lock:
+            for doc_id, score in self._index.search(query):
+                meta = self._meta.get(doc_id)
+                if meta is None or meta['course_id'] is None:
+                    continue
+                group = groups.setdefault(meta['course_id'], {'course_id': meta['course_id'], 'score': 0.0, 'hits': []})
+                group['score'] = max(group['score'], score)
+                if len(group['hits']) < self.MAX_HITS_PER_COURSE:
+                    group['hits'].append({
+                        'type': doc_id[0],
+                        'id': doc_id[1],
+                        'module_id': meta['module_id'],
+                        'chapter_id': meta['chapter_id'],
+                        'title': meta['title'],
+                        'score': round(score, 4),
+                    })
+        return sorted(groups.values(), key=lambda group: (-group['score'], group['course_id']))
+
+
+content_index = ContentSearchIndex(ttl=getattr(settings, 'CATALOG_CACHE_TTL', 60))
+
+
+def normalize_phrase(text):
+    return WORD_RE.sub(' ', str(text or '').lower()).strip()
+
+
+class CompletionIndex:
+    """
+    Prefix completion over course names, categories and author names, kept as a sorted
+    array of keys so that every completion of a prefix is one contiguous bisect slice.
+    Each phrase is keyed from every word onwards so "rob" also completes "Arduino Robotics".
+    The array is rebuilt from the catalog on the first lookup after the catalog version moves.
+    """
+
+    TYPE_PRIORITY = {'course': 0, 'category': 1, 'author': 2}
+    MAX_SCAN = 256
+
+    def __init__(self):
+        self._keys = []
+        self._entries = []
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _rebuild(self):
+        from .models import Course
+
+        self._version = catalog_version()
+        suggestions = {}
+        rows = Course.objects.values_list('id', 'name', 'category', 'author_id', 'author__name')
+        for course_id, name, category, author_id, author_name in rows:
+            candidates = [('course', name, course_id)]
+            if category:
+                candidates.append(('category', category, None))
+            if author_name:
+                candidates.append(('author', author_name, author_id))
+            for kind, text, object_id in candidates:
+                key = (kind, normalize_phrase(text), object_id if kind != 'category' else None)
+                if not key[1]:
+                    continue
+                if key in suggestions:
+                    suggestions[key]['weight'] += 1
+                else:
+                    suggestions[key] = {'text': text, 'type': kind, 'id': object_id, 'weight': 1}
+
+        pairs = []
+        for (kind, phrase, _), suggestion in suggestions.items():
+            words = phrase.split(' ')
+            for position in range(len(words)):
+                pairs.append((' '.join(words[position:]), position, suggestion))
+        pairs.sort(key=lambda pair: pair[0])
+
+        self._keys = [pair[0] for pair in pairs]
+        self._entries = [(pair[1], pair[2]) for pair in pairs]
+
+    def complete(self, prefix, limit=8):
+        prefix = normalize_phrase(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            if self._version != catalog_version():
+                self._rebuild()
+            keys, entries = self._keys, self._entries
+
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\uffff', start, min(len(keys), start + self.MAX_SCAN))
+        best = {}
+        for position, suggestion in entries[start:end]:
+            marker = id(suggestion)
+            if marker not in best or position < best[marker][0]:
+                best[marker] = (position, suggestion)
+
+        ranked = sorted(
+            best.values(),
+            key=lambda item: (
+                item[0] > 0,
+                self.TYPE_PRIORITY[item[1]['type']],
+                -item[1]['weight'],
+                len(item[1]['text']),
+            ),
+        )
+        return [
+            {'text': suggestion['text'], 'type': suggestion['type'], 'id': suggestion['id']}
+            for _, suggestion in ranked[:limit]
+        ]
+
+
+completion_index = CompletionIndex()
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 import json
-from .models import LandingMedia, GalleryImage, Course, Module, Chapter, Quiz, Event, MockTestQuiz, MockTest, Author
+from .models import LandingMedia, GalleryImage, MediaUpload, Course, Module, Chapter, Quiz, Event, MockTestQuiz, MockTest, Author
 from student.models import Student, PurchasedCourse
 from admin_panel.models import User, Course
 from django.conf import settings
@@ -294,6 +294,66 @@ class CourseSerializer(serializers.ModelSerializer):
 
         return representation
 
+class MediaUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MediaUpload
+        fields = ['id', 'file', 'checksum', 'uploaded_at']
+        read_only_fields = ['checksum']
+
+class QuizTreeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Quiz
+        fields = ['question', 'option_1', 'option_2', 'option_3', 'option_4', 'correct_option']
+
+class ChapterTreeSerializer(serializers.Serializer):
+    chapter_name = serializers.CharField(max_length=200)
+    chapter_description = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    video_upload_id = serializers.IntegerField()
+    quizzes = QuizTreeSerializer(many=True, required=False, default=list)
+
+class ModuleTreeSerializer(serializers.Serializer):
+    module_name = serializers.CharField(max_length=200)
+    chapters = ChapterTreeSerializer(many=True, required=False, default=list)
+
+class CourseTreeSerializer(CourseSerializer):
+    """
+    Validates a whole course tree posted as JSON. Files are referenced by MediaUpload id and
+    resolved to stored file names in validate(); insert_course_tree() does the writes.
+    """
+    thumbnail_upload_id = serializers.IntegerField(write_only=True)
+    modules = ModuleTreeSerializer(many=True, required=False, default=list)
+
+    class Meta(CourseSerializer.Meta):
+        fields = [
+            'name', 'description', 'category', 'author_id', 'thumbnail_upload_id',
+            'what_you_will_learn_1', 'what_you_will_learn_2', 'what_you_will_learn_3',
+            'what_you_will_learn_4', 'what_you_will_learn_5', 'what_you_will_learn_6',
+            'price_inr', 'offer_price', 'recommended', 'position', 'modules',
+            'why_choose_this_course', 'what_will_you_learn', 'is_course_updated',
+            'who_is_this_course_for', 'course_requirements'
+        ]
+
+    def to_internal_value(self, data):
+        # JSON bodies may carry the list fields as real lists; the base serializer expects JSON text
+        data = dict(data)
+        for field_name in ('what_will_you_learn', 'who_is_this_course_for', 'course_requirements'):
+            if isinstance(data.get(field_name), list):
+                data[field_name] = json.dumps(data[field_name])
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        chapters = [chapter for module in attrs['modules'] for chapter in module['chapters']]
+        upload_ids = {attrs['thumbnail_upload_id']} | {chapter['video_upload_id'] for chapter in chapters}
+        uploads = MediaUpload.objects.in_bulk(list(upload_ids))
+        missing = sorted(upload_ids - set(uploads))
+        if missing:
+            raise serializers.ValidationError({"upload_ids": f"Unknown upload ids: {missing}"})
+
+        attrs['thumbnail'] = uploads[attrs.pop('thumbnail_upload_id')].file.name
+        for chapter in chapters:
+            chapter['video'] = uploads[chapter.pop('video_upload_id')].file.name
+        return attrs
+
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
@@ -311,19 +371,17 @@ class MockTestSerializer(serializers.ModelSerializer):
         model = MockTest
         fields = ['id', 'heading', 'description', 'image', 'created_at', 'quizzes', 'duration']
 
-class StudentListSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField()
-    full_name = serializers.CharField(source='student_profile.full_name')
+class StudentListSerializer(serializers.Serializer):
+    """Serializes the projected rows produced by StudentListView (Student.values(...))."""
+    id = serializers.IntegerField(source='user_id')
+    email = serializers.EmailField(source='user__email')
+    full_name = serializers.CharField()
+    date_joined = serializers.DateTimeField(source='created_at')
     profile_picture = serializers.SerializerMethodField()
-    date_joined = serializers.DateTimeField(source='student_profile.created_at')
-
-    class Meta:
-        model = User
-        fields = ['id', 'email', 'full_name', 'date_joined', 'profile_picture']
 
     def get_profile_picture(self, obj):
-        if obj.student_profile.profile_picture:
-            return f"{settings.MEDIA_URL}{obj.student_profile.profile_picture}"
+        if obj['profile_picture']:
+            return f"{settings.MEDIA_URL}{obj['profile_picture']}"
         return None
 
 class PurchasedCourseSerializer(serializers.ModelSerializer):
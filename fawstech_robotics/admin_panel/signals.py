@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent with `course_ids` whenever chapters or quizzes are added to or removed from those
+# courses (including courses that were deleted). Caches keyed by course content listen to it.
+course_content_changed = Signal()
+
+
+def notify_content_changed(course_ids):
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        course_content_changed.send(sender=None, course_ids=course_ids)
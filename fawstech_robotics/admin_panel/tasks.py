@@ -0,0 +1,54 @@
+import atexit
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Fire-and-forget work that should not hold up a request (e.g. removing media files after a
+# bulk delete). A single daemon worker drains the queue; anything still queued at interpreter
+# exit is run synchronously.
+_tasks = queue.Queue()
+_worker = None
+_lock = threading.Lock()
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {func.__name__} failed")
+
+
+def _work():
+    while True:
+        func, args, kwargs = _tasks.get()
+        try:
+            _run(func, args, kwargs)
+        finally:
+            _tasks.task_done()
+
+
+def enqueue(func, *args, **kwargs):
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='admin-panel-tasks', daemon=True)
+            _worker.start()
+    _tasks.put((func, args, kwargs))
+
+
+def wait_for_tasks():
+    """Block until every queued task has run."""
+    _tasks.join()
+
+
+@atexit.register
+def _flush_pending():
+    while True:
+        try:
+            func, args, kwargs = _tasks.get_nowait()
+        except queue.Empty:
+            return
+        _run(func, args, kwargs)
+        _tasks.task_done()
@@ -1,3 +1,507 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import time
+import zipfile
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from student.models import Student
+from . import bitsets
+from .answer_keys import AnswerKeyCache
+from .counters import compute_counter_drift
+from .deletion import delete_content
+from .models import User, Author, Course, Module, Chapter, Quiz, MockTest, MockTestQuiz, MediaUpload
+from .search import InvertedIndex, TrigramIndex, content_index, course_index
+from .packages import MANIFEST_NAME, PackageError, import_course_package, stream_course_package
+from .question_import import (
+    MAX_IMPORT_ROWS, QuestionImportError, iter_question_rows, validate_question_rows,
+)
+from .tasks import wait_for_tasks
 
-# Create your tests here.
+
+class BitsetTests(SimpleTestCase):
+    def test_round_trip(self):
+        ordinals = [0, 5, 31, 32, 63, 64, 1000]
+        bits = bitsets.from_ordinals(ordinals)
+        self.assertEqual(bitsets.to_ordinals(bits), ordinals)
+        self.assertEqual(bitsets.popcount(bits), len(ordinals))
+        self.assertTrue(all(isinstance(key, str) for key in bits))
+        self.assertTrue(all(0 < word < 2 ** bitsets.WORD_BITS for word in bits.values()))
+
+    def test_bit_location(self):
+        self.assertEqual(bitsets.bit_location(0), ('0', 1))
+        self.assertEqual(bitsets.bit_location(33), ('1', 2))
+
+    def test_add_discard_contains(self):
+        bits = {}
+        bitsets.add(bits, 40)
+        bitsets.add(bits, 40)
+        self.assertTrue(bitsets.contains(bits, 40))
+        self.assertFalse(bitsets.contains(bits, 41))
+        bitsets.discard(bits, 40)
+        self.assertEqual(bits, {})  # empty words are dropped
+        bitsets.discard(bits, 7)
+        self.assertEqual(bits, {})
+
+    def test_intersect_drops_unmasked_bits(self):
+        bits = bitsets.from_ordinals([1, 2, 40])
+        mask = bitsets.from_ordinals([2, 3])
+        self.assertEqual(bitsets.to_ordinals(bitsets.intersect(bits, mask)), [2])
+        self.assertEqual(bitsets.intersect(None, mask), {})
+
+    def test_empty(self):
+        self.assertEqual(bitsets.to_ordinals(None), [])
+        self.assertEqual(bitsets.popcount({}), 0)
+        self.assertFalse(bitsets.contains(None, 0))
+
+
+def _upload(name, text):
+    return SimpleUploadedFile(name, text.encode('utf-8'))
+
+
+QUESTION = {'question': 'Q?', 'option_1': 'a', 'option_2': 'b', 'option_3': 'c', 'option_4': 'd', 'correct_option': 2}
+
+
+class QuestionImportTests(SimpleTestCase):
+    def test_csv(self):
+        text = 'question,option_1,option_2,option_3,option_4,correct_option\nQ?,a,b,c,d,2\n'
+        rows = list(iter_question_rows(_upload('bank.csv', '\ufeff' + text)))
+        self.assertEqual(rows, [{**QUESTION, 'correct_option': '2'}])
+
+    def test_jsonl_skips_blank_lines_and_flags_bad_ones(self):
+        text = json.dumps(QUESTION) + '\n\nnot json\n'
+        self.assertEqual(list(iter_question_rows(_upload('bank.jsonl', text))), [QUESTION, None])
+
+    def test_json_array_across_read_chunks(self):
+        questions = [{**QUESTION, 'question': 'x' * 70000}, QUESTION]
+        self.assertEqual(list(iter_question_rows(_upload('bank.json', json.dumps(questions)))), questions)
+
+    def test_json_errors(self):
+        with self.assertRaisesMessage(QuestionImportError, 'must be an array'):
+            list(iter_question_rows(_upload('bank.json', json.dumps(QUESTION))))
+        with self.assertRaisesMessage(QuestionImportError, 'truncated or malformed'):
+            list(iter_question_rows(_upload('bank.json', json.dumps([QUESTION])[:-5])))
+
+    def test_unsupported_file_type(self):
+        with self.assertRaisesMessage(QuestionImportError, 'Unsupported file type'):
+            list(iter_question_rows(_upload('bank.txt', '')))
+
+    def test_non_utf8(self):
+        upload = SimpleUploadedFile('bank.csv', 'question\nQ\u00e9\n'.encode('latin-1'))
+        with self.assertRaisesMessage(QuestionImportError, 'UTF-8'):
+            list(iter_question_rows(upload))
+
+    def test_validation_reports_rows(self):
+        valid, errors = validate_question_rows([QUESTION, None, {**QUESTION, 'correct_option': 9}])
+        self.assertEqual(valid, [QUESTION])
+        self.assertEqual([error['row'] for error in errors], [2, 3])
+        self.assertIn('correct_option', errors[1]['errors'])
+
+    def test_row_limit(self):
+        with self.assertRaises(QuestionImportError):
+            validate_question_rows([QUESTION] * (MAX_IMPORT_ROWS + 1))
+
+
+class DeleteContentTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(
+            thumbnail='course_thumbnails/t.jpg', name='Course', description='d', category='c', price_inr=100,
+        )
+        self.modules = [Module.objects.create(course=self.course, module_name=f'm{i}') for i in range(2)]
+        self.chapters = [
+            Chapter.objects.create(module=module, chapter_name=f'c{i}', video=f'chapter_videos/{i}.mp4')
+            for module in self.modules for i in range(2)
+        ]
+        for chapter in self.chapters:
+            for i in range(2):
+                Quiz.objects.create(chapter=chapter, question=f'q{i}', option_1='a', option_2='b',
+                                    option_3='c', option_4='d', correct_option=1)
+
+    def tearDown(self):
+        wait_for_tasks()
+
+    def counters(self):
+        course = Course.objects.get(id=self.course.id)
+        return (course.total_modules, course.total_chapters, course.total_quizzes,
+                course.next_chapter_ordinal, course.next_quiz_ordinal)
+
+    def test_ordinals_are_assigned_per_course(self):
+        self.assertEqual(self.counters(), (2, 4, 8, 4, 8))
+        self.assertEqual(sorted(Chapter.objects.values_list('ordinal', flat=True)), [0, 1, 2, 3])
+        self.assertEqual(sorted(Quiz.objects.values_list('ordinal', flat=True)), list(range(8)))
+
+    def test_delete_chapter(self):
+        deleted = delete_content(chapter_ids=[self.chapters[0].id])
+        self.assertEqual(deleted, {'courses': 0, 'modules': 0, 'chapters': 1, 'quizzes': 2})
+        self.assertEqual(self.counters(), (2, 3, 6, 4, 8))
+        self.assertEqual(Module.objects.get(id=self.modules[0].id).total_chapters, 1)
+        self.assertEqual(compute_counter_drift(), {'course': {}, 'module': {}})
+
+    def test_delete_module(self):
+        deleted = delete_content(module_ids=[self.modules[1].id])
+        self.assertEqual(deleted, {'courses': 0, 'modules': 1, 'chapters': 2, 'quizzes': 4})
+        self.assertEqual(self.counters(), (1, 2, 4, 4, 8))
+        self.assertEqual(compute_counter_drift(), {'course': {}, 'module': {}})
+
+    def test_ordinals_of_deleted_content_are_not_reused(self):
+        delete_content(chapter_ids=[self.chapters[-1].id])
+        chapter = Chapter.objects.create(module=self.modules[0], chapter_name='new', video='chapter_videos/n.mp4')
+        quiz = Quiz.objects.create(chapter=chapter, question='q', option_1='a', option_2='b',
+                                   option_3='c', option_4='d', correct_option=1)
+        self.assertEqual((chapter.ordinal, quiz.ordinal), (4, 8))
+        self.assertEqual(self.counters(), (2, 4, 7, 5, 9))
+
+    def test_delete_course(self):
+        deleted = delete_content(course_ids=[self.course.id])
+        self.assertEqual(deleted, {'courses': 1, 'modules': 2, 'chapters': 4, 'quizzes': 8})
+        self.assertFalse(Course.objects.filter(id=self.course.id).exists())
+        self.assertFalse(Quiz.objects.exists())
+
+
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        for email, full_name, phone_number in [
+            ('asha@example.com', 'Asha  K Rao', '+91 98765-43210'),
+            ('ravi@example.com', 'Ravi Kumar', '9123456780'),
+        ]:
+            user = User.objects.create_user(email, 'password')
+            Student.objects.create(user=user, full_name=full_name, phone_number=phone_number)
+        admin = User.objects.create_user('admin@example.com', 'password', role='ADMIN')
+        Student.objects.create(user=admin, full_name='Asha Admin')
+
+    def search(self, query):
+        response = APIClient().get(reverse('student-list'), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['email'] for row in response.data['results']]
+
+    def test_search_keys_are_stored_as_arrays(self):
+        student = Student.objects.get(user__email='asha@example.com')
+        self.assertEqual(student.search_name_keys, ['asha k rao', 'k rao', 'rao'])
+        self.assertEqual(student.search_phone_keys, ['919876543210', '9876543210'])
+
+    def test_name_prefix_of_any_word(self):
+        self.assertEqual(self.search('asha'), ['asha@example.com'])
+        self.assertEqual(self.search('RAO'), ['asha@example.com'])
+        self.assertEqual(self.search('k r'), ['asha@example.com'])
+        self.assertEqual(self.search('kum'), ['ravi@example.com'])
+        self.assertEqual(self.search('sha'), [])
+        self.assertEqual(self.search('a.ha'), [])  # regex syntax is matched literally
+
+    def test_email(self):
+        self.assertEqual(self.search('Ravi@Example.com'), ['ravi@example.com'])
+        self.assertEqual(self.search('ravi@'), ['ravi@example.com'])
+
+    def test_phone_prefix_with_or_without_country_code(self):
+        self.assertEqual(self.search('98765'), ['asha@example.com'])
+        self.assertEqual(self.search('+91 9876'), ['asha@example.com'])
+        self.assertEqual(self.search('912'), ['ravi@example.com'])
+
+
+class AnswerKeyTests(TestCase):
+    def setUp(self):
+        course = Course.objects.create(
+            thumbnail='course_thumbnails/t.jpg', name='Course', description='d', category='c', price_inr=100,
+        )
+        module = Module.objects.create(course=course, module_name='m')
+        self.chapters = [
+            Chapter.objects.create(module=module, chapter_name=f'c{i}', video='chapter_videos/v.mp4') for i in range(2)
+        ]
+        self.quizzes = [
+            Quiz.objects.create(chapter=self.chapters[0], question=f'q{i}', option_1='a', option_2='b',
+                                option_3='c', option_4='d', correct_option=i + 1)
+            for i in range(3)
+        ]
+        self.mock_test = MockTest.objects.create(heading='h', description='d', image='mock_tests/m.jpg')
+        # stands in for the cache of another worker, which local writes do not evict
+        self.cache = AnswerKeyCache(ttl=300)
+
+    def tearDown(self):
+        wait_for_tasks()
+
+    def test_grade(self):
+        answer_key = self.cache.chapter(self.chapters[0].id)
+        quiz_ids = [quiz.id for quiz in reversed(self.quizzes)]
+        self.assertEqual(answer_key.grade(quiz_ids, [3, 1, 1]).tolist(), [True, False, True])
+        self.assertEqual(answer_key.correct_option(self.quizzes[1].id), (2, 'b'))
+
+    def test_edit_through_another_worker_is_graded_at_once(self):
+        quiz = self.quizzes[0]
+        self.assertEqual(self.cache.chapter(quiz.chapter_id).correct_option(quiz.id), (1, 'a'))
+        quiz.correct_option = 4
+        quiz.save()
+        self.assertEqual(self.cache.chapter(quiz.chapter_id).correct_option(quiz.id), (4, 'd'))
+
+    def test_moved_quiz_is_found_in_its_new_chapter(self):
+        quiz = self.quizzes[0]
+        self.assertIn(quiz.id, self.cache.quiz(quiz.id)[0].quiz_id_set)
+        quiz.chapter = self.chapters[1]
+        quiz.save()
+        answer_key, _ = self.cache.quiz(quiz.id)
+        self.assertEqual(answer_key.quiz_id_set, {quiz.id})
+        self.assertNotIn(quiz.id, self.cache.chapter(self.chapters[0].id).quiz_id_set)
+
+    def test_missing_quiz(self):
+        self.assertIsNone(self.cache.quiz(self.quizzes[-1].id + 1000))
+        self.assertIsNone(self.cache.chapter(self.chapters[-1].id + 1000))
+
+    def test_new_mock_test_question_is_part_of_the_key(self):
+        self.assertEqual(len(self.cache.mock_test(self.mock_test.id)), 0)
+        question = MockTestQuiz.objects.create(mock_test=self.mock_test, question='q', option_1='a', option_2='b',
+                                               option_3='c', option_4='d', correct_option=3)
+        version = MockTest.objects.get(id=self.mock_test.id).quiz_version
+        self.assertEqual(self.cache.mock_test(self.mock_test.id, version).quiz_id_set, {question.id})
+
+    def test_stale_instance_does_not_reset_the_version(self):
+        chapter = self.chapters[0]
+        version = Chapter.objects.get(id=chapter.id).quiz_version
+        self.assertGreater(version, chapter.quiz_version)
+        chapter.chapter_name = 'renamed'
+        chapter.save()
+        self.assertEqual(Chapter.objects.get(id=chapter.id).quiz_version, version)
+
+
+class CoursePackageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.author = Author.objects.create(
+            name='Author', domain='Robotics', profile_picture=SimpleUploadedFile('a.jpg', b'picture'),
+        )
+        self.course = Course.objects.create(
+            thumbnail=SimpleUploadedFile('t.jpg', b'thumbnail'), name='Course', description='d', category='c',
+            price_inr=100, author=self.author, recommended=True, position=1,
+        )
+        module = Module.objects.create(course=self.course, module_name='m')
+        chapter = Chapter.objects.create(module=module, chapter_name='c', video=SimpleUploadedFile('v.mp4', b'video'))
+        for i in range(2):
+            Quiz.objects.create(chapter=chapter, question=f'q{i}', option_1='a', option_2='b',
+                                option_3='c', option_4='d', correct_option=i + 1)
+
+    def tearDown(self):
+        wait_for_tasks()
+
+    def export(self):
+        return b''.join(stream_course_package(self.course.id))
+
+    def tree(self, course):
+        return [
+            (module.module_name, [
+                (chapter.chapter_name, chapter.video.read(),
+                 list(chapter.quizzes.order_by('id').values_list('question', 'correct_option')))
+                for chapter in module.chapters.order_by('id')
+            ])
+            for module in course.modules.order_by('id')
+        ]
+
+    def test_round_trip(self):
+        course, author_reused = import_course_package(SimpleUploadedFile('course.zip', self.export()))
+        self.assertNotEqual(course.id, self.course.id)
+        self.assertTrue(author_reused)
+        self.assertEqual(course.author_id, self.author.id)
+        self.assertEqual((course.name, course.recommended, course.position), ('Course', False, None))
+        self.assertEqual(course.thumbnail.read(), b'thumbnail')
+        self.assertEqual(self.tree(course), self.tree(self.course))
+        self.assertEqual((course.total_modules, course.total_chapters, course.total_quizzes), (1, 1, 2))
+        self.assertEqual(MediaUpload.objects.count(), 3)
+
+        # importing again reuses the uploads by checksum
+        import_course_package(SimpleUploadedFile('course.zip', self.export()))
+        self.assertEqual(MediaUpload.objects.count(), 3)
+
+    def test_author_with_another_profile_is_not_reused(self):
+        package = self.export()
+        Author.objects.filter(id=self.author.id).update(domain='Agriculture')
+        course, author_reused = import_course_package(SimpleUploadedFile('course.zip', package))
+        self.assertFalse(author_reused)
+        self.assertNotEqual(course.author_id, self.author.id)
+        self.assertEqual((course.author.name, course.author.domain), ('Author', 'Robotics'))
+        self.assertEqual(course.author.profile_picture.read(), b'picture')
+
+    def test_failed_import_removes_what_it_created(self):
+        package = self.export()
+        Author.objects.filter(id=self.author.id).update(domain='Agriculture')
+        with mock.patch('admin_panel.bulk.insert_course_tree', side_effect=RuntimeError('insert failed')):
+            with self.assertRaises(RuntimeError):
+                import_course_package(SimpleUploadedFile('course.zip', package))
+        self.assertEqual(Author.objects.count(), 1)
+        self.assertEqual(Course.objects.count(), 1)
+        self.assertFalse(MediaUpload.objects.exists())
+        self.assertEqual(default_storage.listdir('uploads')[1], [])
+
+    def test_checksum_mismatch_removes_earlier_media(self):
+        with zipfile.ZipFile(io.BytesIO(self.export())) as source:
+            entries = {name: source.read(name) for name in source.namelist()}
+        video = json.loads(entries[MANIFEST_NAME])['course']['modules'][0]['chapters'][0]['video']
+        entries[video] = b'tampered'
+        package = io.BytesIO()
+        with zipfile.ZipFile(package, 'w') as target:
+            for name, data in entries.items():
+                target.writestr(name, data)
+        with self.assertRaisesMessage(PackageError, 'Checksum mismatch'):
+            import_course_package(SimpleUploadedFile('course.zip', package.getvalue()))
+        self.assertFalse(MediaUpload.objects.exists())
+        self.assertEqual(default_storage.listdir('uploads')[1], [])
+
+    def test_missing_media_fails_the_export(self):
+        default_storage.delete(self.course.thumbnail.name)
+        with self.assertRaisesMessage(PackageError, 'missing from storage'):
+            stream_course_package(self.course.id)
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        course_index.invalidate()
+        self.courses = {
+            name: Course.objects.create(name=name, description=description, category=category, price_inr=0)
+            for name, description, category in (
+                ('Arduino Robotics', 'Build a line follower', 'Electronics'),
+                ('Python Programming', 'Program sensors for robotics projects', 'Software'),
+                ('Drone Basics', 'Fly and tune a quadcopter', 'Aerial'),
+            )
+        }
+
+    def search(self, query):
+        response = APIClient().get(reverse('course-search'), {'query': query})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [course['name'] for course in response.data['results']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('robotics'), ['Arduino Robotics', 'Python Programming'])
+        self.assertEqual(self.search('the sensor'), ['Python Programming'])
+        self.assertEqual(self.search('programming'), ['Python Programming'])
+
+    def test_saved_courses_are_indexed_at_once(self):
+        course = self.courses['Drone Basics']
+        course.name = 'Aerial Robotics'
+        course.save()
+        self.assertIn('Aerial Robotics', self.search('robotics'))
+        self.assertEqual(self.search('drone'), [])
+
+    def test_writes_elsewhere_show_up_after_the_ttl(self):
+        self.assertEqual(self.search('python'), ['Python Programming'])
+        # changes that skip this process's save hooks, as ones made through another worker do
+        Course.objects.filter(id=self.courses['Drone Basics'].id).update(name='Quadrotor Basics')
+        Course.objects.filter(id=self.courses['Python Programming'].id).delete()
+        self.assertEqual(self.search('quadrotor'), [])
+        later = time.monotonic() + 3600
+        with mock.patch('admin_panel.search.time.monotonic', return_value=later):
+            self.assertEqual(self.search('quadrotor'), ['Quadrotor Basics'])
+
+    def test_a_deleted_course_in_the_results_rebuilds_the_index(self):
+        self.assertEqual(len(self.search('robotics')), 2)
+        Course.objects.filter(id=self.courses['Python Programming'].id).delete()
+        Course.objects.filter(id=self.courses['Drone Basics'].id).update(name='Quadrotor Basics')
+        self.assertEqual(self.search('robotics'), ['Arduino Robotics'])
+        self.assertEqual(self.search('quadrotor'), ['Quadrotor Basics'])
+
+
+class CourseAutocompleteTests(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name='Robin Shaw', domain='Robotics')
+        for name in ('Arduino Robotics', 'Robotics Kit'):
+            Course.objects.create(name=name, description='d', category='Electronics', price_inr=0, author=author)
+
+    def complete(self, prefix, **params):
+        response = APIClient().get(reverse('course-autocomplete'), {'q': prefix, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(suggestion['type'], suggestion['text']) for suggestion in response.data['suggestions']]
+
+    def test_leading_matches_come_before_inner_word_matches(self):
+        self.assertEqual(self.complete('rob'), [
+            ('course', 'Robotics Kit'), ('author', 'Robin Shaw'), ('course', 'Arduino Robotics'),
+        ])
+        self.assertEqual(self.complete('ROBOTICS K'), [('course', 'Robotics Kit')])
+        self.assertEqual(self.complete('elec'), [('category', 'Electronics')])
+        self.assertEqual(self.complete('rob', limit=1), [('course', 'Robotics Kit')])
+        self.assertEqual(self.complete('  '), [])
+
+    def test_new_courses_complete_at_once(self):
+        self.assertEqual(self.complete('drone'), [])
+        Course.objects.create(name='Drone Racing', description='d', category='Aerial', price_inr=0)
+        self.assertEqual(self.complete('drone'), [('course', 'Drone Racing')])
+
+
+class CourseContentSearchTests(TestCase):
+    def setUp(self):
+        content_index.invalidate()
+        self.course = Course.objects.create(name='Robotics', description='d', category='c', price_inr=0)
+        self.module = Module.objects.create(course=self.course, module_name='Motor control')
+        self.chapter = Chapter.objects.create(module=self.module, chapter_name='PWM signals',
+                                              chapter_description='Duty cycles', video='chapter_videos/0.mp4')
+        self.quiz = Quiz.objects.create(chapter=self.chapter, question='What does PWM stand for?', option_1='a',
+                                        option_2='b', option_3='c', option_4='d', correct_option=1)
+        other = Course.objects.create(name='Other', description='d', category='c', price_inr=0)
+        Module.objects.create(course=other, module_name='Motor drivers')
+
+    def tearDown(self):
+        wait_for_tasks()
+
+    def search(self, query):
+        response = APIClient().get(reverse('course-content-search'), {'query': query})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['results']
+
+    def test_hits_are_grouped_per_course(self):
+        results = self.search('pwm')
+        self.assertEqual([result['course_id'] for result in results], [self.course.id])
+        hits = [(hit['type'], hit['id'], hit['chapter_id']) for hit in results[0]['hits']]
+        self.assertEqual(hits, [('chapter', self.chapter.id, self.chapter.id), ('quiz', self.quiz.id, self.chapter.id)])
+        link = reverse('video-access', kwargs={'course_id': self.course.id, 'chapter_id': self.chapter.id})
+        self.assertEqual(results[0]['hits'][0]['link'], link)
+
+        self.assertEqual(len(self.search('motor')), 2)
+        self.assertEqual(self.search('duty')[0]['hits'][0]['id'], self.chapter.id)
+
+    def test_deleted_content_leaves_the_index(self):
+        self.search('pwm')
+        self.quiz.delete()
+        self.assertEqual([hit['type'] for hit in self.search('pwm')[0]['hits']], ['chapter'])
+        self.module.delete()
+        self.assertEqual(self.search('pwm'), [])
+        self.assertEqual(len(self.search('motor')), 1)
+
+
+class TrigramTests(SimpleTestCase):
+    def test_similar_terms_are_ranked_by_jaccard_similarity(self):
+        index = TrigramIndex()
+        for term in ('arduino', 'android', 'robot'):
+            index.add(term)
+        matches = index.similar('arduno')
+        self.assertEqual([term for term, _ in matches], ['arduino'])
+        self.assertGreaterEqual(matches[0][1], 0.3)
+        index.discard('arduino')
+        self.assertEqual(index.similar('arduno'), [])
+
+    def test_fuzzy_search_matches_misspelled_terms(self):
+        index = InvertedIndex({'name': 1.0}, fuzzy=True)
+        index.add(1, {'name': 'Arduino basics'})
+        index.add(2, {'name': 'Robot kinematics'})
+        self.assertEqual(index.search('arduno'), [])
+        self.assertEqual([doc_id for doc_id, _ in index.fuzzy_search('arduno')], [1])
+        self.assertEqual([doc_id for doc_id, _ in index.fuzzy_search('robt kinematic')], [2])
+
+
+class CourseSearchFallbackTests(TestCase):
+    def setUp(self):
+        course_index.invalidate()
+        for name in ('Arduino Robotics', 'Arduino Sensors', 'Drone Basics'):
+            Course.objects.create(name=name, description='d', category='c', price_inr=0)
+
+    def search(self, query):
+        response = APIClient().get(reverse('course-search'), {'query': query})
+        return [course['name'] for course in response.data['results']]
+
+    def test_typos_fall_back_to_fuzzy_matches(self):
+        self.assertEqual(sorted(self.search('arduno')), ['Arduino Robotics', 'Arduino Sensors'])
+
+    def test_exact_hits_come_before_fuzzy_ones(self):
+        self.assertEqual(self.search('sensors ardino'), ['Arduino Sensors', 'Arduino Robotics'])
@@ -4,12 +4,14 @@ from .views import (
     GalleryImageUploadView, GalleryImageListView, GalleryImageDeleteView,
     CourseCreateView, ModuleCreateView, ChapterCreateView, QuizCreateView,
     CourseListView, CourseDetailView, ModuleDetailView, ChapterDetailView, QuizDetailView,
-    RecommendedCoursesView, RecommendCourseView, CourseUpdateView, ModuleDeleteView,
+    RecommendedCoursesView, RecommendCourseView, RecommendedCourseOrderView, CourseUpdateView, ModuleDeleteView,
     ChapterUpdateView, ChapterDeleteView, QuizUpdateView, QuizDeleteView, CourseDeleteView,
     EventCreateView, EventListView, EventDeleteView, MockTestCreateView, MockTestListView, MockTestDeleteView,
     MockTestQuizCreateView, MockTestQuizDeleteView, CourseMetaAPIView, StudentListView, StudentDetailView,
     AuthorCreateView, AuthorListView, AuthorDetailView, AuthorUpdateView, AuthorByCourseView,
-    CourseSearchView,
+    CourseSearchView, CourseAutocompleteView, CourseContentSearchView, MediaUploadView, CourseTreeCreateView,
+    CourseCloneView, CourseExportView, CourseImportView, QuizImportView, MockTestQuizImportView,
+    AnalyticsOverviewView, CourseAnalyticsView,
 )
 
 urlpatterns = [
@@ -20,16 +22,23 @@ urlpatterns = [
     path('gallery/upload/', GalleryImageUploadView.as_view(), name='gallery-upload'),
     path('gallery/', GalleryImageListView.as_view(), name='gallery-list'),
     path('gallery/<int:pk>/', GalleryImageDeleteView.as_view(), name='gallery-delete'),
+    path('uploads/', MediaUploadView.as_view(), name='media-upload-file'),
     path('courses/create/', CourseCreateView.as_view(), name='course-create'),
+    path('courses/create/tree/', CourseTreeCreateView.as_view(), name='course-tree-create'),
+    path('courses/import/', CourseImportView.as_view(), name='course-import'),
+    path('courses/<int:course_id>/clone/', CourseCloneView.as_view(), name='course-clone'),
+    path('courses/<int:course_id>/export/', CourseExportView.as_view(), name='course-export'),
     path('courses/', CourseListView.as_view(), name='course-list'),
     path('courses/<int:id>/', CourseDetailView.as_view(), name='course-detail'),
     path('courses/recommended/', RecommendedCoursesView.as_view(), name='recommended-courses'),
+    path('courses/recommended/order/', RecommendedCourseOrderView.as_view(), name='recommended-course-order'),
     path('courses/<int:course_id>/recommend/', RecommendCourseView.as_view(), name='recommend-course'),
     path('courses/<int:course_id>/modules/create/', ModuleCreateView.as_view(), name='module-create'),
     path('modules/<int:id>/', ModuleDetailView.as_view(), name='module-detail'),
     path('modules/<int:module_id>/chapters/create/', ChapterCreateView.as_view(), name='chapter-create'),
     path('chapters/<int:id>/', ChapterDetailView.as_view(), name='chapter-detail'),
     path('chapters/<int:chapter_id>/quizzes/create/', QuizCreateView.as_view(), name='quiz-create'),
+    path('chapters/<int:chapter_id>/quizzes/import/', QuizImportView.as_view(), name='quiz-import'),
     path('quizzes/<int:id>/', QuizDetailView.as_view(), name='quiz-detail'),
     path('courses/<int:id>/update/', CourseUpdateView.as_view(), name='course-update'),
     path('modules/<int:id>/delete/', ModuleDeleteView.as_view(), name='module-delete'),
@@ -45,6 +54,7 @@ urlpatterns = [
     path('mocktests/', MockTestListView.as_view(), name='mocktest-list'),
     path('mocktests/<int:id>/delete/', MockTestDeleteView.as_view(), name='mocktest-delete'),
     path('mocktests/<int:mock_test>/quizzes/create/', MockTestQuizCreateView.as_view(), name='mocktest-quiz-create'),
+    path('mocktests/<int:mock_test>/quizzes/import/', MockTestQuizImportView.as_view(), name='mocktest-quiz-import'),
     path('mocktests/quizzes/<int:id>/delete/', MockTestQuizDeleteView.as_view(), name='mocktest-quiz-delete'),
     path('course-meta/<int:id>/', CourseMetaAPIView.as_view(), name='course-meta'),
     path('students/', StudentListView.as_view(), name='student-list'),
@@ -55,4 +65,8 @@ urlpatterns = [
     path('authors/<int:id>/update/', AuthorUpdateView.as_view(), name='author-update'),
     path('courses/<int:course_id>/author/', AuthorByCourseView.as_view(), name='author-by-course'),
     path('courses/search/', CourseSearchView.as_view(), name='course-search'),
+    path('courses/search/content/', CourseContentSearchView.as_view(), name='course-content-search'),
+    path('courses/autocomplete/', CourseAutocompleteView.as_view(), name='course-autocomplete'),
+    path('analytics/courses/', AnalyticsOverviewView.as_view(), name='analytics-overview'),
+    path('analytics/courses/<int:course_id>/', CourseAnalyticsView.as_view(), name='course-analytics'),
 ]
\ No newline at end of file
@@ -1,20 +1,30 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework import generics, status
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework import generics, serializers, status
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.generics import ListAPIView
 from django.contrib.auth import authenticate
 from django.db.models import Q
+from django.urls import reverse
+from django.http import StreamingHttpResponse
 from rest_framework import permissions
 from rest_framework_simplejwt.tokens import RefreshToken
 from student.models import Student
 from .models import Course, Author
 from .utils import get_video_duration
+from .pagination import StandardResultsPagination
+from .media import file_checksum, remove_file_if_unreferenced
+from .bulk import insert_course_tree, clone_course, apply_recommended_order, insert_chapter_quizzes, insert_mock_test_quizzes
+from .question_import import QuestionImportError, read_question_bank
+from .packages import PackageError, import_course_package, stream_course_package
+from .search import course_index, completion_index, content_index
+from .analytics import chapter_quiz_accuracy, course_summaries, daily_active_learners, rollup_watermark
 from .models import (
     User,
     LandingMedia,
     GalleryImage,
+    MediaUpload,
     Course,
     Module,
     Chapter,
@@ -27,7 +37,9 @@ from .models import (
 from .serializers import (
     LandingMediaSerializer,
     GalleryImageSerializer,
+    MediaUploadSerializer,
     CourseSerializer,
+    CourseTreeSerializer,
     ModuleSerializer,
     ChapterSerializer,
     QuizSerializer,
@@ -39,6 +51,7 @@ from .serializers import (
     StudentDetailSerializer,
 )
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -100,8 +113,7 @@ class AuthorUpdateView(generics.UpdateAPIView):
         author = self.get_object()
         new_profile_picture = self.request.FILES.get('profile_picture')
         if new_profile_picture and author.profile_picture:
-            if os.path.isfile(author.profile_picture.path):
-                os.remove(author.profile_picture.path)
+            remove_file_if_unreferenced(author.profile_picture, owner=author)
         serializer.save()
 
     def update(self, request, *args, **kwargs):
@@ -193,6 +205,31 @@ class GalleryImageDeleteView(APIView):
         except GalleryImage.DoesNotExist:
             return Response({"error": "Image not found"}, status=status.HTTP_404_NOT_FOUND)
 
+class MediaUploadView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        file = request.FILES.get('file')
+        if not file:
+            return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        checksum = file_checksum(file)
+        upload = MediaUpload.objects.filter(checksum=checksum).first()
+        if upload:
+            serializer = MediaUploadSerializer(upload, context={'request': request})
+            return Response({
+                "message": "File already uploaded",
+                "data": serializer.data
+            }, status=status.HTTP_200_OK)
+
+        upload = MediaUpload.objects.create(file=file, checksum=checksum)
+        serializer = MediaUploadSerializer(upload, context={'request': request})
+        return Response({
+            "message": "File uploaded successfully",
+            "data": serializer.data
+        }, status=status.HTTP_201_CREATED)
+
 class CourseCreateView(generics.CreateAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
@@ -209,6 +246,97 @@ class CourseCreateView(generics.CreateAPIView):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED, headers=headers)
 
+class CourseTreeCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CourseTreeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course_data = dict(serializer.validated_data)
+        modules_data = course_data.pop('modules')
+
+        try:
+            course = insert_course_tree(course_data, modules_data)
+        except Exception as e:
+            logger.error(f"Error creating course tree: {e}")
+            return Response({"error": "Failed to create course"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        course = (
+            Course.objects.select_related('author')
+            .prefetch_related('modules__chapters__quizzes')
+            .get(id=course.id)
+        )
+        return Response({
+            "message": "Course created successfully",
+            "data": CourseSerializer(course, context={'request': request}).data
+        }, status=status.HTTP_201_CREATED)
+
+class CourseCloneView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_id):
+        if not Course.objects.filter(id=course_id).exists():
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        name = request.data.get('name')
+        if name is not None and (not isinstance(name, str) or not name.strip()):
+            return Response({"error": "Name must be a non-empty string"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            course = clone_course(course_id, name=name.strip() if name else None)
+        except Exception as e:
+            logger.error(f"Error cloning course {course_id}: {e}")
+            return Response({"error": "Failed to clone course"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            "message": "Course cloned successfully",
+            "data": {"id": course.id, "name": course.name}
+        }, status=status.HTTP_201_CREATED)
+
+class CourseExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, course_id):
+        try:
+            chunks = stream_course_package(course_id)
+        except Course.DoesNotExist:
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        except PackageError as e:
+            logger.error(f"Cannot export course {course_id}: {e}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        response = StreamingHttpResponse(chunks, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="course-{course_id}.zip"'
+        return response
+
+class CourseImportView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        package = request.FILES.get('package')
+        if not package:
+            return Response({"error": "No package provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            course, author_reused = import_course_package(package)
+        except PackageError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except serializers.ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error importing course package: {e}")
+            return Response({"error": "Failed to import course"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            "message": "Course imported successfully",
+            "data": {
+                "id": course.id,
+                "name": course.name,
+                "author_id": course.author_id,
+                # an existing author with the same profile was used; the packaged one was not copied
+                "author_reused": author_reused,
+            }
+        }, status=status.HTTP_201_CREATED)
+
 class CourseListView(generics.ListAPIView):
     queryset = Course.objects.prefetch_related('modules__chapters__quizzes', 'author').all()
     serializer_class = CourseSerializer
@@ -301,6 +429,40 @@ class QuizCreateView(generics.CreateAPIView):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED, headers=headers)
 
+class QuestionImportMixin:
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    permission_classes = [IsAuthenticated]
+
+    def read_rows(self, request):
+        """Returns (rows, error response); rows are only returned when every row is valid."""
+        try:
+            rows, errors = read_question_bank(request)
+        except QuestionImportError as e:
+            return None, Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if errors:
+            return None, Response({
+                "error": f"{len(errors)} row(s) failed validation, nothing was imported",
+                "rows": errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not rows:
+            return None, Response({"error": "No questions provided"}, status=status.HTTP_400_BAD_REQUEST)
+        return rows, None
+
+class QuizImportView(QuestionImportMixin, APIView):
+    def post(self, request, chapter_id):
+        try:
+            chapter = Chapter.objects.select_related('module').get(id=chapter_id)
+        except Chapter.DoesNotExist:
+            return Response({"error": "Chapter not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        rows, error_response = self.read_rows(request)
+        if error_response:
+            return error_response
+        quizzes = insert_chapter_quizzes(chapter, rows)
+        return Response({
+            "message": f"{len(quizzes)} quiz(zes) imported successfully"
+        }, status=status.HTTP_201_CREATED)
+
 class QuizDetailView(generics.RetrieveAPIView):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
@@ -337,13 +499,35 @@ class RecommendCourseView(APIView):
         else:
             course.position = None
 
-        course.save()
+        course.save(update_fields=['recommended', 'position'])
         serializer = CourseSerializer(course)
         return Response({
             "message": "Course recommendation updated successfully",
             "data": serializer.data
         }, status=status.HTTP_200_OK)
 
+class RecommendedCourseOrderView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request):
+        course_ids = request.data.get('course_ids')
+        if not isinstance(course_ids, list) or not all(
+                isinstance(course_id, int) and not isinstance(course_id, bool) for course_id in course_ids):
+            return Response({"error": "course_ids must be a list of course ids"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set(course_ids)) != len(course_ids):
+            return Response({"error": "course_ids must not contain duplicates"}, status=status.HTTP_400_BAD_REQUEST)
+
+        existing = set(Course.objects.filter(id__in=course_ids).values_list('id', flat=True))
+        missing = [course_id for course_id in course_ids if course_id not in existing]
+        if missing:
+            return Response({"error": f"Courses not found: {missing}"}, status=status.HTTP_404_NOT_FOUND)
+
+        apply_recommended_order(course_ids)
+        return Response({
+            "message": "Recommended course order updated successfully",
+            "data": [{"id": course_id, "position": position} for position, course_id in enumerate(course_ids, start=1)]
+        }, status=status.HTTP_200_OK)
+
 class CourseUpdateView(generics.UpdateAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
@@ -355,8 +539,7 @@ class CourseUpdateView(generics.UpdateAPIView):
         course = self.get_object()
         new_thumbnail = self.request.FILES.get('thumbnail')
         if new_thumbnail and course.thumbnail:
-            if os.path.isfile(course.thumbnail.path):
-                os.remove(course.thumbnail.path)
+            remove_file_if_unreferenced(course.thumbnail, owner=course)
         serializer.save()
 
     def update(self, request, *args, **kwargs):
@@ -392,8 +575,7 @@ class ChapterUpdateView(generics.UpdateAPIView):
         chapter = self.get_object()
         new_video = self.request.FILES.get('video')
         if new_video and chapter.video:
-            if os.path.isfile(chapter.video.path):
-                os.remove(chapter.video.path)
+            remove_file_if_unreferenced(chapter.video, owner=chapter)
         serializer.save()
 
     def update(self, request, *args, **kwargs):
@@ -460,19 +642,67 @@ class CourseDeleteView(generics.DestroyAPIView):
 class CourseSearchView(ListAPIView):
     serializer_class = CourseSerializer
     permission_classes = [AllowAny]
+    pagination_class = StandardResultsPagination
+    FUZZY_FALLBACK_MIN_HITS = 3
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('query', '')
+        course_ids = [course_id for course_id, _ in course_index.search(query)] if query else []
+        if query and len(course_ids) < self.FUZZY_FALLBACK_MIN_HITS:
+            # Too few exact-term hits (often a typo): append typo-tolerant matches after them.
+            seen = set(course_ids)
+            course_ids.extend(course_id for course_id, _ in course_index.fuzzy_search(query) if course_id not in seen)
+        page = self.paginate_queryset(course_ids)
+        courses = Course.objects.select_related('author').prefetch_related('modules__chapters__quizzes').in_bulk(page)
+        if len(courses) < len(page):
+            # the index still has courses another worker deleted
+            course_index.invalidate()
+        serializer = self.get_serializer([courses[course_id] for course_id in page if course_id in courses], many=True)
+        return self.get_paginated_response(serializer.data)
+
+class CourseContentSearchView(ListAPIView):
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsPagination
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('query', '')
+        groups = content_index.search(query) if query else []
+        page = self.paginate_queryset(groups)
+        courses = {
+            course['id']: course
+            for course in Course.objects.filter(id__in=[group['course_id'] for group in page]).values('id', 'name')
+        }
+
+        results = []
+        for group in page:
+            course = courses.get(group['course_id'])
+            if course is None:
+                content_index.invalidate()
+                continue
+            hits = []
+            for hit in group['hits']:
+                link = None
+                if hit['chapter_id'] is not None:
+                    link = reverse('video-access', kwargs={'course_id': course['id'], 'chapter_id': hit['chapter_id']})
+                hits.append({**hit, 'link': link})
+            results.append({
+                'course_id': course['id'],
+                'course_name': course['name'],
+                'score': round(group['score'], 4),
+                'hits': hits,
+            })
+        return self.get_paginated_response(results)
+
+class CourseAutocompleteView(APIView):
+    permission_classes = [AllowAny]
 
-    def get_queryset(self):
-        query = self.request.query_params.get('query', '')
-        if query:
-            return Course.objects.select_related('author').filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(category__icontains=query) |
-                Q(price_inr__icontains=query) |
-                Q(offer_price__icontains=query) |
-                Q(author__name__icontains=query)
-            )
-        return Course.objects.none()
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 8)), 20)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        suggestions = completion_index.complete(request.query_params.get('q', ''), limit=max(limit, 1))
+        return Response({"suggestions": suggestions}, status=status.HTTP_200_OK)
 
 class EventCreateView(generics.CreateAPIView):
     queryset = Event.objects.all()
@@ -551,6 +781,21 @@ class MockTestQuizCreateView(generics.CreateAPIView):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED, headers=headers)
 
+class MockTestQuizImportView(QuestionImportMixin, APIView):
+    def post(self, request, mock_test):
+        try:
+            test = MockTest.objects.get(id=mock_test)
+        except MockTest.DoesNotExist:
+            return Response({"error": "Mock test not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        rows, error_response = self.read_rows(request)
+        if error_response:
+            return error_response
+        quizzes = insert_mock_test_quizzes(test, rows)
+        return Response({
+            "message": f"{len(quizzes)} mock test quiz(zes) imported successfully"
+        }, status=status.HTTP_201_CREATED)
+
 class MockTestQuizDeleteView(generics.DestroyAPIView):
     queryset = MockTestQuiz.objects.all()
     serializer_class = MockTestQuizSerializer
@@ -595,20 +840,105 @@ class CourseMetaAPIView(APIView):
         except Course.DoesNotExist:
             return Response({"error": "Course not found"}, status=404)
 
+class AnalyticsDaysMixin:
+    # Dashboards read the rollups built by `manage.py build_analytics`, never the activity collections
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 365
+
+    def get_days(self, request):
+        days = int(request.query_params.get('days', self.DEFAULT_DAYS))
+        return min(max(days, 1), self.MAX_DAYS)
+
+class AnalyticsOverviewView(AnalyticsDaysMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            days = self.get_days(request)
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        summaries = course_summaries()
+        names = dict(Course.objects.filter(id__in=list(summaries)).values_list('id', 'name'))
+        return Response({
+            "updated_until": rollup_watermark(),
+            "daily_active_learners": daily_active_learners(days=days),
+            "courses": [
+                {"course_id": course_id, "course_name": names.get(course_id), **summary}
+                for course_id, summary in sorted(summaries.items())
+            ],
+        })
+
+class CourseAnalyticsView(AnalyticsDaysMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, course_id):
+        try:
+            days = self.get_days(request)
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        course = Course.objects.filter(id=course_id).values('id', 'name').first()
+        if course is None:
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        summary = course_summaries([course_id]).get(course_id) or {
+            "enrolled": 0, "started": 0, "halfway": 0, "completed": 0, "average_progress": 0.0,
+        }
+        return Response({
+            "course_id": course['id'],
+            "course_name": course['name'],
+            "updated_until": rollup_watermark(),
+            "average_progress": summary.pop('average_progress'),
+            "funnel": summary,
+            "quiz_accuracy": chapter_quiz_accuracy(course_id, days=days),
+            "daily_active_learners": daily_active_learners(course_id, days=days),
+        })
+
+# djongo turns LIKE patterns into $regex without escaping regex syntax (Django only escapes
+# backslashes, % and _), so the other metacharacters are matched through character classes
+_REGEX_CHARS = re.compile(r'[.^$*+?()\[\]{}|]')
+
+
+def _literal_prefix(value):
+    return _REGEX_CHARS.sub(lambda match: '[\\^]' if match.group() == '^' else f'[{match.group()}]', value)
+
+
 class StudentListView(APIView):
     permission_classes = [AllowAny]
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
 
     def get(self, request):
-        students = User.objects.filter(role='STUDENT', student_profile__isnull=False)
-        
-        search_query = request.query_params.get('search', None)
+        try:
+            limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+            cursor = int(request.query_params.get('cursor', 0))
+        except ValueError:
+            return Response({"error": "limit and cursor must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(limit, 1)
+
+        students = Student.objects.filter(user__role='STUDENT', user_id__gt=cursor)
+
+        search_query = request.query_params.get('search', '').strip()
         if search_query:
-            students = students.filter(
-                student_profile__full_name__icontains=search_query
-            ) | students.filter(email__icontains=search_query)
-        
-        serializer = StudentListSerializer(students, many=True)
-        return Response(serializer.data)
+            email = Student.normalize_email(search_query)
+            if '@' in email and '.' in email.split('@', 1)[1]:
+                lookup = Q(search_email=email)
+            else:
+                lookup = (Q(search_name_keys__startswith=_literal_prefix(Student.normalize_name(search_query)))
+                          | Q(search_email__startswith=_literal_prefix(email)))
+                phone = Student.normalize_phone(search_query)
+                if phone and not search_query.strip('+0123456789 -()'):
+                    lookup |= Q(search_phone_keys__startswith=phone)
+            students = students.filter(lookup)
+
+        rows = list(
+            students.order_by('user_id')
+            .values('user_id', 'user__email', 'full_name', 'created_at', 'profile_picture')[:limit + 1]
+        )
+        next_cursor = rows[limit - 1]['user_id'] if len(rows) > limit else None
+        serializer = StudentListSerializer(rows[:limit], many=True)
+        return Response({
+            "results": serializer.data,
+            "next_cursor": next_cursor,
+        })
 
 class StudentDetailView(APIView):
     permission_classes = [AllowAny]
@@ -140,6 +140,37 @@ TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 
+# --- Course progress write-behind (student/buffers.py) ---
+# When enabled, progress updates are coalesced per (user, course) in memory and written in bulk
+# every PROGRESS_FLUSH_INTERVAL seconds; pending entries are flushed on exit and on SIGTERM but
+# are lost if the process is killed or crashes, so it is off by default. A batch that keeps
+# failing is dropped (with an error log) after PROGRESS_FLUSH_MAX_RETRIES flushes.
+PROGRESS_WRITE_BEHIND = os.getenv("PROGRESS_WRITE_BEHIND", "False") == "True"
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "2"))
+PROGRESS_BUFFER_MAX_ENTRIES = int(os.getenv("PROGRESS_BUFFER_MAX_ENTRIES", "5000"))
+PROGRESS_FLUSH_MAX_RETRIES = int(os.getenv("PROGRESS_FLUSH_MAX_RETRIES", "5"))
+
+# Video resume positions from playback heartbeats, coalesced the same way
+VIDEO_POSITION_FLUSH_INTERVAL = float(os.getenv("VIDEO_POSITION_FLUSH_INTERVAL", "10"))
+VIDEO_POSITION_BUFFER_MAX_ENTRIES = int(os.getenv("VIDEO_POSITION_BUFFER_MAX_ENTRIES", "20000"))
+
+# Seconds a cached answer key (admin_panel/answer_keys.py) may serve before it is reloaded;
+# edits evict it immediately in the worker that made them
+ANSWER_KEY_TTL = int(os.getenv("ANSWER_KEY_TTL", "300"))
+
+# Seconds a cached course content map (admin_panel/content_map.py) may serve before it is
+# reloaded; content changes evict it immediately in the worker that made them
+CONTENT_MAP_TTL = int(os.getenv("CONTENT_MAP_TTL", "60"))
+
+# Seconds the catalog caches (course search indexes, autocomplete, student facet index) may
+# serve before they are rebuilt; catalog writes update them immediately in the worker that
+# made them
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "60"))
+
+# --- Analytics rollups (admin_panel/analytics.py, `manage.py build_analytics`) ---
+# Activity newer than this many seconds is left for the next run so buffered writes can land
+ANALYTICS_LAG_SECONDS = int(os.getenv("ANALYTICS_LAG_SECONDS", "300"))
+
 # --- CORS ---
 CORS_ALLOW_ALL_ORIGINS = True  # Set to True only if needed
 
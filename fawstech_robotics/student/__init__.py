@@ -0,0 +1 @@
+default_app_config = 'student.apps.StudentConfig'
@@ -1,5 +1,15 @@
+import threading
 from django.apps import AppConfig
 
 
 class StudentConfig(AppConfig):
     name = 'student'
+
+    def ready(self):
+        # connects the progress recompute to admin_panel's course_content_changed signal
+        from . import recompute  # noqa: F401
+        from .buffers import install_sigterm_handler
+
+        # signal handlers can only be set from the main thread
+        if threading.current_thread() is threading.main_thread():
+            install_sigterm_handler()
@@ -0,0 +1,206 @@
+import atexit
+import logging
+import signal
+import threading
+from abc import ABC, abstractmethod
+from django.conf import settings
+from pymongo import UpdateOne
+from admin_panel import bitsets
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_upsert(model, key_fields, rows):
+    """
+    Persist {key tuple: field values} for `model` (a DjongoManager model) in bulk: one lookup
+    of the existing rows, one bulk_write of $set updates and one bulk_create for rows that do
+    not exist yet. Mongo upserts are not used because djongo assigns the integer `id`.
+    """
+    lookup = {
+        f'{field}__in': list({key[position] for key in rows})
+        for position, field in enumerate(key_fields)
+    }
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in model.objects.filter(**lookup).values_list('id', *key_fields)
+    }
+    updates, created = [], []
+    for key, values in rows.items():
+        if key in existing:
+            updates.append(UpdateOne({'id': existing[key]}, {'$set': values}))
+        else:
+            created.append(model(**dict(zip(key_fields, key)), **values))
+    if updates:
+        model.objects.mongo_bulk_write(updates, ordered=False)
+    if created:
+        model.objects.bulk_create(created)
+
+
+class CoalescingBuffer(ABC):
+    """
+    Write-behind buffer keeping only the latest value per key. A daemon thread flushes every
+    `interval` seconds, a flush is forced once `max_entries` keys are pending, and whatever is
+    left is written at interpreter exit or on SIGTERM (see install_sigterm_handler). Subclasses
+    implement write(entries) to persist a {key: value} batch in bulk; entries whose write fails
+    are put back unless a newer value arrived in the meantime, and dropped with an error once
+    they failed `max_retries` flushes in a row.
+    """
+
+    name = 'buffer'
+    _instances = []
+
+    def __init__(self, enabled, interval, max_entries, max_retries=5):
+        self.enabled = enabled
+        self.interval = interval
+        self.max_entries = max_entries
+        self.max_retries = max_retries
+        self._pending = {}
+        self._failures = {}  # key -> failed flushes in a row
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        if enabled:
+            atexit.register(self.shutdown)
+            CoalescingBuffer._instances.append(self)
+
+    def stage(self, key, value):
+        with self._lock:
+            self._pending[key] = value
+            full = len(self._pending) >= self.max_entries
+            self._ensure_thread()
+        if full:
+            self.flush()
+
+    def pending(self, key):
+        with self._lock:
+            return self._pending.get(key)
+
+    def flush(self, keys=None):
+        """Write pending entries (all of them, or only `keys`) and return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                if keys is None:
+                    entries, self._pending = self._pending, {}
+                else:
+                    entries = {key: self._pending.pop(key) for key in keys if key in self._pending}
+            if not entries:
+                return 0
+            try:
+                self.write(entries)
+            except Exception:
+                self._requeue(entries)
+                return 0
+            with self._lock:
+                for key in entries:
+                    self._failures.pop(key, None)
+            return len(entries)
+
+    def _requeue(self, entries):
+        dropped = 0
+        with self._lock:
+            for key, value in entries.items():
+                failures = self._failures.get(key, 0) + 1
+                if failures >= self.max_retries or self._stopped.is_set():
+                    self._failures.pop(key, None)
+                    dropped += key not in self._pending
+                    continue
+                self._failures[key] = failures
+                self._pending.setdefault(key, value)
+        if dropped:
+            logger.exception(f"Flushing {len(entries)} {self.name} entries failed, dropped {dropped} of them")
+        else:
+            logger.exception(f"Flushing {len(entries)} {self.name} entries failed, keeping them queued")
+
+    @abstractmethod
+    def write(self, entries):
+        """Persist a {key: value} batch."""
+
+    def shutdown(self):
+        self._stopped.set()
+        written = self.flush()
+        if written:
+            logger.info(f"Flushed {written} {self.name} entries at shutdown")
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+
+def install_sigterm_handler():
+    """
+    Flush every enabled buffer on SIGTERM, then hand over to the previous handler (or exit).
+    atexit alone is not enough: the default SIGTERM action ends the process without running
+    it. Must be called from the main thread (StudentConfig.ready).
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle(signum, frame):
+        for buffer in CoalescingBuffer._instances:
+            buffer.shutdown()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle)
+
+
+class ProgressBuffer(CoalescingBuffer):
+    """
+    Pending completion marks, {(user id, course id, kind, ordinal): completed}. Flushing
+    applies them as single-bit atomic updates (progress_store.apply_marks), so writers in
+    other processes never lose each other's completions.
+    """
+
+    name = 'progress'
+
+    def write(self, entries):
+        from admin_panel.content_map import content_map
+        from .progress_store import apply_marks
+        contents = content_map.get_many({key[1] for key in entries})
+        # marks for content deleted since they were staged are dropped
+        apply_marks({
+            key: completed for key, completed in entries.items()
+            if bitsets.contains(getattr(contents[key[1]], f'{key[2]}_mask'), key[3])
+        }, contents)
+
+    def pending_marks(self, user_id, course_ids):
+        with self._lock:
+            return {key: completed for key, completed in self._pending.items()
+                    if key[0] == user_id and key[1] in course_ids}
+
+    def flush_user(self, user_id):
+        with self._lock:
+            keys = [key for key in self._pending if key[0] == user_id]
+        return self.flush(keys)
+
+
+class VideoPositionBuffer(CoalescingBuffer):
+    """Latest playback position per (user id, chapter id); heartbeats only touch memory."""
+
+    name = 'video-position'
+
+    def write(self, entries):
+        from .models import VideoPosition
+        bulk_upsert(VideoPosition, ('user_id', 'chapter_id'), entries)
+
+
+progress_buffer = ProgressBuffer(
+    enabled=getattr(settings, 'PROGRESS_WRITE_BEHIND', False),
+    interval=getattr(settings, 'PROGRESS_FLUSH_INTERVAL', 2.0),
+    max_entries=getattr(settings, 'PROGRESS_BUFFER_MAX_ENTRIES', 5000),
+    max_retries=getattr(settings, 'PROGRESS_FLUSH_MAX_RETRIES', 5),
+)
+
+video_position_buffer = VideoPositionBuffer(
+    enabled=True,
+    interval=getattr(settings, 'VIDEO_POSITION_FLUSH_INTERVAL', 10.0),
+    max_entries=getattr(settings, 'VIDEO_POSITION_BUFFER_MAX_ENTRIES', 20000),
+    max_retries=getattr(settings, 'PROGRESS_FLUSH_MAX_RETRIES', 5),
+)
@@ -0,0 +1,198 @@
+import threading
+import logging
+from decimal import Decimal
+from admin_panel.catalog import catalog_version
+from admin_panel.media import store_video_durations
+from admin_panel.models import Course
+from admin_panel.tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('category', 'author', 'price_band', 'pricing')
+
+# (band, exclusive upper bound) applied to the effective price of paid courses
+PRICE_BANDS = (
+    ('under_500', Decimal('500')),
+    ('500_to_999', Decimal('1000')),
+    ('1000_to_2499', Decimal('2500')),
+    ('2500_and_above', None),
+)
+
+
+def to_decimal(value):
+    if value is None:
+        return None
+    if hasattr(value, 'to_decimal'):
+        return value.to_decimal()
+    return Decimal(str(value))
+
+
+def effective_price(course):
+    offer_price = to_decimal(course.offer_price)
+    return offer_price if offer_price is not None else to_decimal(course.price_inr)
+
+
+def price_band(price):
+    if price == 0:
+        return 'free'
+    for band, upper in PRICE_BANDS:
+        if upper is None or price < upper:
+            return band
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class _Snapshot:
+    def __init__(self, version):
+        self.version = version
+        self.rows = []
+        self.masks = {facet: {} for facet in FACETS}
+        self.labels = {facet: {} for facet in FACETS}
+        self.all_mask = 0
+        self.recommended_mask = 0
+        self.recommended_order = []
+
+
+class _RelativeUrls:
+    """Stands in for the request while the snapshot is serialized, so media URLs stay relative."""
+
+    @staticmethod
+    def build_absolute_uri(location):
+        return location
+
+
+def _absolute_urls(row, request):
+    row = dict(row)
+    if row.get('thumbnail'):
+        row['thumbnail'] = request.build_absolute_uri(row['thumbnail'])
+    author = row.get('author')
+    if author and author.get('profile_picture'):
+        row['author'] = {**author, 'profile_picture': request.build_absolute_uri(author['profile_picture'])}
+    return row
+
+
+class CourseFacetIndex:
+    """
+    In-memory faceted view of the student catalog. Every course gets a bit position and each
+    facet value keeps an int bitmask of its courses, so filtering is AND/OR over masks and
+    facet counts are popcounts. Serialized course rows are cached alongside, with relative
+    media URLs made absolute per request, so a query does not touch the database until the
+    catalog version moves (a catalog write in this process, or CATALOG_CACHE_TTL seconds)
+    and the snapshot is rebuilt. Durations come from stored chapter
+    values; videos not probed yet are handed to the background worker.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == catalog_version():
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != catalog_version():
+                self._snapshot = self._build()
+            return self._snapshot
+
+    def _build(self):
+        from .serializers import StudentCourseListSerializer
+
+        snapshot = _Snapshot(catalog_version())
+        courses = list(
+            Course.objects.select_related('author')
+            .prefetch_related('modules__chapters', 'author__courses')
+            .order_by('id')
+        )
+        snapshot.rows = StudentCourseListSerializer(courses, many=True, context={'request': _RelativeUrls()}).data
+        unprobed = [
+            chapter.id for course in courses for module in course.modules.all()
+            for chapter in module.chapters.all() if chapter.duration_minutes is None
+        ]
+        if unprobed:
+            enqueue(store_video_durations, unprobed)
+
+        recommended = []
+        for position, course in enumerate(courses):
+            bit = 1 << position
+            snapshot.all_mask |= bit
+            price = effective_price(course)
+            values = {
+                'category': (course.category, course.category),
+                'author': (str(course.author_id), course.author.name) if course.author else None,
+                'price_band': (price_band(price), price_band(price)),
+                'pricing': ('free', 'free') if price == 0 else ('paid', 'paid'),
+            }
+            for facet, value in values.items():
+                if value is None:
+                    continue
+                key, label = value
+                snapshot.masks[facet][key] = snapshot.masks[facet].get(key, 0) | bit
+                snapshot.labels[facet][key] = label
+            if course.recommended:
+                snapshot.recommended_mask |= bit
+                recommended.append((course.position is None, course.position or 0, position))
+
+        snapshot.recommended_order = [position for _, _, position in sorted(recommended)]
+        logger.info(f"Course facet index built with {len(courses)} courses")
+        return snapshot
+
+    def query(self, request, filters, recommended_only=False):
+        """
+        Return (rows, facets) for the catalog filtered by `filters` ({facet: set of values}).
+        Values are OR-ed within a facet and facets are AND-ed together; each facet's counts
+        are computed with every filter applied except its own.
+        """
+        snapshot = self.snapshot()
+        base = snapshot.recommended_mask if recommended_only else snapshot.all_mask
+
+        facet_masks = {}
+        for facet, selected in filters.items():
+            mask = 0
+            for value in selected:
+                mask |= snapshot.masks[facet].get(value, 0)
+            facet_masks[facet] = mask
+
+        def combined(exclude=None):
+            mask = base
+            for facet, facet_mask in facet_masks.items():
+                if facet != exclude:
+                    mask &= facet_mask
+            return mask
+
+        result = combined()
+        order = snapshot.recommended_order if recommended_only else range(len(snapshot.rows))
+        rows = [_absolute_urls(snapshot.rows[position], request) for position in order if result >> position & 1]
+
+        facets = {}
+        for facet in FACETS:
+            available = combined(exclude=facet)
+            selected = filters.get(facet, set())
+            entries = []
+            for value, mask in snapshot.masks[facet].items():
+                count = popcount(mask & available)
+                if count or value in selected:
+                    entries.append({
+                        'value': value,
+                        'label': snapshot.labels[facet][value],
+                        'count': count,
+                        'selected': value in selected,
+                    })
+            entries.sort(key=lambda entry: str(entry['label']).lower())
+            facets[facet] = entries
+        return rows, facets
+
+
+def parse_facet_filters(query_params):
+    """Read repeated query parameters (?category=a&category=b) for every facet."""
+    filters = {}
+    for facet in FACETS:
+        values = {value.strip() for value in query_params.getlist(facet) if value.strip()}
+        if values:
+            filters[facet] = values
+    return filters
+
+
+course_facets = CourseFacetIndex()
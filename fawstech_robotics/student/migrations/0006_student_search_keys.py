@@ -0,0 +1,52 @@
+# Generated by Django 3.1.12 on 2026-10-19 16:07
+
+from django.db import migrations, models
+from pymongo import UpdateOne
+
+BATCH_SIZE = 1000
+
+
+def _bulk_set(schema_editor, model, updates):
+    collection = schema_editor.connection.cursor().db_conn[model._meta.db_table]
+    operations = [UpdateOne({'id': pk}, {'$set': values}) for pk, values in updates]
+    for offset in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + BATCH_SIZE], ordered=False)
+
+
+def populate_search_keys(apps, schema_editor):
+    Student = apps.get_model('student', 'Student')
+    rows = Student.objects.values_list('id', 'full_name', 'user__email', 'phone_number')
+    _bulk_set(schema_editor, Student, [
+        (pk, {
+            'search_name': ' '.join((full_name or '').lower().split()),
+            'search_email': (email or '').strip().lower(),
+            'search_phone': ''.join(ch for ch in (phone_number or '') if ch.isdigit())[-10:],
+        })
+        for pk, full_name, email, phone_number in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0005_auto_20250426_1156'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_email',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='search_phone',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=15),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+    ]
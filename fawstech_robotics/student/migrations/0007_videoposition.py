@@ -0,0 +1,35 @@
+# Generated by Django 3.1.12 on 2026-10-19 16:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('admin_panel', '0017_course_total_modules'),
+        ('student', '0006_student_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoPosition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position_seconds', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_positions', to='admin_panel.chapter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_positions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='videoposition',
+            index=models.Index(fields=['user', 'chapter'], name='student_vid_user_id_3463b8_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='videoposition',
+            unique_together={('user', 'chapter')},
+        ),
+    ]
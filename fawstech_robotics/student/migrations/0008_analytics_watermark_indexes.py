@@ -0,0 +1,29 @@
+# Generated by Django 3.1.12 on 2026-10-19 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0007_videoposition'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseprogress',
+            index=models.Index(fields=['updated_at'], name='student_cou_updated_f16b93_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedcourse',
+            index=models.Index(fields=['purchased_at'], name='student_pur_purchas_d51efd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['attempted_at'], name='student_qui_attempt_7c4653_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoposition',
+            index=models.Index(fields=['updated_at'], name='student_vid_updated_695f72_idx'),
+        ),
+    ]
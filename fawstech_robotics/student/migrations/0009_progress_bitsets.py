@@ -0,0 +1,108 @@
+# Generated by Django 3.1.12 on 2026-10-19 16:26
+
+from collections import Counter
+from django.db import migrations, models
+import djongo.models.fields
+from pymongo import UpdateOne
+
+WORD_BITS = 32
+VIDEO_WEIGHT = 0.7
+QUIZ_WEIGHT = 0.3
+BATCH_SIZE = 1000
+
+
+def _bitset(ordinals):
+    bits = {}
+    for ordinal in ordinals:
+        key = str(ordinal // WORD_BITS)
+        bits[key] = bits.get(key, 0) | (1 << (ordinal % WORD_BITS))
+    return bits
+
+
+def compute_progress(completed_chapters, completed_quizzes, total_chapters, total_quizzes):
+    # same as student.progress.compute_progress()
+    if total_chapters + total_quizzes == 0:
+        return 0.0
+    video_weight = VIDEO_WEIGHT / max(total_chapters, 1)
+    quiz_weight = QUIZ_WEIGHT / max(total_quizzes, 1)
+    return round((completed_chapters * video_weight * 100) + (completed_quizzes * quiz_weight * 100), 2)
+
+
+def lists_to_bitsets(apps, schema_editor):
+    # Ids that no longer exist or belong to another course are dropped and progress is
+    # recomputed from what is left
+    CourseProgress = apps.get_model('student', 'CourseProgress')
+    Chapter = apps.get_model('admin_panel', 'Chapter')
+    Quiz = apps.get_model('admin_panel', 'Quiz')
+    chapters = {
+        chapter_id: (course_id, ordinal)
+        for chapter_id, course_id, ordinal in Chapter.objects.values_list('id', 'module__course_id', 'ordinal')
+    }
+    quizzes = {
+        quiz_id: (course_id, ordinal)
+        for quiz_id, course_id, ordinal in Quiz.objects.values_list('id', 'chapter__module__course_id', 'ordinal')
+    }
+    total_chapters = Counter(course_id for course_id, _ in chapters.values())
+    total_quizzes = Counter(course_id for course_id, _ in quizzes.values())
+
+    operations = []
+    rows = CourseProgress.objects.values_list('id', 'course_id', 'completed_chapters', 'completed_quizzes')
+    for pk, course_id, completed_chapters, completed_quizzes in rows:
+        chapter_ordinals = {
+            chapters[item][1] for item in completed_chapters or [] if chapters.get(item, (None,))[0] == course_id
+        }
+        quiz_ordinals = {
+            quizzes[item][1] for item in completed_quizzes or [] if quizzes.get(item, (None,))[0] == course_id
+        }
+        operations.append(UpdateOne({'id': pk}, {'$set': {
+            'chapter_bits': _bitset(chapter_ordinals),
+            'quiz_bits': _bitset(quiz_ordinals),
+            'chapters_completed': len(chapter_ordinals),
+            'quizzes_completed': len(quiz_ordinals),
+            'progress': compute_progress(
+                len(chapter_ordinals), len(quiz_ordinals), total_chapters[course_id], total_quizzes[course_id]
+            ),
+        }}))
+    collection = schema_editor.connection.cursor().db_conn[CourseProgress._meta.db_table]
+    for offset in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + BATCH_SIZE], ordered=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0018_content_ordinals'),
+        ('student', '0008_analytics_watermark_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseprogress',
+            name='chapter_bits',
+            field=djongo.models.fields.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='courseprogress',
+            name='chapters_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='courseprogress',
+            name='quiz_bits',
+            field=djongo.models.fields.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='courseprogress',
+            name='quizzes_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(lists_to_bitsets, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='courseprogress',
+            name='completed_chapters',
+        ),
+        migrations.RemoveField(
+            model_name='courseprogress',
+            name='completed_quizzes',
+        ),
+    ]
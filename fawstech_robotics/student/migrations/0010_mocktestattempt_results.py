@@ -0,0 +1,63 @@
+# Generated by Django 3.1.12 on 2026-10-19 18:05
+
+from django.db import migrations
+import djongo.models.fields
+from pymongo import UpdateOne
+
+OPTION_FIELDS = ('option_1', 'option_2', 'option_3', 'option_4')
+BATCH_SIZE = 1000
+
+
+def _bulk_set(schema_editor, model, updates):
+    collection = schema_editor.connection.cursor().db_conn[model._meta.db_table]
+    operations = [UpdateOne({'id': pk}, {'$set': values}) for pk, values in updates]
+    for offset in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + BATCH_SIZE], ordered=False)
+
+
+def snapshot_results(apps, schema_editor):
+    # Grade existing attempts against the questions as they are now, like the results listing did
+    MockTestAttempt = apps.get_model('student', 'MockTestAttempt')
+    MockTestQuiz = apps.get_model('admin_panel', 'MockTestQuiz')
+    questions = {}
+    rows = MockTestQuiz.objects.values_list('mock_test_id', 'id', 'question', 'correct_option', *OPTION_FIELDS)
+    for mock_test_id, quiz_id, question, correct_option, *options in rows:
+        questions.setdefault(mock_test_id, {})[quiz_id] = (question, correct_option, options)
+
+    updates = []
+    for pk, mock_test_id, answers in MockTestAttempt.objects.values_list('id', 'mock_test_id', 'answers'):
+        selected = {}
+        for answer in answers or []:
+            selected.setdefault(answer['quiz_id'], answer['selected_option'])
+        results = []
+        for quiz_id, (question, correct_option, options) in sorted(questions.get(mock_test_id, {}).items()):
+            if quiz_id not in selected:
+                continue
+            results.append({
+                'quiz_id': quiz_id,
+                'question': question,
+                'selected_option': selected[quiz_id],
+                'selected_option_text': options[selected[quiz_id] - 1],
+                'correct_option': correct_option,
+                'correct_option_text': options[correct_option - 1] if 1 <= correct_option <= 4 else None,
+                'is_correct': selected[quiz_id] == correct_option,
+            })
+        updates.append((pk, {'results': results}))
+    _bulk_set(schema_editor, MockTestAttempt, updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0018_content_ordinals'),
+        ('student', '0009_progress_bitsets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktestattempt',
+            name='results',
+            field=djongo.models.fields.JSONField(default=list),
+        ),
+        migrations.RunPython(snapshot_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.1.12 on 2026-10-19 18:40
+
+from django.db import migrations
+import djongo.models.fields
+from pymongo import UpdateOne
+
+BATCH_SIZE = 1000
+
+
+def name_search_keys(value):
+    words = ' '.join((value or '').lower().split()).split(' ')
+    return [' '.join(words[index:]) for index in range(len(words)) if words[index]]
+
+
+def phone_search_keys(value):
+    digits = ''.join(ch for ch in (value or '') if ch.isdigit())
+    return sorted({digits, digits[-10:]} - {''}, key=len, reverse=True)
+
+
+def populate_search_keys(apps, schema_editor):
+    Student = apps.get_model('student', 'Student')
+    collection = schema_editor.connection.cursor().db_conn[Student._meta.db_table]
+    operations = [
+        UpdateOne({'id': pk}, {'$set': {
+            'search_name_keys': name_search_keys(full_name),
+            'search_phone_keys': phone_search_keys(phone_number),
+        }})
+        for pk, full_name, phone_number in Student.objects.values_list('id', 'full_name', 'phone_number')
+    ]
+    for offset in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[offset:offset + BATCH_SIZE], ordered=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0010_mocktestattempt_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_name_keys',
+            field=djongo.models.fields.JSONField(db_index=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='search_phone_keys',
+            field=djongo.models.fields.JSONField(db_index=True, default=list),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='student',
+            name='search_name',
+        ),
+        migrations.RemoveField(
+            model_name='student',
+            name='search_phone',
+        ),
+    ]
@@ -11,6 +11,7 @@ from bson import Decimal128  #
 # student/models.py
 from django.db import models
 from django.contrib.auth import get_user_model
+from djongo import models as djongo_models
 
 User = get_user_model()
 
@@ -26,6 +27,12 @@ class Student(models.Model):
     start_date = models.DateField(blank=True, null=True)
     end_date = models.DateField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='student_profiles/', null=True, blank=True)
+    # Normalized copies of name/email/phone so admin search can use indexed prefix lookups. The
+    # name and phone keys are stored as arrays (djongo's JSONField, not Django's, which would store
+    # a JSON string); MongoDB matches a prefix against each element (multikey index)
+    search_name_keys = djongo_models.JSONField(default=list, db_index=True)  # name from every word on
+    search_email = models.CharField(max_length=254, blank=True, default='', db_index=True)
+    search_phone_keys = djongo_models.JSONField(default=list, db_index=True)  # all digits, subscriber number
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -33,6 +40,43 @@ class Student(models.Model):
     def __str__(self):
         return self.full_name
 
+    @staticmethod
+    def normalize_name(value):
+        return ' '.join((value or '').lower().split())
+
+    @staticmethod
+    def normalize_email(value):
+        return (value or '').strip().lower()
+
+    @staticmethod
+    def normalize_phone(value):
+        return ''.join(ch for ch in (value or '') if ch.isdigit())
+
+    @classmethod
+    def name_search_keys(cls, value):
+        # "asha k rao" -> ["asha k rao", "k rao", "rao"], so a prefix of any word matches
+        words = cls.normalize_name(value).split(' ')
+        return [' '.join(words[index:]) for index in range(len(words)) if words[index]]
+
+    @classmethod
+    def phone_search_keys(cls, value):
+        # The number as entered (with any country code) and its 10-digit subscriber number, so
+        # partial searches work with or without the country code
+        digits = cls.normalize_phone(value)
+        return sorted({digits, digits[-10:]} - {''}, key=len, reverse=True)
+
+    def update_search_keys(self):
+        self.search_name_keys = self.name_search_keys(self.full_name)
+        self.search_email = self.normalize_email(self.user.email)
+        self.search_phone_keys = self.phone_search_keys(self.phone_number)
+
+    def save(self, *args, **kwargs):
+        self.update_search_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'search_name_keys', 'search_email', 'search_phone_keys'}
+        super().save(*args, **kwargs)
+
 class EmailOTP(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="email_otp")
     otp = models.CharField(max_length=6)
@@ -115,54 +159,67 @@ class PurchasedCourse(models.Model):
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            models.Index(fields=['purchased_at']),  # analytics rollup watermark
+        ]
 
 from djongo import models
 from admin_panel.models import User, Course, Chapter
 
 from djongo import models
 from django.core.exceptions import ValidationError
+from admin_panel import bitsets
 from admin_panel.models import User, Course
 
 class CourseProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_progress')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress')
-    completed_chapters = models.JSONField(default=list)
-    completed_quizzes = models.JSONField(default=list)  # Ensure default is list
+    # Completed chapters/quizzes as bitsets over their course ordinals ({word index: 32-bit
+    # word}, see admin_panel/bitsets.py) with the matching popcounts kept alongside
+    chapter_bits = models.JSONField(default=dict)
+    quiz_bits = models.JSONField(default=dict)
+    chapters_completed = models.IntegerField(default=0)
+    quizzes_completed = models.IntegerField(default=0)
     progress = models.FloatField(default=0.0)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def clean(self):
-        if not all(isinstance(id, int) for id in self.completed_chapters):
-            raise ValidationError("completed_chapters must contain only integers")
-        if not all(isinstance(id, int) for id in self.completed_quizzes):
-            raise ValidationError("completed_quizzes must contain only integers")
+    objects = models.DjongoManager()
 
     def save(self, *args, **kwargs):
-        # Handle None for completed_chapters and completed_quizzes
-        self.completed_chapters = list(set(self.completed_chapters or []))
-        self.completed_quizzes = list(set(self.completed_quizzes or []))
-        self.clean()
-        total_chapters = self.course.total_chapters
-        total_quizzes = self.course.total_quizzes
-        total_items = total_chapters + total_quizzes
-        if total_items == 0:
-            self.progress = 0.0
-        else:
-            video_weight = 0.7 / max(total_chapters, 1)
-            quiz_weight = 0.3 / max(total_quizzes, 1)
-            self.progress = round(
-                (len(self.completed_chapters) * video_weight * 100) +
-                (len(self.completed_quizzes) * quiz_weight * 100),
-                2
-            )
+        from .progress import compute_progress
+        self.chapter_bits = self.chapter_bits or {}
+        self.quiz_bits = self.quiz_bits or {}
+        self.chapters_completed = bitsets.popcount(self.chapter_bits)
+        self.quizzes_completed = bitsets.popcount(self.quiz_bits)
+        self.progress = compute_progress(
+            self.chapters_completed, self.quizzes_completed,
+            self.course.total_chapters, self.course.total_quizzes,
+        )
         super().save(*args, **kwargs)
 
     class Meta:
         unique_together = ('user', 'course')
         indexes = [
             models.Index(fields=['user', 'course']),
+            models.Index(fields=['updated_at']),  # analytics rollup watermark
         ]
     
+class VideoPosition(models.Model):
+    # Written in bulk by student.buffers.video_position_buffer, never per heartbeat
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_positions')
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name='video_positions')
+    position_seconds = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = models.DjongoManager()
+
+    class Meta:
+        unique_together = ('user', 'chapter')
+        indexes = [
+            models.Index(fields=['user', 'chapter']),
+            models.Index(fields=['updated_at']),  # analytics rollup watermark
+        ]
+
 class QuizAttempt(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_attempts')
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
@@ -183,6 +240,7 @@ class QuizAttempt(models.Model):
         unique_together = ('user', 'quiz')  # One attempt per user per quiz
         indexes = [
             models.Index(fields=['user', 'quiz']),
+            models.Index(fields=['attempted_at']),  # analytics rollup watermark
         ]
 
     def __str__(self):
@@ -194,6 +252,7 @@ class MockTestAttempt(models.Model):
     answers = models.JSONField(default=list)  # List of {"quiz_id": <id>, "selected_option": <1-4>}
     score = models.IntegerField(default=0)  # Total correct answers
     total_questions = models.IntegerField(default=0)  # Total questions in mock test
+    results = models.JSONField(default=list)  # Graded answers per question, snapshotted at submit time
     start_time = models.DateTimeField()  # When attempt started
     end_time = models.DateTimeField()  # When attempt submitted
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,168 @@
+import logging
+from admin_panel import bitsets
+from admin_panel.content_map import content_map
+from admin_panel.models import Course
+from .buffers import progress_buffer
+from .models import CourseProgress, PurchasedCourse
+from .progress_store import apply_marks
+
+logger = logging.getLogger(__name__)
+
+MAX_PROGRESS_EVENTS = 500
+VIDEO_WEIGHT = 0.7
+QUIZ_WEIGHT = 0.3
+# A course counts as completed from here on (progress is rounded to 2 decimals); shared by the
+# student dashboard and the admin analytics funnel
+COMPLETED_PROGRESS = 99.99
+
+
+def compute_progress(completed_chapters, completed_quizzes, total_chapters, total_quizzes):
+    """Progress percentage: videos are worth 70% and quizzes 30% of a course."""
+    if total_chapters + total_quizzes == 0:
+        return 0.0
+    video_weight = VIDEO_WEIGHT / max(total_chapters, 1)
+    quiz_weight = QUIZ_WEIGHT / max(total_quizzes, 1)
+    return round(
+        (completed_chapters * video_weight * 100) +
+        (completed_quizzes * quiz_weight * 100),
+        2
+    )
+
+
+def parse_progress_events(events):
+    """
+    Validate the shape of [{course_id, chapter_id | quiz_id, completed}] events. Returns
+    (events, error message); events are normalised to (course_id, kind, item_id, completed).
+    """
+    if not isinstance(events, list) or not events:
+        return None, "events must be a non-empty list"
+    if len(events) > MAX_PROGRESS_EVENTS:
+        return None, f"At most {MAX_PROGRESS_EVENTS} events can be sent at once"
+    parsed = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            return None, f"Event {index} must be an object"
+        course_id, chapter_id, quiz_id = event.get('course_id'), event.get('chapter_id'), event.get('quiz_id')
+        completed = event.get('completed', True)
+        if not isinstance(course_id, int) or not isinstance(completed, bool):
+            return None, f"Event {index} needs an integer course_id and a boolean completed"
+        if (chapter_id is None) == (quiz_id is None):
+            return None, f"Event {index} needs exactly one of chapter_id or quiz_id"
+        item_id = chapter_id if chapter_id is not None else quiz_id
+        if not isinstance(item_id, int):
+            return None, f"Event {index} has a non-integer chapter_id/quiz_id"
+        parsed.append((course_id, 'chapter' if chapter_id is not None else 'quiz', item_id, completed))
+    return parsed, None
+
+
+def apply_progress_events(user, events, recompute_course_ids=()):
+    """
+    Apply parsed completion events for one user and report the resulting progress of the
+    touched courses plus `recompute_course_ids`.
+    Ownership is checked against the cached content map, which also maps every item to its
+    bit in the stored chapter/quiz bitsets. Each event becomes a single-bit atomic update
+    (progress_store.mark_update) written without reading the row first, so concurrent
+    requests cannot drop each other's completions. With PROGRESS_WRITE_BEHIND the marks are
+    staged in progress_buffer instead and applied by its next flush. Returns (results per
+    course, rejected events as {"index", "error"}).
+    """
+    course_ids = set(recompute_course_ids) | {course_id for course_id, _, _, _ in events}
+    purchased = set(
+        PurchasedCourse.objects.filter(user=user, course_id__in=list(course_ids)).values_list('course_id', flat=True)
+    )
+    contents = content_map.get_many(purchased)
+
+    def ordinals(course_id, kind):
+        content = contents[course_id]
+        return content.chapter_ordinals if kind == 'chapter' else content.quiz_ordinals
+
+    # unknown ids may be content added through another worker since the map was cached
+    stale = {
+        course_id for course_id, kind, item_id, _ in events
+        if course_id in purchased and item_id not in ordinals(course_id, kind)
+    }
+    if stale:
+        contents.update(content_map.reload(stale))
+
+    marks, rejected = {}, []
+    for index, (course_id, kind, item_id, completed) in enumerate(events):
+        if course_id not in purchased:
+            rejected.append({'index': index, 'error': 'Course not purchased'})
+            continue
+        ordinal = ordinals(course_id, kind).get(item_id)
+        if ordinal is None:
+            rejected.append({'index': index, 'error': f'{kind.title()} not found or does not belong to course'})
+            continue
+        marks[(user.id, course_id, kind, ordinal)] = completed
+
+    if progress_buffer.enabled:
+        for key, completed in marks.items():
+            progress_buffer.stage(key, completed)
+    elif marks:
+        apply_marks(marks, contents)
+
+    touched = (set(recompute_course_ids) & purchased) | {course_id for _, course_id, _, _ in marks}
+    results = [
+        {'course_id': course_id, **values}
+        for course_id, values in current_progress(user.id, touched, contents).items()
+    ]
+    logger.info(f"Applied {len(marks)} progress marks for user {user.id} across {len(touched)} courses")
+    return results, rejected
+
+
+def current_progress(user_id, course_ids, contents):
+    """
+    Progress of one user in `course_ids` as stored plus any marks still waiting in
+    progress_buffer, with bits of since-deleted content masked off. One query.
+    """
+    if not course_ids:
+        return {}
+    # pending marks are read before the rows: a mark flushed in between is then in the rows
+    pending = progress_buffer.pending_marks(user_id, course_ids) if progress_buffer.enabled else {}
+    state = {course_id: {'chapter': {}, 'quiz': {}} for course_id in course_ids}
+    for course_id, chapter_bits, quiz_bits in CourseProgress.objects.filter(
+            user_id=user_id, course_id__in=list(course_ids)).values_list('course_id', 'chapter_bits', 'quiz_bits'):
+        state[course_id] = {'chapter': dict(chapter_bits or {}), 'quiz': dict(quiz_bits or {})}
+    for (_, course_id, kind, ordinal), completed in pending.items():
+        if completed:
+            bitsets.add(state[course_id][kind], ordinal)
+        else:
+            bitsets.discard(state[course_id][kind], ordinal)
+
+    progress = {}
+    for course_id, bits in state.items():
+        content = contents[course_id]
+        chapter_bits = bitsets.intersect(bits['chapter'], content.chapter_mask)
+        quiz_bits = bitsets.intersect(bits['quiz'], content.quiz_mask)
+        progress[course_id] = {
+            'progress': compute_progress(
+                bitsets.popcount(chapter_bits), bitsets.popcount(quiz_bits),
+                content.total_chapters, content.total_quizzes,
+            ),
+            'completed_chapters': content.chapter_ids_in(chapter_bits),
+            'completed_quizzes': content.quiz_ids_in(quiz_bits),
+        }
+    return progress
+
+
+def progress_dashboard_rows(user):
+    """
+    One summary row per purchased course for the progress dashboard, built from three
+    queries (purchases, the user's progress rows, projected course rows) joined in memory.
+    """
+    course_ids = list(PurchasedCourse.objects.filter(user=user).values_list('course_id', flat=True))
+    progress_by_course = {
+        row['course_id']: row
+        for row in CourseProgress.objects.filter(user=user).values(
+            'course_id', 'progress', 'chapters_completed', 'updated_at'
+        )
+    }
+    rows = []
+    for course in Course.objects.filter(id__in=course_ids).values(
+            'id', 'name', 'thumbnail', 'description', 'offer_price', 'total_modules', 'total_chapters'):
+        progress = progress_by_course.get(course['id'])
+        course['progress'] = progress['progress'] if progress else 0.0
+        course['updated_at'] = progress['updated_at'] if progress else None
+        course['chapters_completed'] = progress['chapters_completed'] if progress else 0
+        rows.append(course)
+    return rows
@@ -0,0 +1,104 @@
+import logging
+from django.db import IntegrityError
+from django.utils import timezone
+from pymongo import UpdateOne
+from admin_panel import bitsets
+from .models import CourseProgress
+
+logger = logging.getLogger(__name__)
+
+# kind -> (bitset field, popcount field) on CourseProgress
+FIELDS = {
+    'chapter': ('chapter_bits', 'chapters_completed'),
+    'quiz': ('quiz_bits', 'quizzes_completed'),
+}
+
+
+def _progress_stage(content):
+    """
+    Update pipeline stage recomputing `progress` from the stored counts like compute_progress().
+    Until the background recompute has masked off the bits of deleted content the counts can
+    exceed the live totals, so they are capped at them and progress never goes above 100.
+    """
+    from .progress import QUIZ_WEIGHT, VIDEO_WEIGHT
+
+    if content.total_chapters + content.total_quizzes == 0:
+        return {'$set': {'progress': 0.0}}
+    video_weight = VIDEO_WEIGHT / max(content.total_chapters, 1)
+    quiz_weight = QUIZ_WEIGHT / max(content.total_quizzes, 1)
+    return {'$set': {'progress': {'$round': [{'$add': [
+        {'$multiply': [{'$min': ['$chapters_completed', content.total_chapters]}, video_weight, 100]},
+        {'$multiply': [{'$min': ['$quizzes_completed', content.total_quizzes]}, quiz_weight, 100]},
+    ]}, 2]}}}
+
+
+def mark_update(user_id, course_id, kind, ordinal, completed, content, now):
+    """
+    One atomic update flipping a single progress bit. The filter only matches while the bit
+    still has the opposite value, so the word change, the +/-1 on the popcount field and the
+    recomputed progress are applied exactly once however many writers race on the row.
+    """
+    bits_field, count_field = FIELDS[kind]
+    key, mask = bitsets.bit_location(ordinal)
+    path = f'{bits_field}.{key}'
+    if completed:
+        condition = {'$or': [{path: {'$exists': False}}, {path: {'$bitsAllClear': mask}}]}
+        word, delta = {'$add': [{'$ifNull': [f'${path}', 0]}, mask]}, 1
+    else:
+        condition = {path: {'$bitsAllSet': mask}}
+        word, delta = {'$subtract': [f'${path}', mask]}, -1
+    return UpdateOne(
+        {'user_id': user_id, 'course_id': course_id, **condition},
+        [
+            {'$set': {
+                path: word,
+                count_field: {'$add': [{'$ifNull': [f'${count_field}', 0]}, delta]},
+                'updated_at': now,
+            }},
+            _progress_stage(content),
+        ],
+    )
+
+
+def ensure_progress_rows(keys):
+    """
+    Create the missing CourseProgress rows for (user id, course id) keys, empty, so that every
+    mark has a document to match. Rows are inserted through the ORM because djongo assigns
+    the integer `id`; a row created concurrently by another writer is simply skipped.
+    """
+    keys = set(keys)
+    existing = set(CourseProgress.objects.filter(
+        user_id__in=list({user_id for user_id, _ in keys}),
+        course_id__in=list({course_id for _, course_id in keys}),
+    ).values_list('user_id', 'course_id'))
+    missing = [CourseProgress(user_id=user_id, course_id=course_id) for user_id, course_id in keys - existing]
+    if not missing:
+        return
+    try:
+        CourseProgress.objects.bulk_create(missing)
+    except IntegrityError:
+        for progress in missing:
+            try:
+                CourseProgress.objects.bulk_create([progress])
+            except IntegrityError:
+                pass
+
+
+def apply_marks(marks, contents):
+    """
+    Persist {(user id, course id, kind, ordinal): completed} with one bulk_write of
+    mark_update() operations; nothing is read beforehand apart from the existence check of
+    the rows. `contents` maps course ids to their CourseContent. Returns the number of bits
+    that actually flipped.
+    """
+    if not marks:
+        return 0
+    ensure_progress_rows({(user_id, course_id) for user_id, course_id, _, _ in marks})
+    now = timezone.now()
+    operations = [
+        mark_update(user_id, course_id, kind, ordinal, completed, contents[course_id], now)
+        for (user_id, course_id, kind, ordinal), completed in marks.items()
+    ]
+    result = CourseProgress.objects.mongo_bulk_write(operations, ordered=False)
+    logger.debug(f"Applied {len(operations)} progress marks, {result.modified_count} bits changed")
+    return result.modified_count
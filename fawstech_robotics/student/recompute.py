@@ -0,0 +1,149 @@
+import logging
+import threading
+import numpy as np
+from pymongo import UpdateOne
+from admin_panel.content_map import content_map
+from admin_panel.signals import course_content_changed
+from admin_panel.tasks import enqueue
+from .buffers import progress_buffer
+from .models import CourseProgress
+from .progress import QUIZ_WEIGHT, VIDEO_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 1000
+MAX_ATTEMPTS = 3
+
+# Courses waiting for a recompute; several content changes before the worker gets to them
+# collapse into a single pass.
+_pending = set()
+_lock = threading.Lock()
+
+
+def _word_matrix(bits_list, mask):
+    """
+    Bitsets as a uint32 matrix, one row per bitset and one column per word of `mask`, with
+    the bits outside `mask` (deleted content) cleared. Returns (word keys, matrix).
+    """
+    keys = sorted(mask, key=int)
+    columns = {key: column for column, key in enumerate(keys)}
+    matrix = np.zeros((len(bits_list), len(keys)), dtype=np.uint32)
+    for row, bits in enumerate(bits_list):
+        for key, word in (bits or {}).items():
+            if key in columns:
+                matrix[row, columns[key]] = word
+    matrix &= np.array([mask[key] for key in keys], dtype=np.uint32)
+    return keys, matrix
+
+
+def _popcounts(matrix):
+    return np.unpackbits(matrix.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def _bitset(keys, words):
+    return {key: word for key, word in zip(keys, words) if word}
+
+
+def recompute_course_progress(course_id):
+    """
+    Recalculate stored progress for every CourseProgress row of a course against its current
+    content. The stored words are loaded into uint32 matrices once; masking off the bits of
+    deleted chapters/quizzes, the popcounts and the progress math then run over all rows
+    with numpy. Only rows that changed are written, with bulk_write, and only if
+    `updated_at` still holds the value that was read, so a row that took an atomic progress
+    mark meanwhile is not overwritten; such rows are read and recomputed again, up to
+    MAX_ATTEMPTS times, after which the course is queued for another recompute. Returns the
+    number of rows written.
+    """
+    content = content_map.get(course_id)
+    queryset = CourseProgress.objects.filter(course_id=course_id)
+    written = total = 0
+    for _ in range(MAX_ATTEMPTS):
+        rows = list(queryset.values_list(
+            'id', 'chapter_bits', 'quiz_bits', 'chapters_completed', 'quizzes_completed', 'progress', 'updated_at'
+        ))
+        total = total or len(rows)
+        if not rows:
+            break
+        count, skipped = _recompute_rows(rows, content)
+        written += count
+        if not skipped:
+            break
+        queryset = CourseProgress.objects.filter(id__in=skipped)
+    else:
+        logger.warning(f"{len(skipped)} progress rows of course {course_id} kept changing, recomputing again later")
+        schedule_progress_recompute([course_id])
+    if written:
+        logger.info(f"Recomputed progress for {written} of {total} students in course {course_id}")
+    return written
+
+
+def _recompute_rows(rows, content):
+    """Write the recomputed rows that changed; returns (rows written, ids of rows skipped)."""
+    ids, chapter_bits, quiz_bits, stored_chapters, stored_quizzes, stored, updated_at = zip(*rows)
+    chapter_keys, chapter_words = _word_matrix(chapter_bits, content.chapter_mask)
+    quiz_keys, quiz_words = _word_matrix(quiz_bits, content.quiz_mask)
+    chapters_done = _popcounts(chapter_words)
+    quizzes_done = _popcounts(quiz_words)
+
+    if content.total_chapters + content.total_quizzes == 0:
+        progress = np.zeros(len(rows))
+    else:
+        # same operation order as compute_progress()
+        video_weight = VIDEO_WEIGHT / max(content.total_chapters, 1)
+        quiz_weight = QUIZ_WEIGHT / max(content.total_quizzes, 1)
+        progress = np.round((chapters_done * video_weight * 100) + (quizzes_done * quiz_weight * 100), 2)
+    changed = np.flatnonzero(
+        (np.abs(progress - np.asarray(stored, dtype=float)) > 1e-9)
+        | (chapters_done != np.asarray(stored_chapters, dtype=np.int64))
+        | (quizzes_done != np.asarray(stored_quizzes, dtype=np.int64))
+    )
+    operations = [
+        UpdateOne({'id': ids[i], 'updated_at': updated_at[i]}, {'$set': {
+            'chapter_bits': _bitset(chapter_keys, chapter_words[i].tolist()),
+            'quiz_bits': _bitset(quiz_keys, quiz_words[i].tolist()),
+            'chapters_completed': int(chapters_done[i]),
+            'quizzes_completed': int(quizzes_done[i]),
+            'progress': float(progress[i]),
+        }})
+        for i in changed
+    ]
+    written = matched = 0
+    for start in range(0, len(operations), WRITE_BATCH_SIZE):
+        result = CourseProgress.objects.mongo_bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=False)
+        written += result.modified_count
+        matched += result.matched_count
+    if matched == len(operations):
+        return written, []
+    # the rows whose updated_at moved on since they were read are the ones that were skipped
+    read_at = {ids[i]: updated_at[i] for i in changed}
+    skipped = [
+        pk for pk, current in CourseProgress.objects.filter(id__in=list(read_at)).values_list('id', 'updated_at')
+        if current != read_at[pk]
+    ]
+    return written, skipped
+
+
+def _run_pending():
+    with _lock:
+        course_ids = sorted(_pending)
+        _pending.clear()
+    # buffered values were computed against the old content; persist them first
+    progress_buffer.flush()
+    for course_id in course_ids:
+        recompute_course_progress(course_id)
+
+
+def schedule_progress_recompute(course_ids):
+    with _lock:
+        queued = bool(_pending)
+        _pending.update(course_ids)
+    if not queued:
+        enqueue(_run_pending)
+
+
+def _on_content_changed(sender, course_ids, **kwargs):
+    schedule_progress_recompute(course_ids)
+
+
+course_content_changed.connect(_on_content_changed, dispatch_uid='student_progress_recompute')
@@ -2,7 +2,6 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth import password_validation
 from admin_panel.models import User, Course, Module, Chapter, Author
-from admin_panel.utils import get_video_duration
 from .utils import get_video_duration1, calculate_course_duration
 from .models import (Student, LearningPreference, NewsletterSubscriber, CartItem, 
                      Cart, OrderItem, PurchasedCourse, CourseProgress, QuizAttempt,EmailOTP)
@@ -13,6 +12,7 @@ import random
 from django.contrib.auth import get_user_model
 import json
 from django.utils import timezone
+from django.core.files.storage import default_storage
 
 class AuthorSerializer(serializers.ModelSerializer):
     profile_picture = serializers.SerializerMethodField()
@@ -251,11 +251,11 @@ class StudentCourseListSerializer(serializers.ModelSerializer):
         return obj.modules.count()
 
     def get_total_duration_minutes(self, obj):
+        # stored durations only; chapters not probed yet (media.store_video_durations) count as 0
         total_duration = 0
         for module in obj.modules.all():
             for chapter in module.chapters.all():
-                if chapter.video and chapter.video.path and os.path.exists(chapter.video.path):
-                    total_duration += get_video_duration(chapter.video.path)
+                total_duration += chapter.duration_minutes or 0
         return round(total_duration, 2)
 
     def get_total_duration_hours(self, obj):
@@ -558,22 +558,11 @@ class PurchasedCourseSerializer(serializers.ModelSerializer):
 
 class CourseProgressSerializer(serializers.ModelSerializer):
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
-    completed_chapters = serializers.ListField(child=serializers.IntegerField())
-    completed_quizzes = serializers.ListField(child=serializers.IntegerField())
 
     class Meta:
         model = CourseProgress
-        fields = ['course', 'completed_chapters', 'completed_quizzes', 'progress']
-
-    def validate_completed_chapters(self, value):
-        if not all(isinstance(id, int) for id in value):
-            raise serializers.ValidationError("All chapter IDs must be integers")
-        return value
-
-    def validate_completed_quizzes(self, value):
-        if not all(isinstance(id, int) for id in value):
-            raise serializers.ValidationError("All quiz IDs must be integers")
-        return value
+        fields = ['course', 'chapters_completed', 'quizzes_completed', 'progress']
+        read_only_fields = ['chapters_completed', 'quizzes_completed', 'progress']
 
 class CourseWithProgressSerializer(serializers.ModelSerializer):
     progress = serializers.SerializerMethodField()
@@ -608,7 +597,7 @@ class CourseWithProgressSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         try:
             progress = CourseProgress.objects.get(user=user, course=obj)
-            return len(progress.completed_chapters)
+            return progress.chapters_completed
         except CourseProgress.DoesNotExist:
             return 0
 
@@ -620,6 +609,26 @@ class CourseWithProgressSerializer(serializers.ModelSerializer):
         except CourseProgress.DoesNotExist:
             return None
 
+class CourseProgressSummarySerializer(serializers.Serializer):
+    """Dict rows from progress_dashboard_rows(); same output as CourseWithProgressSerializer."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    thumbnail = serializers.SerializerMethodField()
+    description = serializers.CharField()
+    offer_price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    progress = serializers.FloatField()
+    updated_at = serializers.DateTimeField(allow_null=True)
+    number_of_modules = serializers.IntegerField(source='total_modules')
+    number_of_chapters = serializers.IntegerField(source='total_chapters')
+    chapters_completed = serializers.IntegerField()
+
+    def get_thumbnail(self, obj):
+        if not obj['thumbnail']:
+            return None
+        url = default_storage.url(obj['thumbnail'])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 class QuizAttemptSerializer(serializers.ModelSerializer):
     selected_option = serializers.IntegerField()
 
@@ -644,29 +653,12 @@ class MockTestSerializer(serializers.ModelSerializer):
 
 class MockTestAttemptSerializer(serializers.ModelSerializer):
     mock_test = MockTestSerializer(read_only=True)
-    results = serializers.SerializerMethodField()
+    results = serializers.JSONField(read_only=True)
 
     class Meta:
         model = MockTestAttempt
         fields = ['mock_test', 'score', 'total_questions', 'start_time', 'end_time', 'created_at', 'results']
 
-    def get_results(self, obj):
-        results = []
-        quizzes = MockTestQuiz.objects.filter(mock_test=obj.mock_test)
-        for quiz in quizzes:
-            answer = next((a for a in obj.answers if a['quiz_id'] == quiz.id), None)
-            if answer:
-                results.append({
-                    'quiz_id': quiz.id,
-                    'question': quiz.question,
-                    'selected_option': answer['selected_option'],
-                    'selected_option_text': getattr(quiz, f'option_{answer["selected_option"]}'),
-                    'correct_option': quiz.correct_option,
-                    'correct_option_text': getattr(quiz, f'option_{quiz.correct_option}'),
-                    'is_correct': answer['selected_option'] == quiz.correct_option
-                })
-        return results
-
 class VideoAccessSerializer(serializers.ModelSerializer):
     video_url = serializers.SerializerMethodField()
     duration_minutes = serializers.SerializerMethodField()
@@ -1,3 +1,327 @@
-from django.test import TestCase
+import signal
+import time
+from datetime import timedelta
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.utils import timezone
+from admin_panel.content_map import CourseContent, content_map
+from admin_panel.models import User, Author, Course, Module, Chapter, Quiz, MockTest, MockTestQuiz
+from admin_panel.tasks import wait_for_tasks
+from .buffers import CoalescingBuffer, install_sigterm_handler
+from .models import CourseProgress, MockTestAttempt
+from .progress_store import apply_marks, mark_update
+from .recompute import recompute_course_progress
 
-# Create your tests here.
+
+class MarkUpdateTests(SimpleTestCase):
+    def setUp(self):
+        self.content = CourseContent({10: 0, 11: 1, 12: 40}, {20: 0})
+        self.now = timezone.now()
+
+    def test_setting_a_bit_only_matches_while_it_is_clear(self):
+        operation = mark_update(1, 2, 'chapter', 40, True, self.content, self.now)
+        self.assertEqual(operation._filter, {
+            'user_id': 1, 'course_id': 2,
+            '$or': [{'chapter_bits.1': {'$exists': False}}, {'chapter_bits.1': {'$bitsAllClear': 1 << 8}}],
+        })
+        fields = operation._doc[0]['$set']
+        self.assertEqual(fields['chapter_bits.1'], {'$add': [{'$ifNull': ['$chapter_bits.1', 0]}, 1 << 8]})
+        self.assertEqual(fields['chapters_completed'], {'$add': [{'$ifNull': ['$chapters_completed', 0]}, 1]})
+        self.assertEqual(fields['updated_at'], self.now)
+
+    def test_clearing_a_bit_only_matches_while_it_is_set(self):
+        operation = mark_update(1, 2, 'quiz', 0, False, self.content, self.now)
+        self.assertEqual(operation._filter, {'user_id': 1, 'course_id': 2, 'quiz_bits.0': {'$bitsAllSet': 1}})
+        fields = operation._doc[0]['$set']
+        self.assertEqual(fields['quiz_bits.0'], {'$subtract': ['$quiz_bits.0', 1]})
+        self.assertEqual(fields['quizzes_completed'], {'$add': [{'$ifNull': ['$quizzes_completed', 0]}, -1]})
+
+    def test_progress_is_recomputed_from_the_counts(self):
+        operation = mark_update(1, 2, 'chapter', 0, True, self.content, self.now)
+        progress = operation._doc[1]['$set']['progress']['$round']
+        self.assertEqual(progress[1], 2)
+        self.assertEqual(progress[0]['$add'], [
+            {'$multiply': [{'$min': ['$chapters_completed', 3]}, 0.7 / 3, 100]},
+            {'$multiply': [{'$min': ['$quizzes_completed', 1]}, 0.3 / 1, 100]},
+        ])
+
+    def test_empty_course_has_no_progress(self):
+        operation = mark_update(1, 2, 'chapter', 0, True, CourseContent({}, {}), self.now)
+        self.assertEqual(operation._doc[1], {'$set': {'progress': 0.0}})
+
+
+class ApplyMarksTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student@example.com', 'password')
+        self.course = Course.objects.create(
+            thumbnail='course_thumbnails/t.jpg', name='Course', description='d', category='c', price_inr=100,
+        )
+        self.contents = {self.course.id: CourseContent({10: 0, 11: 1}, {20: 0, 21: 1})}
+
+    def apply(self, kind, ordinal, completed):
+        return apply_marks({(self.user.id, self.course.id, kind, ordinal): completed}, self.contents)
+
+    def progress(self):
+        return CourseProgress.objects.get(user=self.user, course=self.course)
+
+    def test_marks_are_applied_once(self):
+        self.assertEqual(self.apply('chapter', 1, True), 1)
+        self.assertEqual(self.apply('chapter', 1, True), 0)
+        progress = self.progress()
+        self.assertEqual((progress.chapter_bits, progress.chapters_completed), ({'0': 2}, 1))
+        self.assertEqual(progress.progress, 35.0)
+
+    def test_clearing_an_unset_bit_changes_nothing(self):
+        self.assertEqual(self.apply('quiz', 0, False), 0)
+        self.assertEqual(self.progress().quizzes_completed, 0)
+
+    def test_set_and_clear(self):
+        self.apply('chapter', 0, True)
+        self.apply('quiz', 1, True)
+        self.assertEqual(self.apply('chapter', 0, False), 1)
+        progress = self.progress()
+        self.assertEqual((progress.chapters_completed, progress.quizzes_completed), (0, 1))
+        self.assertEqual(progress.quiz_bits, {'0': 2})
+        self.assertEqual(progress.progress, 15.0)
+
+
+class RecordingBuffer(CoalescingBuffer):
+    name = 'test'
+
+    def __init__(self, failures=0, **kwargs):
+        super().__init__(**{'enabled': False, 'interval': 3600, 'max_entries': 100, **kwargs})
+        self.failures = failures
+        self.batches = []
+
+    def write(self, entries):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database unavailable')
+        self.batches.append(dict(entries))
+
+
+class CoalescingBufferTests(SimpleTestCase):
+    def make(self, **kwargs):
+        buffer = RecordingBuffer(**kwargs)
+        self.addCleanup(buffer.shutdown)
+        return buffer
+
+    def test_write_must_be_implemented(self):
+        with self.assertRaises(TypeError):
+            CoalescingBuffer(enabled=False, interval=1, max_entries=1)
+
+    def test_latest_value_per_key_is_written(self):
+        buffer = self.make()
+        buffer.stage('a', 1)
+        buffer.stage('a', 2)
+        buffer.stage('b', 3)
+        self.assertEqual(buffer.flush(['a']), 1)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer.batches, [{'a': 2}, {'b': 3}])
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_full_buffer_is_flushed(self):
+        buffer = self.make(max_entries=2)
+        buffer.stage('a', 1)
+        buffer.stage('b', 2)
+        self.assertEqual(buffer.batches, [{'a': 1, 'b': 2}])
+
+    def test_failed_entries_are_retried_unless_superseded(self):
+        buffer = self.make(failures=1)
+        buffer.stage('a', 1)
+        buffer.stage('b', 1)
+        with self.assertLogs('student.buffers', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        buffer.stage('a', 2)
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.batches, [{'a': 2, 'b': 1}])
+
+    def test_entries_are_dropped_after_max_retries(self):
+        buffer = self.make(failures=3, max_retries=3)
+        buffer.stage('a', 1)
+        with self.assertLogs('student.buffers', 'ERROR') as logs:
+            for _ in range(3):
+                buffer.flush()
+        self.assertIn('dropped 1', logs.output[-1])
+        self.assertIsNone(buffer.pending('a'))
+        self.assertEqual(buffer.batches, [])
+
+    def test_sigterm_flushes_and_chains_to_the_previous_handler(self):
+        calls = []
+        original = signal.signal(signal.SIGTERM, lambda signum, frame: calls.append(signum))
+        self.addCleanup(signal.signal, signal.SIGTERM, original)
+        buffer = RecordingBuffer(enabled=True)
+        self.addCleanup(CoalescingBuffer._instances.remove, buffer)
+        buffer.stage('a', 1)
+        install_sigterm_handler()
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        self.assertEqual(buffer.batches, [{'a': 1}])
+        self.assertEqual(calls, [signal.SIGTERM])
+
+
+class RecomputeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student@example.com', 'password')
+        self.course = Course.objects.create(
+            thumbnail='course_thumbnails/t.jpg', name='Course', description='d', category='c', price_inr=100,
+        )
+        module = Module.objects.create(course=self.course, module_name='m')
+        chapters = [Chapter.objects.create(module=module, chapter_name=f'c{i}', video='chapter_videos/v.mp4')
+                    for i in range(3)]
+        for i in range(2):
+            Quiz.objects.create(chapter=chapters[0], question=f'q{i}', option_1='a', option_2='b',
+                                option_3='c', option_4='d', correct_option=1)
+        chapters[2].delete()  # leaves chapter ordinal 2 unused
+        wait_for_tasks()
+        # all three chapters and the first quiz were completed before the deletion
+        self.progress = CourseProgress.objects.create(
+            user=self.user, course=self.course, chapter_bits={'0': 0b111}, quiz_bits={'0': 0b1},
+            chapters_completed=3, quizzes_completed=1, progress=100.0,
+        )
+
+    def tearDown(self):
+        wait_for_tasks()
+
+    def assertRecomputed(self):
+        progress = CourseProgress.objects.get(id=self.progress.id)
+        self.assertEqual((progress.chapter_bits, progress.chapters_completed), ({'0': 0b11}, 2))
+        self.assertEqual((progress.quiz_bits, progress.quizzes_completed), ({'0': 0b1}, 1))
+        self.assertEqual(progress.progress, 85.0)
+
+    def test_bits_of_deleted_content_are_masked_off(self):
+        self.assertEqual(recompute_course_progress(self.course.id), 1)
+        self.assertRecomputed()
+        self.assertEqual(recompute_course_progress(self.course.id), 0)
+
+    def test_row_marked_during_the_recompute_is_retried(self):
+        bulk_write = CourseProgress.objects.mongo_bulk_write
+        calls = []
+
+        def racing_bulk_write(operations, **kwargs):
+            if not calls:
+                # a progress mark lands between the read and the write
+                CourseProgress.objects.filter(id=self.progress.id).update(
+                    updated_at=timezone.now() + timedelta(seconds=1))
+            calls.append(len(operations))
+            return bulk_write(operations, **kwargs)
+
+        with mock.patch.object(CourseProgress.objects, 'mongo_bulk_write', racing_bulk_write):
+            self.assertEqual(recompute_course_progress(self.course.id), 1)
+        self.assertEqual(calls, [1, 1])
+        self.assertRecomputed()
+
+    def test_marks_before_the_recompute_never_exceed_100(self):
+        contents = content_map.get_many([self.course.id])
+        quiz_ordinal = max(contents[self.course.id].quiz_ordinals.values())
+        apply_marks({(self.user.id, self.course.id, 'quiz', quiz_ordinal): True}, contents)
+        progress = CourseProgress.objects.get(id=self.progress.id)
+        self.assertEqual((progress.chapters_completed, progress.quizzes_completed), (3, 2))
+        self.assertEqual(progress.progress, 100.0)
+
+
+class MockTestAttemptTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.mock_test = MockTest.objects.create(heading='h', description='d', image='mock_tests/m.jpg')
+        self.questions = [
+            MockTestQuiz.objects.create(mock_test=self.mock_test, question=f'q{i}', option_1=f'{i}a',
+                                        option_2=f'{i}b', option_3=f'{i}c', option_4=f'{i}d', correct_option=i + 1)
+            for i in range(2)
+        ]
+
+    def submit(self, selected_options):
+        return self.client.post(reverse('mock-test-attempt', args=[self.mock_test.id]), {
+            'start_time': timezone.now().isoformat(),
+            'answers': [{'quiz_id': question.id, 'selected_option': option}
+                        for question, option in zip(self.questions, selected_options)],
+        }, format='json')
+
+    def test_results_are_snapshotted_at_submit_time(self):
+        response = self.submit([1, 1])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['score'], response.data['total_questions']), (1, 2))
+        expected = [
+            {'quiz_id': self.questions[0].id, 'question': 'q0', 'selected_option': 1, 'selected_option_text': '0a',
+             'correct_option': 1, 'correct_option_text': '0a', 'is_correct': True},
+            {'quiz_id': self.questions[1].id, 'question': 'q1', 'selected_option': 1, 'selected_option_text': '1a',
+             'correct_option': 2, 'correct_option_text': '1b', 'is_correct': False},
+        ]
+        self.assertEqual(response.data['results'], expected)
+
+        # later edits do not rewrite the graded attempt
+        self.questions[1].question = 'edited'
+        self.questions[1].correct_option = 1
+        self.questions[1].save()
+        self.assertEqual(MockTestAttempt.objects.get(user=self.user).results, expected)
+        listed = self.client.get(reverse('mock-test-results'))
+        self.assertEqual(listed.data[0]['results'], expected)
+
+    def test_all_questions_must_be_answered(self):
+        self.questions = self.questions[:1]
+        self.assertEqual(self.submit([1]).data, {'error': 'Must answer all questions'})
+
+
+class CourseFacetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.author = Author.objects.create(name='Author', domain='Robotics')
+        self.courses = [
+            Course.objects.create(name=name, description='d', category=category, price_inr=price,
+                                  author=self.author, recommended=position is not None, position=position)
+            for name, category, price, position in (
+                ('Arduino', 'Electronics', 0, 2),
+                ('Sensors', 'Electronics', 800, None),
+                ('Drones', 'Aerial', 3000, 1),
+            )
+        ]
+
+    def tearDown(self):
+        wait_for_tasks()
+
+    def get(self, name='student-courses', **filters):
+        response = self.client.get(reverse(name), filters)
+        self.assertEqual(response.status_code, 200, response.data)
+        names = [row['name'] for row in response.data['results']]
+        counts = {
+            facet: {entry['value']: entry['count'] for entry in entries}
+            for facet, entries in response.data['facets'].items()
+        }
+        return names, counts
+
+    def test_counts_apply_every_filter_but_their_own(self):
+        names, counts = self.get(category='Electronics')
+        self.assertEqual(names, ['Arduino', 'Sensors'])
+        self.assertEqual(counts['category'], {'Aerial': 1, 'Electronics': 2})
+        self.assertEqual(counts['pricing'], {'free': 1, 'paid': 1})
+        self.assertEqual(counts['price_band'], {'free': 1, '500_to_999': 1})
+
+        names, counts = self.get(category='Electronics', pricing='paid')
+        self.assertEqual(names, ['Sensors'])
+        self.assertEqual(counts['category'], {'Aerial': 1, 'Electronics': 1})
+        self.assertEqual(counts['pricing'], {'free': 1, 'paid': 1})
+        self.assertEqual(counts['author'], {str(self.author.id): 1})
+
+    def test_values_within_a_facet_are_combined(self):
+        names, counts = self.get(price_band=['free', '2500_and_above'])
+        self.assertEqual(names, ['Arduino', 'Drones'])
+        self.assertEqual(counts['category'], {'Aerial': 1, 'Electronics': 1})
+
+    def test_recommended_courses_follow_their_position(self):
+        names, counts = self.get('recommended-courses')
+        self.assertEqual(names, ['Drones', 'Arduino'])
+        self.assertEqual(counts['category'], {'Aerial': 1, 'Electronics': 1})
+
+    def test_writes_elsewhere_show_up_after_the_ttl(self):
+        self.get()
+        # an update that skips this process's save hooks, as one made through another worker does
+        Course.objects.filter(id=self.courses[2].id).update(category='Electronics')
+        self.assertEqual(self.get()[1]['category'], {'Aerial': 1, 'Electronics': 2})
+        later = time.monotonic() + 3600
+        with mock.patch('admin_panel.catalog.time.monotonic', return_value=later):
+            self.assertEqual(self.get()[1]['category'], {'Electronics': 3})
@@ -4,8 +4,8 @@ from .views import( StudentSignupView,StudentLoginView,GoogleLoginView,SendEmail
                    NewsletterSubscribeView,StudentProfileView, ProfilePictureUpdateView,ChangePasswordView, SendPhoneOTPView,
                    VerifyPhoneOTPView,DeleteStudentProfileView,StudentCourseListView,RecommendedCoursesAPIView,CourseDetailView,
                    AddToCartAPIView,RemoveFromCartAPIView,CartDetailAPIView,CreateRazorpayOrderAPIView,VerifyRazorpayPaymentAPIView,
-                   PurchasedCoursesAPIView,CourseProgressListView,CourseProgressUpdateView,QuizAttemptView,RecentlyAccessedCoursesView,
-                   MockTestAttemptView,MockTestResultsView,VideoAccessView,AuthorDetailView)
+                   PurchasedCoursesAPIView,CourseProgressListView,CourseProgressUpdateView,CourseProgressBatchView,QuizAttemptView,CourseQuizAttemptsView,RecentlyAccessedCoursesView,
+                   MockTestAttemptView,MockTestResultsView,VideoAccessView,VideoHeartbeatView,AuthorDetailView)
 urlpatterns = [
     path('subscribe-newsletter/', NewsletterSubscribeView.as_view(), name='subscribe-newsletter'),
     path('signup/', StudentSignupView.as_view(), name='student_signup'),
@@ -34,12 +34,15 @@ urlpatterns = [
     path("checkout/verify-payment/", VerifyRazorpayPaymentAPIView.as_view(), name="verify-razorpay-payment"),
     path("courses/purchased/", PurchasedCoursesAPIView.as_view(), name="purchased-courses"),
     path('courses/progress/', CourseProgressListView.as_view(), name='course-progress-list'),
+    path('courses/progress/batch/', CourseProgressBatchView.as_view(), name='course-progress-batch'),
     path('courses/<int:course_id>/progress/', CourseProgressUpdateView.as_view(), name='course-progress-update'),
     path('quizzes/<int:quiz_id>/attempt/', QuizAttemptView.as_view(), name='quiz-attempt'),
+    path('courses/<int:course_id>/quizzes/attempts/', CourseQuizAttemptsView.as_view(), name='course-quiz-attempts'),
     path('courses/recently-accessed/', RecentlyAccessedCoursesView.as_view(), name='recently-accessed-courses'),
     path('mock-tests/<int:mock_test_id>/attempt/', MockTestAttemptView.as_view(), name='mock-test-attempt'),
     path('mock-tests/results/', MockTestResultsView.as_view(), name='mock-test-results'),
     path('courses/<int:course_id>/chapters/<int:chapter_id>/video/', VideoAccessView.as_view(), name='video-access'),
+    path('courses/<int:course_id>/chapters/<int:chapter_id>/video/position/', VideoHeartbeatView.as_view(), name='video-heartbeat'),
     path('author/<int:author_id>/',AuthorDetailView.as_view(), name='author-detail'),
 
 ]
@@ -29,7 +29,8 @@ from .models import (
     Student,
     User as LocalUser,
     CourseProgress,
-    MockTestAttempt
+    MockTestAttempt,
+    VideoPosition
 )
 from .serializers import (
     ChangePasswordSerializer,
@@ -52,11 +53,18 @@ from .serializers import (
     QuizAttemptSerializer,
     CourseWithProgressSerializer,
     CourseProgressSerializer,
+    CourseProgressSummarySerializer,
     MockTestAttemptSerializer,
     VideoAccessSerializer,
     StudentDetailSerializer
 )
 from .utils import send_otp_email
+from .facets import course_facets, parse_facet_filters
+from .progress import COMPLETED_PROGRESS, apply_progress_events, parse_progress_events, progress_dashboard_rows
+from .buffers import progress_buffer, video_position_buffer
+from admin_panel.answer_keys import answer_keys
+from admin_panel.content_map import content_map
+from admin_panel.pagination import StandardResultsPagination
 from admin_panel.models import MockTest, MockTestQuiz, Chapter
 from django.core.exceptions import ObjectDoesNotExist
 import razorpay
@@ -445,21 +453,25 @@ class DeleteStudentProfileView(APIView):
         except Exception as e:
             return Response({"detail": "Error deleting profile.", "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def faceted_course_response(request, view, recommended_only=False):
+    rows, facets = course_facets.query(request, parse_facet_filters(request.query_params), recommended_only)
+    paginator = StandardResultsPagination()
+    page = paginator.paginate_queryset(rows, request, view=view)
+    response = paginator.get_paginated_response(page)
+    response.data['facets'] = facets
+    return response
+
 class StudentCourseListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        courses = Course.objects.all()
-        serializer = StudentCourseListSerializer(courses, many=True, context={'request': request})
-        return Response(serializer.data)
+        return faceted_course_response(request, self)
     
 class RecommendedCoursesAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        courses = Course.objects.filter(recommended__in=[True]).order_by('position')
-        serializer = StudentCourseListSerializer(courses, many=True, context={'request': request})
-        return Response(serializer.data)
+        return faceted_course_response(request, self, recommended_only=True)
     
 class CourseDetailView(RetrieveAPIView):
     queryset = Course.objects.all()
@@ -653,34 +665,22 @@ class PurchasedCoursesAPIView(APIView):
         )
         return Response(serializer.data)
 
-class CourseProgressListView(generics.ListAPIView):
+class CourseProgressListView(APIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = CourseWithProgressSerializer
 
-    def get_queryset(self):
-        user = self.request.user
-        purchased_courses = PurchasedCourse.objects.filter(user=user).values_list('course', flat=True)
-        courses = Course.objects.filter(id__in=purchased_courses)
-        return courses
-
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+    def get(self, request, *args, **kwargs):
+        progress_buffer.flush_user(request.user.id)
         in_progress = []
         not_started = []
         completed = []
 
-        for course in queryset:
-            try:
-                progress = CourseProgress.objects.get(user=request.user, course=course)
-                serialized = CourseWithProgressSerializer(course, context={'request': request}).data
-                if progress.progress >= 99.99:
-                    completed.append(serialized)
-                elif progress.progress > 0:
-                    in_progress.append(serialized)
-                else:
-                    not_started.append(serialized)
-            except CourseProgress.DoesNotExist:
-                serialized = CourseWithProgressSerializer(course, context={'request': request}).data
+        rows = progress_dashboard_rows(request.user)
+        for row, serialized in zip(rows, CourseProgressSummarySerializer(rows, many=True, context={'request': request}).data):
+            if row['progress'] >= COMPLETED_PROGRESS:
+                completed.append(serialized)
+            elif row['progress'] > 0:
+                in_progress.append(serialized)
+            else:
                 not_started.append(serialized)
 
         return Response({
@@ -694,72 +694,59 @@ class CourseProgressUpdateView(generics.GenericAPIView):
     serializer_class = CourseProgressSerializer
 
     def post(self, request, course_id, *args, **kwargs):
-        user = request.user
-        try:
-            course = Course.objects.get(id=course_id)
-        except Course.DoesNotExist:
+        if not Course.objects.filter(id=course_id).exists():
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if not PurchasedCourse.objects.filter(user=user, course=course).exists():
+        completed = request.data.get('completed', True)
+        completed = completed if isinstance(completed, bool) else str(completed).lower() == 'true'
+        events = []
+        for kind, key in (('chapter', 'chapter_id'), ('quiz', 'quiz_id')):
+            item_id = request.data.get(key)
+            if item_id:
+                try:
+                    events.append((course_id, kind, int(item_id), completed))
+                except (TypeError, ValueError):
+                    return Response({'error': f'Invalid {key}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results, rejected = apply_progress_events(request.user, events, recompute_course_ids=[course_id])
+        if rejected:
+            error = rejected[0]['error']
+            code = status.HTTP_403_FORBIDDEN if error == 'Course not purchased' else status.HTTP_404_NOT_FOUND
+            return Response({'error': error}, status=code)
+        if not results:
             return Response({'error': 'Course not purchased'}, status=status.HTTP_403_FORBIDDEN)
 
-        chapter_id = request.data.get('chapter_id')
-        quiz_id = request.data.get('quiz_id')
-        completed = request.data.get('completed', True)
+        return Response(results[0], status=status.HTTP_200_OK)
 
-        progress, created = CourseProgress.objects.get_or_create(
-            user=user, course=course, defaults={'progress': 0.0, 'completed_chapters': [], 'completed_quizzes': []}
-        )
+class CourseProgressBatchView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        if chapter_id:
-            try:
-                chapter = Chapter.objects.get(id=chapter_id, module__course=course)
-            except Chapter.DoesNotExist:
-                return Response({'error': 'Chapter not found or does not belong to course'}, status=status.HTTP_404_NOT_FOUND)
-            completed_chapters = progress.completed_chapters
-            if completed and chapter.id not in completed_chapters:
-                completed_chapters.append(chapter.id)
-            elif not completed and chapter.id in completed_chapters:
-                completed_chapters.remove(chapter.id)
-            progress.completed_chapters = completed_chapters
-
-        if quiz_id:
-            try:
-                quiz = Quiz.objects.get(id=quiz_id, chapter__module__course=course)
-            except Quiz.DoesNotExist:
-                return Response({'error': 'Quiz not found or does not belong to course'}, status=status.HTTP_404_NOT_FOUND)
-            completed_quizzes = progress.completed_quizzes
-            if completed and quiz.id not in completed_quizzes:
-                completed_quizzes.append(quiz.id)
-            elif not completed and quiz.id in completed_quizzes:
-                completed_quizzes.remove(quiz.id)
-            progress.completed_quizzes = completed_quizzes
-
-        progress.save()
+    def post(self, request, *args, **kwargs):
+        events, error = parse_progress_events(request.data.get('events'))
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
 
+        results, rejected = apply_progress_events(request.user, events)
         return Response({
-            'course_id': course.id,
-            'progress': progress.progress,
-            'completed_chapters': progress.completed_chapters,
-            'completed_quizzes': progress.completed_quizzes
+            'results': results,
+            'rejected': rejected
         }, status=status.HTTP_200_OK)
-    
+
 class QuizAttemptView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = QuizAttemptSerializer
 
     def post(self, request, quiz_id, *args, **kwargs):
         user = request.user
-        try:
-            quiz = Quiz.objects.get(id=quiz_id)
-        except Quiz.DoesNotExist:
+        found = answer_keys.quiz(quiz_id)
+        if found is None:
             return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+        answer_key, course_id = found
 
-        course = quiz.chapter.module.course
-        if not PurchasedCourse.objects.filter(user=user, course=course).exists():
+        if not PurchasedCourse.objects.filter(user=user, course_id=course_id).exists():
             return Response({'error': 'Course not purchased'}, status=status.HTTP_403_FORBIDDEN)
 
-        if QuizAttempt.objects.filter(user=user, quiz=quiz).exists():
+        if QuizAttempt.objects.filter(user=user, quiz_id=quiz_id).exists():
             return Response({'error': 'Quiz already attempted'}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = self.get_serializer(data=request.data)
@@ -767,37 +754,60 @@ class QuizAttemptView(generics.GenericAPIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         selected_option = serializer.validated_data['selected_option']
-        is_correct = selected_option == quiz.correct_option
+        correct_option, correct_option_text = answer_key.correct_option(quiz_id)
+        is_correct = selected_option == correct_option
         score = 1 if is_correct else 0
 
         QuizAttempt.objects.create(
             user=user,
-            quiz=quiz,
+            quiz_id=quiz_id,
             selected_option=selected_option,
             is_correct=is_correct
         )
 
-        correct_option_text = getattr(quiz, f'option_{quiz.correct_option}')
         return Response({
-            'quiz_id': quiz.id,
+            'quiz_id': quiz_id,
             'is_correct': is_correct,
             'score': score,
-            'correct_option': quiz.correct_option,
+            'correct_option': correct_option,
             'correct_option_text': correct_option_text
         }, status=status.HTTP_200_OK)
     
+class CourseQuizAttemptsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, course_id):
+        if not PurchasedCourse.objects.filter(user=request.user, course_id=course_id).exists():
+            return Response({'error': 'Course not purchased'}, status=status.HTTP_403_FORBIDDEN)
+
+        # quiz ids come from the cached content map, so the attempts are a single query
+        quiz_ids = content_map.get(course_id).quiz_ids
+        attempts = list(
+            QuizAttempt.objects.filter(user=request.user, quiz_id__in=list(quiz_ids))
+            .order_by('quiz_id')
+            .values('quiz_id', 'selected_option', 'is_correct', 'attempted_at')
+        ) if quiz_ids else []
+        return Response({
+            'course_id': course_id,
+            'total_quizzes': len(quiz_ids),
+            'attempted': len(attempts),
+            'correct': sum(1 for attempt in attempts if attempt['is_correct']),
+            'attempts': attempts,
+        }, status=status.HTTP_200_OK)
+
 class RecentlyAccessedCoursesView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CourseWithProgressSerializer
 
     def get_queryset(self):
         user = self.request.user
+        progress_buffer.flush_user(user.id)
         purchased_course_ids = PurchasedCourse.objects.filter(user=user).values_list('course__id', flat=True)
         progress_qs = CourseProgress.objects.filter(
             user=user,
             course__id__in=purchased_course_ids,
             progress__gt=0,
-            progress__lt=99.99
+            progress__lt=COMPLETED_PROGRESS
         ).order_by('updated_at')
         course_ids = progress_qs.values_list('course__id', flat=True)
         return Course.objects.filter(id__in=course_ids).order_by('id')
@@ -818,12 +828,15 @@ class MockTestAttemptView(APIView):
         if not isinstance(answers, list):
             return Response({"error": "Answers must be a list"}, status=status.HTTP_400_BAD_REQUEST)
 
-        quizzes = MockTestQuiz.objects.filter(mock_test=mock_test)
-        if not quizzes:
+        answer_key = answer_keys.mock_test(mock_test.id, mock_test.quiz_version)
+        submitted_quiz_ids = set(a.get('quiz_id') for a in answers if isinstance(a, dict))
+        if submitted_quiz_ids != answer_key.quiz_id_set:
+            # the questions may have changed since this worker read them
+            answer_key = answer_keys.mock_test(mock_test.id, mock_test.quiz_version, reload=True)
+        if answer_key is None or not len(answer_key):
             return Response({"error": "No questions in this mock test"}, status=status.HTTP_400_BAD_REQUEST)
 
-        quiz_ids = set(q.id for q in quizzes)
-        submitted_quiz_ids = set(a.get('quiz_id') for a in answers if isinstance(a, dict))
+        quiz_ids = answer_key.quiz_id_set
         if submitted_quiz_ids != quiz_ids:
             return Response({"error": "Must answer all questions"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -853,18 +866,36 @@ class MockTestAttemptView(APIView):
             if duration_minutes > mock_test.duration:
                 return Response({"error": "Time limit exceeded"}, status=status.HTTP_400_BAD_REQUEST)
 
-        score = 0
+        selected = {}
         for answer in answers:
-            quiz = next(q for q in quizzes if q.id == answer['quiz_id'])
-            if answer['selected_option'] == quiz.correct_option:
-                score += 1
+            selected.setdefault(answer['quiz_id'], answer['selected_option'])
+        graded_ids = sorted(selected)
+        correct = answer_key.grade(graded_ids, [selected[quiz_id] for quiz_id in graded_ids])
+        score = int(correct.sum())
+
+        # Snapshot of the graded questions, taken from the answer key they were graded with, so
+        # listing results never re-reads the mock test
+        results = []
+        for quiz_id, is_correct in zip(graded_ids, correct.tolist()):
+            question, options = answer_key.question(quiz_id)
+            correct_option, correct_option_text = answer_key.correct_option(quiz_id)
+            results.append({
+                'quiz_id': quiz_id,
+                'question': question,
+                'selected_option': selected[quiz_id],
+                'selected_option_text': options[selected[quiz_id] - 1],
+                'correct_option': correct_option,
+                'correct_option_text': correct_option_text,
+                'is_correct': is_correct,
+            })
 
         attempt = MockTestAttempt(
             user=request.user,
             mock_test=mock_test,
             answers=answers,
             score=score,
-            total_questions=len(quizzes),
+            total_questions=len(answer_key),
+            results=results,
             start_time=start_time,
             end_time=end_time
         )
@@ -878,7 +909,7 @@ class MockTestResultsView(generics.ListAPIView):
     serializer_class = MockTestAttemptSerializer
 
     def get_queryset(self):
-        return MockTestAttempt.objects.filter(user=self.request.user).order_by('-created_at')
+        return MockTestAttempt.objects.filter(user=self.request.user).select_related('mock_test').order_by('-created_at')
 
 class VideoAccessView(APIView):
     permission_classes = [IsAuthenticated]
@@ -901,7 +932,37 @@ class VideoAccessView(APIView):
             return Response({"error": "Chapter not found or does not belong to this course"}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = VideoAccessSerializer(chapter, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = dict(serializer.data)
+        pending = video_position_buffer.pending((request.user.id, chapter.id))
+        if pending:
+            data['resume_position'] = pending['position_seconds']
+        else:
+            data['resume_position'] = VideoPosition.objects.filter(
+                user=request.user, chapter=chapter
+            ).values_list('position_seconds', flat=True).first() or 0.0
+        return Response(data, status=status.HTTP_200_OK)
+
+class VideoHeartbeatView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_id, chapter_id):
+        try:
+            position = float(request.data.get('position'))
+        except (TypeError, ValueError):
+            return Response({"error": "position must be a number of seconds"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= position < float('inf'):
+            return Response({"error": "position must be a non-negative number of seconds"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not PurchasedCourse.objects.filter(user=request.user, course_id=course_id).exists():
+            return Response({"error": "Course not purchased"}, status=status.HTTP_403_FORBIDDEN)
+        if (chapter_id not in content_map.get(course_id).chapter_ids
+                and chapter_id not in content_map.reload([course_id])[course_id].chapter_ids):
+            return Response({"error": "Chapter not found or does not belong to this course"}, status=status.HTTP_404_NOT_FOUND)
+
+        video_position_buffer.stage(
+            (request.user.id, chapter_id), {'position_seconds': position, 'updated_at': timezone.now()}
+        )
+        return Response({"position": position}, status=status.HTTP_200_OK)
 
 class StudentDetailView(APIView):
     permission_classes = [IsAuthenticated]